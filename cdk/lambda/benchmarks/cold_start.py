@@ -0,0 +1,105 @@
+"""Import-time (Lambda init) profile for every controller function.
+
+Each function's ``index`` module is imported in a fresh interpreter with the
+common layer on ``sys.path`` and placeholder environment variables, which is
+what the Lambda init phase does before the first invocation. Reports the median
+init duration per function and the heaviest top-level packages from
+``python -X importtime``.
+
+Usage: python benchmarks/cold_start.py [--runs N] [--top N] [function-path ...]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+LAMBDA_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FUNCTIONS_ROOT = os.path.join(LAMBDA_ROOT, "functions")
+LAYER_PATH = os.path.join(LAMBDA_ROOT, "layers", "common", "python")
+
+# Every os.environ[...] read at import time across the functions
+PLACEHOLDER_ENV = {
+    "DYNAMODB_TABLE": "placeholder-table",
+    "S3_BUCKET": "placeholder-bucket",
+    "BATCH_JOB_QUEUE": "placeholder-queue",
+    "BATCH_JOB_DEFINITION": "placeholder-definition",
+    "AWS_REGION": "us-east-1",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+_IMPORT_SNIPPET = """
+import sys, time
+sys.path[:0] = [{function_dir!r}, {layer_path!r}]
+start = time.perf_counter()
+import index
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def discover_functions() -> list[str]:
+    found = []
+    for dirpath, _, filenames in os.walk(FUNCTIONS_ROOT):
+        if "index.py" in filenames:
+            found.append(os.path.relpath(dirpath, FUNCTIONS_ROOT))
+    return sorted(found)
+
+
+def _parse_importtime(stderr: str) -> dict[str, int]:
+    """Sum self-time (us) per top-level package from ``-X importtime`` output."""
+    per_package: dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, _, name = line[len("import time:"):].split("|", 2)
+            per_package[name.strip().split(".")[0]] += int(self_us)
+        except ValueError:
+            continue
+    return per_package
+
+
+def profile_function(function: str, runs: int) -> tuple[list[float], dict[str, int]]:
+    function_dir = os.path.join(FUNCTIONS_ROOT, function)
+    env = {**os.environ, **PLACEHOLDER_ENV}
+    snippet = _IMPORT_SNIPPET.format(function_dir=function_dir, layer_path=LAYER_PATH)
+    durations = []
+    packages: dict[str, int] = {}
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", snippet],
+            capture_output=True, text=True, env=env, cwd=function_dir,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"{function}: import failed\n{proc.stderr.splitlines()[-1]}")
+        durations.append(float(proc.stdout.strip().splitlines()[-1]))
+        packages = _parse_importtime(proc.stderr)
+    return durations, packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("functions", nargs="*", help="paths under functions/ (default: all)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=3, help="heaviest packages to list per function")
+    args = parser.parse_args()
+
+    functions = args.functions or discover_functions()
+    width = max(len(f) for f in functions)
+    print(f"{'function':<{width}}  {'p50 ms':>8}  {'max ms':>8}  heaviest imports (self ms)")
+    for function in functions:
+        try:
+            durations, packages = profile_function(function, args.runs)
+        except RuntimeError as e:
+            print(f"{function:<{width}}  {'error':>8}  {e}")
+            continue
+        heaviest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        summary = ", ".join(f"{name} {us / 1000:.0f}" for name, us in heaviest)
+        print(f"{function:<{width}}  {statistics.median(durations):8.1f}  {max(durations):8.1f}  {summary}")
+
+
+if __name__ == "__main__":
+    main()
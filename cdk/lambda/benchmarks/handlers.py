@@ -0,0 +1,792 @@
+"""Offline benchmark suite for the controller Lambdas against moto stand-ins.
+
+Seeds realistic DynamoDB/S3/Batch state in-process with moto, then drives the
+real handlers and records, per scenario, the median and p95 latency, the
+median time spent outside AWS calls (``own_ms``), the AWS calls made (by
+service and operation) and the peak Python memory. Results are compared
+against ``baseline.json`` so scaling regressions — e.g. a handler whose call
+count or latency grows faster than its input — fail before deploy.
+
+Usage:
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/handlers.py                      # quick profile, compare to baseline
+    python benchmarks/handlers.py --profile full       # 10k-job sweeps, 5k sessions
+    python benchmarks/handlers.py --only backtests/get --set sweep_jobs=20000
+    python benchmarks/handlers.py --update-baseline
+
+Latencies are machine-dependent; refresh the baseline on the machine that runs
+the comparison. AWS call counts are deterministic and compared exactly.
+
+p50/p95 include the stand-ins' own cost, which does not track DynamoDB's.
+moto deep-copies every table in the region before each TransactWriteItems so
+it can roll back; ``touched_item_snapshots`` narrows that copy to the items
+the transaction names (what DynamoDB isolates), otherwise handlers that
+write one transaction per record would be timed on the size of everything
+stored. Queries on a GSI still scan the whole table in moto, so handlers
+that fan out over index partitions look slower than they are; compare those
+on ``own_ms`` and AWS calls.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import contextlib
+import gzip
+import importlib.util
+import io
+import itertools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Callable
+
+LAMBDA_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FUNCTIONS_ROOT = os.path.join(LAMBDA_ROOT, "functions")
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+sys.path.insert(0, os.path.join(LAMBDA_ROOT, "layers", "common", "python"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.environ.setdefault("METRICS_NAMESPACE", "GnomeControllerBenchmark")
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+from research import owner_index_item, session_list_pk, tag_index_item  # noqa: E402
+from search_index import index_documents  # noqa: E402
+from service_config import SNAPSHOT_INTERVAL, write_version  # noqa: E402
+from utils import dumps  # noqa: E402
+
+PROFILES: dict[str, dict[str, int]] = {
+    "quick": {
+        "sweep_jobs": 500,
+        "submit_jobs": 50,
+        "list_runs": 200,
+        "replay_jobs": 50,
+        "sessions": 100,
+        "iterations": 20,
+        "detail_iterations": 500,
+        "config_keys": 500,
+        "ingest_iterations": 100,
+        "search_documents": 2_000,
+        "repeat": 3,
+    },
+    "full": {
+        "sweep_jobs": 10_000,
+        "submit_jobs": 1_000,
+        "list_runs": 2_000,
+        "replay_jobs": 1_000,
+        "sessions": 5_000,
+        "iterations": 200,
+        "detail_iterations": 5_000,
+        "config_keys": 5_000,
+        "ingest_iterations": 500,
+        "search_documents": 20_000,
+        "repeat": 3,
+    },
+}
+
+BACKTEST_TABLE = "bench-backtests"
+RESEARCH_TABLE = "bench-research-sessions"
+CONFIG_TABLE = "bench-service-config"
+SEARCH_TABLE = "bench-research-search"
+BUCKET = "bench-research-bucket"
+
+
+# ---------------------------------------------------------------------------
+# AWS stand-ins
+# ---------------------------------------------------------------------------
+
+class CallCounter:
+    """Counts AWS calls made through any client created after install(), and
+    records when each was in flight so time spent inside the stand-ins can be
+    told apart from the handler's own work."""
+
+    def __init__(self) -> None:
+        self.active = False
+        self.calls: Counter = Counter()
+        self.intervals: list[tuple[float, float]] = []
+        self._local = threading.local()
+
+    def install(self) -> None:
+        boto3.setup_default_session()
+        boto3.DEFAULT_SESSION.events.register("before-call.*.*", self._before_call)
+        boto3.DEFAULT_SESSION.events.register("after-call.*.*", self._after_call)
+
+    def _before_call(self, **kwargs: Any) -> None:
+        self._local.started = time.perf_counter()
+
+    def _after_call(self, model: Any, **kwargs: Any) -> None:
+        if self.active:
+            self.calls[f"{model.service_model.service_name}:{model.name}"] += 1
+            self.intervals.append((self._local.started, time.perf_counter()))
+
+    def aws_ms(self) -> float:
+        """Wall time during which at least one call was in flight (overlapping calls count once)."""
+        total, end = 0.0, float("-inf")
+        for start, stop in sorted(self.intervals):
+            if stop > end:
+                total += stop - max(start, end)
+                end = stop
+        return total * 1000
+
+    @contextlib.contextmanager
+    def counting(self):
+        self.calls = Counter()
+        self.intervals = []
+        self.active = True
+        try:
+            yield self.calls
+        finally:
+            self.active = False
+
+
+@contextlib.contextmanager
+def touched_item_snapshots():
+    """Make moto's TransactWriteItems roll back from copies of the items it touches."""
+    from moto.dynamodb import models
+    from moto.dynamodb.models.dynamo_type import DynamoType
+
+    original = models.DynamoDBBackend.transact_write_items
+    copy_module = models.copy
+    state = threading.local()
+
+    def deepcopy(obj: Any, *args: Any) -> Any:
+        # The whole-backend snapshot becomes a no-op; anything else is copied as before
+        return obj if obj is getattr(state, "tables", None) else copy_module.deepcopy(obj, *args)
+
+    def transact_write_items(self: Any, transact_items: list[dict]) -> None:
+        saved = []
+        for action in transact_items:
+            request = next(iter(action.values()))
+            table = self.get_table(request["TableName"])
+            key = request.get("Key") or request["Item"]
+            hash_key = DynamoType(key[table.hash_key_attr])
+            range_key = DynamoType(key[table.range_key_attr]) if table.range_key_attr else None
+            saved.append((table, hash_key, range_key, copy_module.deepcopy(table.get_item(hash_key, range_key))))
+        state.tables = self.tables
+        try:
+            original(self, transact_items)
+        except Exception:
+            for table, hash_key, range_key, item in reversed(saved):
+                table.delete_item(hash_key, range_key)
+                if item is not None and range_key is not None:
+                    table.items[hash_key][range_key] = item
+                elif item is not None:
+                    table.items[hash_key] = item
+            raise
+        finally:
+            state.tables = None
+
+    models.DynamoDBBackend.transact_write_items = transact_write_items
+    models.copy = type("copy", (), {"deepcopy": staticmethod(deepcopy)})
+    try:
+        yield
+    finally:
+        models.DynamoDBBackend.transact_write_items = original
+        models.copy = copy_module
+
+
+def _create_table(ddb: Any, name: str, pk: str, gsis: list[tuple[str, str, str]] = (), sk: str = "sk",
+                  numeric: tuple[str, ...] = ()) -> Any:
+    attributes = {pk, sk} | {a for _, h, r in gsis for a in (h, r)}
+    kwargs: dict[str, Any] = {
+        "TableName": name,
+        "KeySchema": [{"AttributeName": pk, "KeyType": "HASH"}, {"AttributeName": sk, "KeyType": "RANGE"}],
+        "AttributeDefinitions": [{"AttributeName": a, "AttributeType": "N" if a in numeric else "S"}
+                                 for a in sorted(attributes)],
+        "BillingMode": "PAY_PER_REQUEST",
+    }
+    if gsis:
+        kwargs["GlobalSecondaryIndexes"] = [{
+            "IndexName": index,
+            "KeySchema": [{"AttributeName": h, "KeyType": "HASH"}, {"AttributeName": r, "KeyType": "RANGE"}],
+            "Projection": {"ProjectionType": "ALL"},
+        } for index, h, r in gsis]
+    return ddb.create_table(**kwargs)
+
+
+def create_infrastructure() -> dict[str, str]:
+    """Create the tables, bucket and Batch queue the stacks define."""
+    ddb = boto3.resource("dynamodb")
+    _create_table(ddb, BACKTEST_TABLE, "run_id", [
+        ("status-submitted-index", "status", "submitted_at"),
+        ("list-index", "list_pk", "submitted_at"),
+    ])
+    _create_table(ddb, RESEARCH_TABLE, "session_name", [
+        ("status-updated-index", "status", "updated_at"),
+        ("list-index", "list_pk", "list_sk"),
+    ])
+    _create_table(ddb, CONFIG_TABLE, "pk")
+    _create_table(ddb, SEARCH_TABLE, "term", [("tf-index", "term", "tf")], sk="doc", numeric=("tf",))
+    boto3.client("s3").create_bucket(Bucket=BUCKET)
+
+    role = boto3.client("iam").create_role(RoleName="bench-batch", AssumeRolePolicyDocument="{}")["Role"]["Arn"]
+    batch = boto3.client("batch")
+    compute = batch.create_compute_environment(
+        computeEnvironmentName="bench-compute", type="UNMANAGED", state="ENABLED", serviceRole=role,
+    )["computeEnvironmentArn"]
+    queue = batch.create_job_queue(
+        jobQueueName="bench-queue", state="ENABLED", priority=1,
+        computeEnvironmentOrder=[{"order": 1, "computeEnvironment": compute}],
+    )["jobQueueArn"]
+    definition = batch.register_job_definition(
+        jobDefinitionName="bench-backtest", type="container",
+        containerProperties={"image": "gnomepy-backtest", "vcpus": 1, "memory": 512},
+    )["jobDefinitionArn"]
+    return {"BATCH_JOB_QUEUE": queue, "BATCH_JOB_DEFINITION": definition}
+
+
+def load_handler(function: str, env: dict[str, str]) -> Callable[[dict, Any], Any]:
+    """Import functions/<function>/index.py as its Lambda would, with its environment."""
+    os.environ.update(env)
+    function_dir = os.path.join(FUNCTIONS_ROOT, function)
+    sys.path.insert(0, function_dir)
+    try:
+        name = "bench_" + function.replace("/", "_").replace("-", "_")
+        spec = importlib.util.spec_from_file_location(name, os.path.join(function_dir, "index.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(function_dir)
+    return module.handler
+
+
+# ---------------------------------------------------------------------------
+# Datasets
+# ---------------------------------------------------------------------------
+
+def _job_row(run_id: str, i: int, status: str) -> dict:
+    row = {
+        "run_id": run_id,
+        "sk": f"JOB#{i:04d}",
+        "status": status,
+        "submitted_at": "2026-01-01T00:00:00+00:00",
+        "array_index": i,
+        "batch_job_id": f"job-{run_id}-{i}",
+        "config_params": {"ewma_alpha": str(round(0.001 * i, 6)), "window": str(10 + i % 20)},
+        "log_stream_name": f"gnome-backtest/default/{i:032x}",
+        "ttl": 4_102_444_800,
+    }
+    if status == "SUCCEEDED":
+        row.update({
+            "final_pnl": Decimal(str(round(1000 - i * 0.37, 4))),
+            "sharpe": Decimal(str(round(1.5 + (i % 17) * 0.01, 4))),
+            "summary": {"final_pnl": Decimal("1000.5"), "sharpe": Decimal("1.52"), "trade_count": 3 * i},
+        })
+    return row
+
+
+def _meta_row(run_id: str, job_count: int, status: str, submitted_at: str) -> dict:
+    return {
+        "run_id": run_id,
+        "sk": "META",
+        "list_pk": "RUN",
+        "status": status,
+        "submitted_at": submitted_at,
+        "submitted_by": "bench@gnometrading.group",
+        "strategy": "EwmaMeanReversion",
+        "job_count": job_count,
+        "completed_count": 0,
+        "failed_count": 0,
+        "config_yaml": "strategy:\n  class_name: EwmaMeanReversion\n" + "# padding\n" * 200,
+        "ttl": 4_102_444_800,
+    }
+
+
+def seed_run(run_id: str, job_count: int, job_status: str, run_status: str = "RUNNING",
+             last_status: str | None = None) -> None:
+    table = boto3.resource("dynamodb").Table(BACKTEST_TABLE)
+    with table.batch_writer() as batch:
+        batch.put_item(Item=_meta_row(run_id, job_count, run_status, "2026-01-01T00:00:00+00:00"))
+        for i in range(job_count):
+            status = last_status if last_status and i == job_count - 1 else job_status
+            batch.put_item(Item=_job_row(run_id, i, status))
+
+
+def seed_run_list(run_count: int) -> None:
+    table = boto3.resource("dynamodb").Table(BACKTEST_TABLE)
+    with table.batch_writer() as batch:
+        for i in range(run_count):
+            batch.put_item(Item=_meta_row(f"list-{i:06d}", 10, "COMPLETED", f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}"))
+            for j in range(10):
+                batch.put_item(Item=_job_row(f"list-{i:06d}", j, "SUCCEEDED"))
+
+
+def seed_compacted_run(run_id: str, job_count: int) -> None:
+    jobs = [{k: v for k, v in _job_row(run_id, i, "SUCCEEDED").items() if k != "ttl"} for i in range(job_count)]
+    key = f"backtests/{run_id}/jobs.json.gz"
+    boto3.client("s3").put_object(Bucket=BUCKET, Key=key, Body=gzip.compress(dumps(jobs).encode()))
+    meta = _meta_row(run_id, job_count, "COMPLETED", "2026-01-01T00:00:00+00:00")
+    meta.pop("ttl")
+    meta["jobs_s3_key"] = key
+    boto3.resource("dynamodb").Table(BACKTEST_TABLE).put_item(Item=meta)
+
+
+def _iteration_row(session: str, n: int) -> dict:
+    return {
+        "session_name": session,
+        "sk": f"ITER#{n:010d}",
+        "iteration": n,
+        "timestamp": f"2026-01-01T{n // 3600 % 24:02d}:{n // 60 % 60:02d}:{n % 60:02d}+00:00",
+        "type": "local",
+        "owner": "agent@gnometrading.group",
+        "title": f"Iteration {n}: tweak EWMA decay",
+        "description": "Tried a shorter decay on the fair-value EWMA and widened quotes. " * 3,
+        "metrics": {"pnl": Decimal(str(round(n * 1.7 % 500, 3))), "sharpe": Decimal(str(round(n % 30 / 10, 3))),
+                    "max_drawdown": Decimal("-0.042"), "trade_count": n * 11},
+        "metadata": {"commit": f"{n:040x}", "params": {"alpha": Decimal("0.05"), "window": 20}},
+        "environment": {"python": "3.13", "gnomepy": "0.9.1", "host": "research-01"},
+    }
+
+
+SEARCH_TOPICS = (
+    "tweak EWMA decay", "queue imbalance skew", "widen quotes on volatility", "inventory penalty sweep",
+    "microprice fair value", "order book depth features", "latency aware cancels", "spread floor tuning",
+    "momentum filter", "adverse selection guard",
+)
+
+
+def seed_search(documents: int, sessions: int = 20) -> None:
+    """Iterations with varied titles across several sessions, written to both tables."""
+    rows = []
+    for n in range(1, documents + 1):
+        row = _iteration_row(f"search-{n % sessions:05d}", n)
+        row["title"] = f"Iteration {n}: {SEARCH_TOPICS[n % len(SEARCH_TOPICS)]}"
+        rows.append(row)
+    with boto3.resource("dynamodb").Table(RESEARCH_TABLE).batch_writer() as batch:
+        for row in rows:
+            batch.put_item(Item=row)
+    index_documents(boto3.resource("dynamodb").Table(SEARCH_TABLE), rows)
+
+
+def seed_sessions(session_count: int, iterations: int, prefix: str = "session") -> None:
+    table = boto3.resource("dynamodb").Table(RESEARCH_TABLE)
+    with table.batch_writer() as batch:
+        for s in range(session_count):
+            name = f"{prefix}-{s:05d}"
+            updated_at = f"2026-01-02T00:{s // 60 % 60:02d}:{s % 60:02d}+00:00"
+            tags = ["ewma", "mm"] if s % 2 else ["momentum"]
+            owner = f"researcher{s % 7}@gnometrading.group"
+            batch.put_item(Item={
+                "session_name": name,
+                "sk": "META",
+                "status": "running" if s % 3 else "completed",
+                "created_at": "2026-01-01T00:00:00+00:00",
+                "updated_at": updated_at,
+                "owner": owner,
+                "description": "Autonomous research session",
+                "tags": tags,
+                "spec_yaml": "objective: maximize sharpe\n" + "# spec line\n" * 300,
+                "branch": f"research/{name}",
+                "iteration_count": iterations,
+                "last_iteration": iterations,
+                "primary_metric": "sharpe",
+                "primary_metric_direction": "maximize",
+                "list_pk": session_list_pk(name),
+                "list_sk": updated_at,
+            })
+            batch.put_item(Item=owner_index_item(name, owner, "2026-01-01T00:00:00+00:00"))
+            for tag in tags:
+                batch.put_item(Item=tag_index_item(name, tag, "2026-01-01T00:00:00+00:00"))
+            for n in range(1, iterations + 1):
+                batch.put_item(Item=_iteration_row(name, n))
+            for n in range(max(1, iterations // 20)):
+                ts = f"2026-01-01T12:00:{n % 60:02d}.{n:06d}+00:00"
+                batch.put_item(Item={"session_name": name, "sk": f"NOTE#{ts}", "timestamp": ts,
+                                     "author": "researcher@gnometrading.group", "content": "Observation " * 20})
+
+
+def _nested_config(keys: int) -> dict:
+    groups = max(1, keys // 50)
+    return {
+        f"group_{g}": {f"key_{k}": {"enabled": True, "threshold": Decimal("0.25"), "label": f"g{g}k{k}"}
+                       for k in range(50)}
+        for g in range(groups)
+    }
+
+
+def seed_service_config(service: str, keys: int) -> dict:
+    config = _nested_config(keys)
+    boto3.resource("dynamodb").Table(CONFIG_TABLE).put_item(Item={
+        "pk": f"SERVICE#{service}", "sk": "CURRENT", "config": config, "version": 7,
+        "updated_at": "2026-01-01T00:00:00+00:00", "updated_by": "bench",
+    })
+    return config
+
+
+def seed_config_history(service: str, keys: int, versions: int) -> int:
+    """Edit one key per version on top of a seeded config; returns the version
+    furthest from a snapshot (the slowest historical read)."""
+    table = boto3.resource("dynamodb").Table(CONFIG_TABLE)
+    seed_service_config(service, keys)
+    previous = table.get_item(Key={"pk": f"SERVICE#{service}", "sk": "CURRENT"})["Item"]
+    first = int(previous["version"]) + 1
+    for version in range(first, first + versions):
+        config = {**previous["config"], "group_0": {**previous["config"]["group_0"], "key_0": {"label": f"v{version}"}}}
+        previous = write_version(table, previous, {
+            **previous, "config": config, "version": version,
+            "updated_at": f"2026-01-02T00:00:00.{version:06d}+00:00", "updated_by": "bench",
+        })
+    return first + SNAPSHOT_INTERVAL - 1
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+def _api_event(method: str, resource: str, path_params: dict | None = None,
+               body: Any = None, query: dict | None = None, headers: dict | None = None) -> dict:
+    return {
+        "httpMethod": method,
+        "resource": resource,
+        "pathParameters": path_params,
+        "queryStringParameters": query,
+        "headers": {"Accept": "application/json", "Accept-Encoding": "gzip, deflate, br", **(headers or {})},
+        # JSON is a binary media type on the API, so request bodies arrive base64-encoded
+        "body": base64.b64encode(json.dumps(body).encode()).decode() if body is not None else None,
+        "isBase64Encoded": body is not None,
+        "requestContext": {"authorizer": {"claims": {"email": "bench@gnometrading.group"}}},
+    }
+
+
+def _response_json(response: dict) -> Any:
+    """Decode a proxy response body, undoing create_response's compression."""
+    body = response.get("body") or "null"
+    if not response.get("isBase64Encoded"):
+        return json.loads(body)
+    raw = base64.b64decode(body)
+    if response["headers"].get("Content-Encoding") == "br":
+        import brotli
+        raw = brotli.decompress(raw)
+    elif response["headers"].get("Content-Encoding") == "gzip":
+        raw = gzip.decompress(raw)
+    return json.loads(raw)
+
+
+def build_scenarios(p: dict[str, int], batch_env: dict[str, str]) -> list[dict]:
+    """Scenarios in run order; each seeds its own dataset and runs against fresh stand-ins."""
+    backtest_env = {"DYNAMODB_TABLE": BACKTEST_TABLE, "S3_BUCKET": BUCKET, **batch_env}
+    research_env = {"DYNAMODB_TABLE": RESEARCH_TABLE, "SEARCH_TABLE": SEARCH_TABLE, "BLOB_BUCKET": BUCKET}
+    config_env = {"DYNAMODB_TABLE": CONFIG_TABLE}
+    run_counter = itertools.count()
+
+    submit_config = (
+        "strategy:\n  class_name: EwmaMeanReversion\n  args:\n"
+        f"    ewma_alpha: {{min: 1, max: {p['submit_jobs']}, step: 1}}\n    window: 20\n"
+    )
+
+    def finalize_setup() -> dict:
+        run_id = f"bench-finalize-{next(run_counter)}"
+        seed_run(run_id, p["sweep_jobs"], "SUCCEEDED", last_status="RUNNING")
+        return {"detail": {"status": "SUCCEEDED", "jobName": f"backtest-{run_id}-{p['sweep_jobs'] - 1}", "jobId": "x"}}
+
+    def replay_setup() -> list[dict]:
+        run_id = f"bench-replay-{next(run_counter)}"
+        seed_run(run_id, p["replay_jobs"], "RUNNING")
+        return [{"detail": {"status": "SUCCEEDED", "jobName": f"backtest-{run_id}-{i}", "jobId": f"j{i}"}}
+                for i in range(p["replay_jobs"])]
+
+    def replay_handler() -> Callable[[list[dict], Any], None]:
+        status_handler = load_handler("backtests/status-handler", backtest_env)
+
+        def replay(events: list[dict], context: Any) -> None:
+            for event in events:
+                status_handler(event, context)
+        return replay
+
+    session_counter = itertools.count()
+
+    def ingest_bodies() -> tuple[str, list[dict]]:
+        name = f"ingest-{next(session_counter):05d}"
+        seed_sessions(1, 0, prefix=name)
+        rows = [_iteration_row(f"{name}-00000", n) for n in range(1, p["ingest_iterations"] + 1)]
+        return f"{name}-00000", [json.loads(dumps({k: v for k, v in row.items() if k not in ("session_name", "sk", "owner", "iteration")}))
+                                 for row in rows]
+
+    def ingest_single_setup() -> list[dict]:
+        session, bodies = ingest_bodies()
+        return [_api_event("POST", "/research/sessions/{sessionName}/iterations", {"sessionName": session}, body=body)
+                for body in bodies]
+
+    def ingest_single_handler() -> Callable[[list[dict], Any], None]:
+        record_iteration = load_handler("research/record-iteration", research_env)
+
+        def ingest(events: list[dict], context: Any) -> None:
+            for event in events:
+                record_iteration(event, context)
+        return ingest
+
+    def ingest_batch_setup() -> dict:
+        session, bodies = ingest_bodies()
+        return _api_event("POST", "/research/sessions/{sessionName}/iterations/batch", {"sessionName": session},
+                          body={"iterations": bodies})
+
+    def ingest_mixed_setup() -> dict:
+        # Explicit numbers just above last_iteration interleaved with unnumbered
+        # entries: allocation must skip past the explicit ones
+        session, bodies = ingest_bodies()
+        for n, body in enumerate(bodies[::2], start=1):
+            body["iteration"] = n
+        return _api_event("POST", "/research/sessions/{sessionName}/iterations/batch", {"sessionName": session},
+                          body={"iterations": bodies})
+
+    def check_ingest_mixed(response: dict) -> None:
+        result = _response_json(response)
+        numbers = [r.get("iteration") for r in result["results"]]
+        if result["created"] != len(numbers) or len(set(numbers)) != len(numbers):
+            raise RuntimeError(f"mixed batch ingest: {result['created']} created, iterations {numbers}")
+
+    series_event = _api_event("GET", "/research/sessions/{sessionName}/series", {"sessionName": "series-00000"},
+                              query={"metrics": "sharpe,pnl", "points": "200"})
+
+    def series_uncached_setup() -> dict:
+        # A new updated_at invalidates the per-container series cache
+        boto3.resource("dynamodb").Table(RESEARCH_TABLE).update_item(
+            Key={"session_name": "series-00000", "sk": "META"},
+            UpdateExpression="SET updated_at = :now",
+            ExpressionAttributeValues={":now": f"2026-02-01T00:00:00.{next(session_counter):06d}+00:00"},
+        )
+        return series_event
+
+    def seed_config() -> None:
+        config = seed_service_config("bench-service", p["config_keys"])
+        defaults = base64.b64encode(json.dumps(config, default=float).encode()).decode()
+        config_event["headers"]["x-config-defaults"] = defaults
+
+    config_event = _api_event("GET", "/config/{service}", {"service": "bench-service"})
+
+    def seed_config_batch() -> None:
+        services = []
+        for i in range(5):
+            config = seed_service_config(f"bench-service-{i}", p["config_keys"])
+            services.append({"service": f"bench-service-{i}", "defaults": json.loads(json.dumps(config, default=float))})
+        config_batch_event["body"] = json.dumps({"services": services})
+
+    config_batch_event = _api_event("POST", "/config")
+
+    def seed_history() -> None:
+        version = seed_config_history("bench-history", p["config_keys"], 2 * SNAPSHOT_INTERVAL)
+        history_event["queryStringParameters"] = {"version": str(version)}
+
+    history_event = _api_event("GET", "/config/{service}/history", {"service": "bench-history"})
+
+    return [
+        {"name": "backtests/submit",
+         "handler": lambda: load_handler("backtests/submit", backtest_env),
+         "event": _api_event("POST", "/backtests", body={"config": submit_config})},
+        {"name": "backtests/get",
+         "handler": lambda: load_handler("backtests/get", backtest_env),
+         "seed": lambda: seed_run("bench-get", p["sweep_jobs"], "SUCCEEDED"),
+         "event": _api_event("GET", "/backtests/{runId}", {"runId": "bench-get"})},
+        {"name": "backtests/get (compacted)",
+         "handler": lambda: load_handler("backtests/get", backtest_env),
+         "seed": lambda: seed_compacted_run("bench-compacted", p["sweep_jobs"]),
+         "event": _api_event("GET", "/backtests/{runId}", {"runId": "bench-compacted"})},
+        {"name": "backtests/list",
+         "handler": lambda: load_handler("backtests/list", backtest_env),
+         "seed": lambda: seed_run_list(p["list_runs"]),
+         "event": _api_event("GET", "/backtests", query={"limit": "50"})},
+        {"name": "backtests/status-handler (finalize)",
+         "handler": lambda: load_handler("backtests/status-handler", backtest_env),
+         "setup": finalize_setup},
+        {"name": "backtests/status-handler (replay)",
+         "handler": replay_handler, "setup": replay_setup, "repeat": 1},
+        {"name": "research/get-session",
+         "handler": lambda: load_handler("research/get-session", research_env),
+         "seed": lambda: seed_sessions(1, p["detail_iterations"], prefix="long"),
+         "event": _api_event("GET", "/research/sessions/{sessionName}", {"sessionName": "long-00000"})},
+        {"name": "research/list-iterations",
+         "handler": lambda: load_handler("research/list-iterations", research_env),
+         "seed": lambda: seed_sessions(1, p["detail_iterations"], prefix="paged"),
+         "event": _api_event("GET", "/research/sessions/{sessionName}/iterations", {"sessionName": "paged-00000"},
+                             query={"limit": "200", "include": "metadata,environment"})},
+        {"name": "research/get-series",
+         "handler": lambda: load_handler("research/get-series", research_env),
+         "seed": lambda: seed_sessions(1, p["detail_iterations"], prefix="series"),
+         "event": series_event},
+        {"name": "research/get-series (uncached)",
+         "handler": lambda: load_handler("research/get-series", research_env),
+         "seed": lambda: seed_sessions(1, p["detail_iterations"], prefix="series"),
+         "setup": series_uncached_setup},
+        {"name": "research/record-iteration (loop)",
+         "handler": ingest_single_handler, "setup": ingest_single_setup},
+        {"name": "research/batch-record-iterations",
+         "handler": lambda: load_handler("research/batch-record-iterations", research_env),
+         "setup": ingest_batch_setup},
+        {"name": "research/batch-record-iterations (mixed)",
+         "handler": lambda: load_handler("research/batch-record-iterations", research_env),
+         "setup": ingest_mixed_setup, "check": check_ingest_mixed},
+        {"name": "research/list-sessions",
+         "handler": lambda: load_handler("research/list-sessions", research_env),
+         "seed": lambda: seed_sessions(p["sessions"], p["iterations"]),
+         "event": _api_event("GET", "/research/sessions", query={"limit": "50"})},
+        {"name": "research/list-sessions (tag)",
+         "handler": lambda: load_handler("research/list-sessions", research_env),
+         "seed": lambda: seed_sessions(p["sessions"], p["iterations"]),
+         "event": _api_event("GET", "/research/sessions", query={"tag": "momentum", "limit": "50"})},
+        {"name": "research/search",
+         "handler": lambda: load_handler("research/search", research_env),
+         "seed": lambda: seed_search(p["search_documents"]),
+         "event": _api_event("GET", "/research/search", query={"q": "queue imbalance skew", "limit": "20"})},
+        {"name": "service-config/get",
+         "handler": lambda: load_handler("service-config/get", {**config_env, "CONFIG_CACHE_TTL_SECONDS": "5"}),
+         "seed": seed_config,
+         "event": config_event},
+        {"name": "service-config/get (uncached)",
+         "handler": lambda: load_handler("service-config/get", {**config_env, "CONFIG_CACHE_TTL_SECONDS": "0"}),
+         "seed": seed_config,
+         "event": config_event},
+        {"name": "service-config/batch",
+         "handler": lambda: load_handler("service-config/batch", config_env),
+         "seed": seed_config_batch,
+         "event": config_batch_event},
+        {"name": "service-config/history (version)",
+         "handler": lambda: load_handler("service-config/history", config_env),
+         "seed": seed_history,
+         "event": history_event},
+    ]
+
+
+def run_scenario(scenario: dict, repeat: int, counter: CallCounter) -> dict:
+    handler = scenario["handler"]()
+    if "seed" in scenario:
+        scenario["seed"]()
+    setup = scenario.get("setup")
+    fixed_event = scenario.get("event")
+    check = scenario.get("check")
+    repeat = scenario.get("repeat", repeat)
+    latencies = []
+    own = []
+    calls: Counter = Counter()
+    sink = io.StringIO()
+
+    # Untimed warm-up: the first call pays for client creation and model loading
+    with contextlib.redirect_stdout(sink):
+        handler(setup() if setup else fixed_event, None)
+
+    for _ in range(repeat):
+        event = setup() if setup else fixed_event
+        with counter.counting() as calls, contextlib.redirect_stdout(sink):
+            start = time.perf_counter()
+            result = handler(event, None)
+            latencies.append((time.perf_counter() - start) * 1000)
+        own.append(latencies[-1] - counter.aws_ms())
+        if isinstance(result, dict) and result.get("statusCode", 200) >= 400:
+            raise RuntimeError(f"{scenario['name']} returned {result['statusCode']}: {result.get('body')}")
+        if check:
+            check(result)
+        sink.seek(0)
+        sink.truncate()
+
+    # Separate pass for memory: tracemalloc slows execution too much to time under it
+    event = setup() if setup else fixed_event
+    tracemalloc.start()
+    with contextlib.redirect_stdout(sink):
+        handler(event, None)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 1),
+        "own_ms": round(statistics.median(own), 1),
+        "aws_calls": sum(calls.values()),
+        "calls_by_operation": dict(sorted(calls.items())),
+        "peak_mb": round(peak / 1e6, 2),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["aws_calls"] > base["aws_calls"]:
+            regressions.append(f"{name}: AWS calls {base['aws_calls']} -> {result['aws_calls']}")
+        for metric in ("p50_ms", "own_ms"):
+            if metric in base and result[metric] > max(base[metric] * (1 + tolerance), base[metric] + min_delta_ms):
+                regressions.append(f"{name}: {metric} {base[metric]} -> {result[metric]}")
+        if result["peak_mb"] > base["peak_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: peak_mb {base['peak_mb']} -> {result['peak_mb']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a profile size, e.g. sweep_jobs=20000")
+    parser.add_argument("--only", action="append", default=[], help="run scenarios whose name starts with this")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed latency/memory growth vs baseline")
+    parser.add_argument("--min-delta-ms", type=float, default=50.0,
+                        help="latency growth below this is treated as noise")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    sizes = dict(PROFILES[args.profile])
+    for override in args.set:
+        key, _, value = override.partition("=")
+        if key not in sizes:
+            parser.error(f"unknown size '{key}' (one of {', '.join(sizes)})")
+        sizes[key] = int(value)
+
+    counter = CallCounter()
+    results = {}
+    names = [s["name"] for s in build_scenarios(sizes, {})]
+    for name in names:
+        if args.only and not any(name.startswith(o) for o in args.only):
+            continue
+        # Fresh stand-ins per scenario, so one scenario's seed never slows another's queries
+        with mock_aws(config={"batch": {"use_docker": False}}), touched_item_snapshots():
+            counter.install()
+            batch_env = create_infrastructure()
+            scenario = next(s for s in build_scenarios(sizes, batch_env) if s["name"] == name)
+            results[name] = run_scenario(scenario, sizes["repeat"], counter)
+        if not args.json:
+            r = results[name]
+            print(f"{name:<42} p50 {r['p50_ms']:9.1f} ms  p95 {r['p95_ms']:9.1f} ms  own {r['own_ms']:8.1f} ms  "
+                  f"calls {r['aws_calls']:6d}  peak {r['peak_mb']:8.2f} MB", flush=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+    profile_key = args.profile if not args.set else None
+
+    if args.update_baseline:
+        if profile_key is None:
+            parser.error("--update-baseline cannot be combined with --set")
+        baselines[profile_key] = {**baselines.get(profile_key, {}), **results}
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline '{profile_key}' updated")
+        return 0
+
+    if profile_key in baselines:
+        regressions = compare(results, baselines[profile_key], args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nREGRESSIONS vs baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions vs baseline '{profile_key}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Microbenchmark: response serialization of a 10k-job backtest run document.
+
+Compares the previous path (per-handler ``_decimal_to_native`` walk followed by
+``json.dumps(cls=DecimalEncoder, sort_keys=True)``) with the single-pass
+``utils.dumps`` used by ``create_response``.
+
+Usage: python benchmarks/serialization.py [--jobs N] [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "layers", "common", "python"))
+
+from utils import dumps  # noqa: E402
+
+
+def _legacy_decimal_to_native(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    if isinstance(obj, dict):
+        return {k: _legacy_decimal_to_native(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_legacy_decimal_to_native(v) for v in obj]
+    return obj
+
+
+class _LegacyDecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return int(obj) if obj == obj.to_integral_value() else float(obj)
+        if isinstance(obj, datetime.datetime):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+def _legacy(doc: dict) -> str:
+    return json.dumps(_legacy_decimal_to_native(doc), cls=_LegacyDecimalEncoder, sort_keys=True)
+
+
+def build_run_document(job_count: int) -> dict:
+    """Build a run document shaped like boto3 returns it (numbers as Decimal)."""
+    jobs = []
+    for i in range(job_count):
+        jobs.append({
+            "run_id": "0000019a1b2c3d4e",
+            "sk": f"JOB#{i:04d}",
+            "status": "SUCCEEDED",
+            "submitted_at": "2026-01-01T00:00:00+00:00",
+            "array_index": Decimal(i),
+            "batch_job_id": f"3f1c2b9e-0000-4000-8000-{i:012d}",
+            "config_params": {"ewma_alpha": str(0.01 * (i % 50)), "window": str(10 + i % 20)},
+            "final_pnl": Decimal(str(round(1234.5678 - i * 0.37, 4))),
+            "sharpe": Decimal(str(round(1.5 + (i % 17) * 0.01, 4))),
+            "summary": {
+                "final_pnl": Decimal(str(round(1234.5678 - i * 0.37, 4))),
+                "sharpe": Decimal("1.52"),
+                "max_drawdown": Decimal("-0.0831"),
+                "trade_count": Decimal(i * 3),
+                "win_rate": Decimal("0.54"),
+            },
+            "log_stream_name": f"gnome-backtest/default/{i:032x}",
+        })
+    return {
+        "run_id": "0000019a1b2c3d4e",
+        "sk": "META",
+        "status": "COMPLETED",
+        "job_count": Decimal(job_count),
+        "completed_count": Decimal(job_count),
+        "failed_count": Decimal(0),
+        "jobs": jobs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    doc = build_run_document(args.jobs)
+    assert json.loads(_legacy(doc)) == json.loads(dumps(doc))
+
+    legacy = min(timeit.repeat(lambda: _legacy(doc), number=1, repeat=args.repeat))
+    single = min(timeit.repeat(lambda: dumps(doc), number=1, repeat=args.repeat))
+    single_sorted = min(timeit.repeat(lambda: dumps(doc, sort_keys=True), number=1, repeat=args.repeat))
+
+    print(f"jobs={args.jobs} payload={len(dumps(doc)) / 1e6:.2f} MB (legacy {len(_legacy(doc)) / 1e6:.2f} MB)")
+    print(f"legacy walk + sorted encode : {legacy * 1000:8.1f} ms")
+    print(f"utils.dumps                 : {single * 1000:8.1f} ms  ({legacy / single:.1f}x)")
+    print(f"utils.dumps(sort_keys=True) : {single_sorted * 1000:8.1f} ms  ({legacy / single_sorted:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
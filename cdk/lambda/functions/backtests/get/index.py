@@ -1,32 +1,24 @@
 """Get backtest run details and job statuses."""
 from __future__ import annotations
 
+import gzip
 import json
 import os
-from decimal import Decimal
 
-import boto3
 from boto3.dynamodb.conditions import Key
-from utils import create_response
+from clients import get_client, get_table
+from metrics import instrumented
+from utils import accepted_encoding, create_response, parse_body, query_all
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
 S3_BUCKET = os.environ["S3_BUCKET"]
 AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
 _LOG_GROUP = "/aws/batch/job"
 
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
-_s3 = boto3.client("s3")
 
-
-def _decimal_to_native(obj):
-    if isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    if isinstance(obj, dict):
-        return {k: _decimal_to_native(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_decimal_to_native(v) for v in obj]
-    return obj
+def _read_compacted_jobs(key: str) -> list[dict]:
+    obj = get_client("s3").get_object(Bucket=S3_BUCKET, Key=key)
+    return json.loads(gzip.decompress(obj["Body"].read()))
 
 
 def _cloudwatch_log_url(log_stream_name: str) -> str:
@@ -39,8 +31,8 @@ def _cloudwatch_log_url(log_stream_name: str) -> str:
 def _presigned_report_url(run_id: str, array_index: int) -> str | None:
     key = f"backtests/{run_id}/jobs/{array_index}/report.html"
     try:
-        _s3.head_object(Bucket=S3_BUCKET, Key=key)
-        return _s3.generate_presigned_url(
+        get_client("s3").head_object(Bucket=S3_BUCKET, Key=key)
+        return get_client("s3").generate_presigned_url(
             "get_object",
             Params={"Bucket": S3_BUCKET, "Key": key},
             ExpiresIn=3600,
@@ -49,29 +41,29 @@ def _presigned_report_url(run_id: str, array_index: int) -> str | None:
         return None
 
 
+@instrumented
 def handler(event: dict, context) -> dict:
     # Support both API Gateway path params and direct invoke
     try:
         run_id = event["pathParameters"]["runId"]
     except (KeyError, TypeError):
-        run_id = (event.get("body") and json.loads(event["body"]) or event).get("run_id")
+        run_id = (parse_body(event) if isinstance(event.get("body"), str) else event).get("run_id")
 
     if not run_id:
         return create_response(400, {"error": "run_id is required"})
 
-    response = _table.query(
-        KeyConditionExpression=Key("run_id").eq(run_id),
-    )
-    items = _decimal_to_native(response.get("Items", []))
+    items = query_all(get_table(DYNAMODB_TABLE), KeyConditionExpression=Key("run_id").eq(run_id))
 
     meta = next((i for i in items if i.get("sk") == "META"), None)
     if not meta:
         return create_response(404, {"error": "run not found"})
 
-    jobs = sorted(
-        [i for i in items if i.get("sk", "").startswith("JOB#")],
-        key=lambda i: i.get("array_index", 0),
-    )
+    # Finished runs have their JOB rows compacted into a single S3 object
+    if jobs_s3_key := meta.pop("jobs_s3_key", None):
+        jobs = _read_compacted_jobs(jobs_s3_key)
+    else:
+        jobs = [i for i in items if i.get("sk", "").startswith("JOB#")]
+    jobs.sort(key=lambda i: i.get("array_index", 0))
 
     # Add presigned report URLs and CloudWatch log links for each job
     for job in jobs:
@@ -83,4 +75,4 @@ def handler(event: dict, context) -> dict:
 
     result = {**meta, "jobs": jobs}
 
-    return create_response(200, result)
+    return create_response(200, result, accept_encoding=accepted_encoding(event))
@@ -1,64 +1,71 @@
-"""List backtest runs (META records only), most recent first."""
+"""List backtest runs (META records only), most recently submitted first, one page at a time.
+
+Query parameters:
+  status  runs with this status
+  limit   page size (default 20, max 100)
+  cursor  ``next_cursor`` from the previous page
+
+META rows carry ``list_pk`` so the sparse ``list-index`` holds only runs;
+every listing is a single index query whose cost tracks the page size, not
+the table size (runs no longer expire once compacted).
+"""
 from __future__ import annotations
 
 import os
-from decimal import Decimal
 
-import boto3
-from boto3.dynamodb.conditions import Key
-from utils import create_response
+from boto3.dynamodb.conditions import Attr, Key
+from clients import get_table
+from metrics import instrumented
+from utils import accepted_encoding, create_response, query_page
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
 DEFAULT_LIMIT = 20
-
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
-
-
-def _decimal_to_native(obj):
-    if isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    if isinstance(obj, dict):
-        return {k: _decimal_to_native(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_decimal_to_native(v) for v in obj]
-    return obj
+MAX_LIMIT = 100
+LIST_INDEX = "list-index"
+RUN_LIST_PK = "RUN"
 
 
+@instrumented
 def handler(event: dict, context) -> dict:
     params = event.get("queryStringParameters") or {}
     status_filter = params.get("status")
     try:
-        limit = int(params.get("limit", DEFAULT_LIMIT))
+        limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
     except (ValueError, TypeError):
         limit = DEFAULT_LIMIT
 
-    # Scan for all META records; DynamoDB doesn't support filtering by SK prefix
-    # in a scan efficiently, so we filter client-side on the small META set.
-    # The GSI on status lets us filter by status without a full scan.
-    if status_filter:
-        response = _table.query(
-            IndexName="status-submitted-index",
-            KeyConditionExpression=Key("status").eq(status_filter),
-            ScanIndexForward=False,
-            Limit=limit,
-            FilterExpression="sk = :meta",
-            ExpressionAttributeValues={":meta": "META"},
-        )
-        items = _decimal_to_native(response.get("Items", []))
-    else:
-        # Scan for META records; table is small (90-day TTL), this is fine.
-        response = _table.scan(
-            FilterExpression="sk = :meta",
-            ExpressionAttributeValues={":meta": "META"},
-        )
-        items = _decimal_to_native(response.get("Items", []))
-        # Sort by submitted_at descending and apply limit
-        items.sort(key=lambda i: i.get("submitted_at", ""), reverse=True)
-        items = items[:limit]
+    try:
+        if status_filter:
+            # JOB rows share the status index; the filter keeps META only, so a
+            # page can come back short while next_cursor is still set.
+            items, next_cursor = query_page(
+                get_table(DYNAMODB_TABLE),
+                limit,
+                params.get("cursor"),
+                IndexName="status-submitted-index",
+                KeyConditionExpression=Key("status").eq(status_filter),
+                FilterExpression=Attr("sk").eq("META"),
+                ScanIndexForward=False,
+            )
+        else:
+            items, next_cursor = query_page(
+                get_table(DYNAMODB_TABLE),
+                limit,
+                params.get("cursor"),
+                IndexName=LIST_INDEX,
+                KeyConditionExpression=Key("list_pk").eq(RUN_LIST_PK),
+                ScanIndexForward=False,
+            )
+    except ValueError as e:
+        return create_response(400, {"error": str(e)})
 
-    # Strip large fields from list view
+    # Strip large fields and index bookkeeping from list view
     for item in items:
         item.pop("config_yaml", None)
+        item.pop("list_pk", None)
 
-    return create_response(200, {"runs": items, "count": len(items)})
+    return create_response(
+        200,
+        {"runs": items, "count": len(items), "next_cursor": next_cursor},
+        accept_encoding=accepted_encoding(event),
+    )
@@ -1,19 +1,21 @@
 """EventBridge handler for AWS Batch job state changes."""
 from __future__ import annotations
 
+import gzip
 import json
 import os
+from datetime import datetime, timezone
 from decimal import Decimal
 
-import boto3
 from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from clients import get_client, get_table
+from metrics import instrumented
+from utils import dumps, query_all
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
 S3_BUCKET = os.environ["S3_BUCKET"]
 
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
-_s3 = boto3.client("s3")
 
 # Batch statuses that count as terminal
 _TERMINAL = {"SUCCEEDED", "FAILED"}
@@ -29,6 +31,10 @@ _STATUS_MAP = {
 }
 
 
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
 def _parse_run_id(job_name: str) -> str | None:
     """Extract run_id from Batch job name 'backtest-<run_id>'."""
     if job_name.startswith("backtest-"):
@@ -36,10 +42,14 @@ def _parse_run_id(job_name: str) -> str | None:
     return None
 
 
+def _s3_key(run_id: str, suffix: str) -> str:
+    return f"backtests/{run_id}/{suffix}"
+
+
 def _read_summary(run_id: str, array_index: int) -> dict:
-    key = f"backtests/{run_id}/jobs/{array_index}/summary.json"
+    key = _s3_key(run_id, f"jobs/{array_index}/summary.json")
     try:
-        obj = _s3.get_object(Bucket=S3_BUCKET, Key=key)
+        obj = get_client("s3").get_object(Bucket=S3_BUCKET, Key=key)
         return json.loads(obj["Body"].read())
     except Exception:
         return {}
@@ -84,18 +94,76 @@ def _update_job(run_id: str, array_index: int, batch_status: str, job_id: str, l
                 update_expr += ", warnings = :w"
                 values[":w"] = summary["warnings"]
 
-    _table.update_item(
-        Key={"run_id": run_id, "sk": sk},
-        UpdateExpression=update_expr,
-        ExpressionAttributeNames=names,
-        ExpressionAttributeValues=values,
+    condition = "attribute_exists(sk)"
+    if batch_status not in _TERMINAL:
+        # A redelivered early event must not move a finished job backwards
+        condition += " AND NOT #st IN (:succeeded, :failed)"
+        values[":succeeded"] = "SUCCEEDED"
+        values[":failed"] = "FAILED"
+
+    table = get_table(DYNAMODB_TABLE)
+    try:
+        table.update_item(
+            Key={"run_id": run_id, "sk": sk},
+            UpdateExpression=update_expr,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ConditionExpression=condition,
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        if "Item" in table.get_item(Key={"run_id": run_id, "sk": sk}, ProjectionExpression="sk"):
+            return  # stale event for a job that has already finished
+        meta = table.get_item(Key={"run_id": run_id, "sk": "META"}, ProjectionExpression="sk, jobs_s3_key").get("Item")
+        if meta is None or "jobs_s3_key" in meta:
+            return  # unknown run, or already compacted to S3: a late/duplicate event
+        # Submit writes each JOB row only after submit_job returns, so a fast
+        # event can beat it. Fail the invoke so Lambda's async retry redelivers
+        # the event once the row exists (and sends it to the DLQ if it never does).
+        raise RuntimeError(f"run {run_id} has no {sk} row yet") from e
+
+
+def _compact_run(run_id: str, jobs: list[dict]) -> None:
+    """Move a finished run's JOB rows into one gzipped S3 object.
+
+    The object is written first and META is pointed at it before any rows are
+    deleted, so readers always see a complete job list from one source or the
+    other. Only the caller that sets the pointer deletes the rows; META drops
+    its TTL so the run outlives the table's 90-day expiry.
+    """
+    key = _s3_key(run_id, "jobs.json.gz")
+    rows = [{k: v for k, v in job.items() if k != "ttl"} for job in jobs]
+    body = dumps(rows).encode()
+    get_client("s3").put_object(
+        Bucket=S3_BUCKET,
+        Key=key,
+        Body=gzip.compress(body),
+        ContentType="application/json",
+        ContentEncoding="gzip",
     )
 
+    try:
+        get_table(DYNAMODB_TABLE).update_item(
+            Key={"run_id": run_id, "sk": "META"},
+            UpdateExpression="SET jobs_s3_key = :k, compacted_at = :now REMOVE #ttl",
+            ConditionExpression="attribute_not_exists(jobs_s3_key)",
+            ExpressionAttributeNames={"#ttl": "ttl"},
+            ExpressionAttributeValues={":k": key, ":now": _now_iso()},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return
+        raise
+
+    with get_table(DYNAMODB_TABLE).batch_writer() as batch:
+        for job in jobs:
+            batch.delete_item(Key={"run_id": run_id, "sk": job["sk"]})
+
 
 def _try_finalize_run(run_id: str) -> None:
-    """If all jobs are terminal, update META with final aggregate status."""
-    response = _table.query(KeyConditionExpression=Key("run_id").eq(run_id))
-    items = response.get("Items", [])
+    """If all jobs are terminal, update META with final aggregate status and compact the run."""
+    items = query_all(get_table(DYNAMODB_TABLE), KeyConditionExpression=Key("run_id").eq(run_id))
 
     meta = next((i for i in items if i.get("sk") == "META"), None)
     if not meta:
@@ -121,14 +189,17 @@ def _try_finalize_run(run_id: str) -> None:
     else:
         run_status = "COMPLETED"
 
-    _table.update_item(
+    get_table(DYNAMODB_TABLE).update_item(
         Key={"run_id": run_id, "sk": "META"},
         UpdateExpression="SET #st = :s, completed_count = :cc, failed_count = :fc",
         ExpressionAttributeNames={"#st": "status"},
         ExpressionAttributeValues={":s": run_status, ":cc": succeeded, ":fc": failed},
     )
 
+    _compact_run(run_id, jobs)
+
 
+@instrumented
 def handler(event: dict, context) -> None:
     detail = event.get("detail", {})
     batch_status = detail.get("status", "")
@@ -6,9 +6,10 @@ import os
 import time
 from datetime import datetime, timezone
 
-import boto3
 import yaml
-from utils import create_response
+from clients import get_client, get_table
+from metrics import instrumented
+from utils import create_response, parse_body
 
 from sweep import expand_sweep, get_param_value, sweep_params
 
@@ -17,12 +18,9 @@ S3_BUCKET = os.environ["S3_BUCKET"]
 BATCH_JOB_QUEUE = os.environ["BATCH_JOB_QUEUE"]
 BATCH_JOB_DEFINITION = os.environ["BATCH_JOB_DEFINITION"]
 
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
-_s3 = boto3.client("s3")
-_batch = boto3.client("batch")
-
 TTL_DAYS = 90
+# Partition of the sparse list-index that the list handler pages through
+RUN_LIST_PK = "RUN"
 
 
 def _run_id() -> str:
@@ -44,7 +42,7 @@ def _s3_key(run_id: str, suffix: str) -> str:
 
 
 def _put_s3_yaml(run_id: str, suffix: str, data: dict) -> None:
-    _s3.put_object(
+    get_client("s3").put_object(
         Bucket=S3_BUCKET,
         Key=_s3_key(run_id, suffix),
         Body=yaml.dump(data, default_flow_style=False).encode(),
@@ -52,9 +50,10 @@ def _put_s3_yaml(run_id: str, suffix: str, data: dict) -> None:
     )
 
 
+@instrumented
 def handler(event: dict, context) -> dict:
     try:
-        body = json.loads(event.get("body") or "{}")
+        body = parse_body(event)
     except Exception:
         body = event  # direct Lambda invoke (CLI)
 
@@ -84,9 +83,10 @@ def handler(event: dict, context) -> dict:
         _put_s3_yaml(run_id, f"jobs/{i}/config.yaml", cfg)
 
     # Write META record to DynamoDB
-    _table.put_item(Item={
+    get_table(DYNAMODB_TABLE).put_item(Item={
         "run_id": run_id,
         "sk": "META",
+        "list_pk": RUN_LIST_PK,
         "status": "SUBMITTED",
         "submitted_at": now,
         "submitted_by": submitted_by,
@@ -106,7 +106,7 @@ def handler(event: dict, context) -> dict:
     # Submit individual Batch jobs and write JOB# records
     batch_job_ids = []
     for i, cfg in enumerate(configs):
-        resp = _batch.submit_job(
+        resp = get_client("batch").submit_job(
             jobName=f"backtest-{run_id}-{i}",
             jobQueue=BATCH_JOB_QUEUE,
             jobDefinition=BATCH_JOB_DEFINITION,
@@ -123,7 +123,7 @@ def handler(event: dict, context) -> dict:
         job_id = resp["jobId"]
         batch_job_ids.append(job_id)
 
-        _table.put_item(Item={
+        get_table(DYNAMODB_TABLE).put_item(Item={
             "run_id": run_id,
             "sk": f"JOB#{i:04d}",
             "status": "SUBMITTED",
@@ -1,15 +1,22 @@
 """
 Latency Probe Orchestrator Lambda - Invokes probe Lambdas across regions and collates results.
+
+Each region's probe Lambda is invoked once with every target (it measures
+them concurrently), and all regions are invoked at once on one bounded pool,
+so a run takes about as long as its slowest region. Regions still running at
+the deadline are reported as errors instead of holding the response past API
+Gateway's 29s limit.
 """
 import json
 import os
+import time
 import concurrent.futures
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List
+from clients import get_client
+from metrics import instrumented
 from utils import lambda_handler
 
-import boto3
-
 REGION_NAMES = {
     "us-east-1": "N. Virginia",
     "us-east-2": "Ohio",
@@ -36,17 +43,40 @@ DEFAULT_REGIONS = [
 ]
 
 PROBE_LAMBDA_NAME = os.environ.get("PROBE_LAMBDA_NAME", "latency-probe")
+# Upper bound on concurrent invokes (and threads) for one run; one per region
+MAX_CONCURRENT_PROBES = int(os.environ.get("PROBE_MAX_CONCURRENCY", "32"))
+# Leaves time to respond inside API Gateway's 29s integration timeout
+DEADLINE_SECONDS = float(os.environ.get("PROBE_DEADLINE_SECONDS", "27"))
+
+
+def _region_error(region: str, error: str) -> Dict[str, Any]:
+    return {
+        "region": region,
+        "regionName": REGION_NAMES.get(region, region),
+        "status": "error",
+        "error": error,
+        "latencies": None,
+    }
 
 
-def invoke_probe_lambda(region: str, target: Dict[str, Any], samples: int, warmup: bool, timeout: int) -> Dict[str, Any]:
-    """Invoke a probe Lambda in a specific region."""
+def invoke_probe_lambda(
+    region: str, targets: List[Dict[str, Any]], samples: int, warmup: bool, timeout: int,
+) -> List[Dict[str, Any]]:
+    """Invoke a probe Lambda in a specific region; one result per target, in order."""
     try:
-        client = boto3.client("lambda", region_name=region)
+        client = get_client("lambda", region_name=region)
         
         payload = {
-            "url": target["url"],
-            "protocol": target.get("protocol", "http"),
-            "method": target.get("method", "GET"),
+            "targets": [
+                {
+                    "url": target["url"],
+                    "protocol": target.get("protocol", "http"),
+                    "method": target.get("method", "GET"),
+                    "mode": target.get("mode", "simple"),
+                    **{key: target[key] for key in ("message", "rate") if key in target},
+                }
+                for target in targets
+            ],
             "samples": samples,
             "warmup": warmup,
             "timeout": timeout,
@@ -65,22 +95,22 @@ def invoke_probe_lambda(region: str, target: Dict[str, Any], samples: int, warmu
             result = json.loads(response_payload["body"])
         else:
             result = response_payload
+        if "results" not in result:
+            raise RuntimeError(result.get("error") or result.get("errorMessage") or "probe returned no results")
             
-        return {
-            "region": region,
-            "regionName": REGION_NAMES.get(region, region),
-            **result,
-        }
+        return [
+            {
+                "region": region,
+                "regionName": REGION_NAMES.get(region, region),
+                **target_result,
+            }
+            for target_result in result["results"]
+        ]
     except Exception as e:
-        return {
-            "region": region,
-            "regionName": REGION_NAMES.get(region, region),
-            "status": "error",
-            "error": str(e),
-            "latencies": None,
-        }
+        return [_region_error(region, str(e)) for _ in targets]
 
 
+@instrumented
 @lambda_handler
 def handler(body):
     """Lambda handler for orchestrating latency probes across regions."""
@@ -93,21 +123,29 @@ def handler(body):
     if not targets:
         raise ValueError("targets is required")
     
+    deadline = time.monotonic() + DEADLINE_SECONDS
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(len(regions), MAX_CONCURRENT_PROBES)))
+    futures = {
+        executor.submit(invoke_probe_lambda, region, targets, samples, warmup, timeout): region
+        for region in regions
+    }
+    concurrent.futures.wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    # Don't wait for stragglers; they are reported as timed out below
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    region_results: list[list[Dict[str, Any]]] = [[] for _ in targets]
+    for future, region in futures.items():
+        if future.done() and not future.cancelled():
+            for index, result in enumerate(future.result()):
+                region_results[index].append(result)
+        else:
+            for index in range(len(targets)):
+                region_results[index].append(_region_error(region, f"no result within the {DEADLINE_SECONDS:g}s deadline"))
+
     results = []
-    
-    for target in targets:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(regions)) as executor:
-            futures = {
-                executor.submit(invoke_probe_lambda, region, target, samples, warmup, timeout): region
-                for region in regions
-            }
-            
-            region_results = []
-            for future in concurrent.futures.as_completed(futures):
-                region_results.append(future.result())
-        
+    for target, target_results in zip(targets, region_results):
         # Sort by average latency (successful probes first)
-        region_results.sort(
+        target_results.sort(
             key=lambda x: (
                 x["status"] != "success",
                 x.get("latencies", {}).get("avg", float("inf")) if x.get("latencies") else float("inf"),
@@ -118,8 +156,9 @@ def handler(body):
             "target": {
                 "url": target["url"],
                 "protocol": target.get("protocol", "http"),
+                "mode": target.get("mode", "simple"),
             },
-            "regions": region_results,
+            "regions": target_results,
         })
     
     response_body = {
@@ -127,4 +166,3 @@ def handler(body):
         "results": results,
     }
     return response_body
-
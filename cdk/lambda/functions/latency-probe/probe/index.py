@@ -1,21 +1,54 @@
 """
 Latency Probe Lambda - Measures HTTP and WebSocket latency to a target URL.
 Deployed to multiple AWS regions for cross-region latency testing.
+
+Accepts one ``url`` or a list of ``targets`` (each ``{url, protocol, method,
+mode, message, rate}``) measured concurrently in one invocation, so the
+orchestrator invokes each region once instead of once per target.
+
+HTTP ``mode``:
+- ``simple`` (default): one new connection per sample, timed end to end
+- ``detailed``: one new connection per sample, split into DNS, TCP connect,
+  TLS handshake, time to first byte and total
+- ``keepalive``: one connection reused for every sample, timing warm request
+  round trips (what a client with a pooled connection sees); the connection
+  setup is reported once, separately
+
+WebSocket ``mode``:
+- ``simple`` (default): one new connection per sample, timing the handshake
+- ``rtt``: one connection, over which ``samples`` messages are sent at
+  ``rate`` per second (default 10) and each response is matched to its
+  request. Ping frames are sent unless the target gives a ``message``: an
+  application message containing ``{id}``, which the server must echo back
+  somewhere in its response (e.g. a request id field). The handshake is
+  reported once, separately; messages with no response within the timeout
+  are counted as ``lost``
 """
+import concurrent.futures
+import http.client
 import json
+import re
+import threading
 import time
 import socket
 import ssl
 import statistics
+import uuid
 from urllib.parse import urlparse
 from typing import Any
 
-import requests
-import websocket
+# Targets measured at once; more would let probes contend for the Lambda's CPU and skew timings
+MAX_CONCURRENT_TARGETS = 8
+HTTP_MODES = ("simple", "detailed", "keepalive")
+WEBSOCKET_MODES = ("simple", "rtt")
+DEFAULT_MESSAGE_RATE = 10.0
+MAX_MESSAGE_RATE = 1000.0
 
 
 def measure_http_latency(url: str, method: str = "GET", timeout: float = 10.0) -> float:
     """Measure HTTP request latency in milliseconds."""
+    import requests  # deferred: only HTTP probes pay for the import
+
     start = time.perf_counter()
     response = requests.request(method, url, timeout=timeout)
     response.raise_for_status()
@@ -23,8 +56,100 @@ def measure_http_latency(url: str, method: str = "GET", timeout: float = 10.0) -
     return (end - start) * 1000
 
 
+def _ms(start: float, end: float) -> float:
+    return (end - start) * 1000
+
+
+def open_http_connection(url: str, timeout: float = 10.0) -> tuple[http.client.HTTPConnection, dict[str, float]]:
+    """Open a connection to the URL's host, timing DNS, TCP connect and TLS separately (ms)."""
+    parsed = urlparse(url)
+    https = parsed.scheme == "https"
+    port = parsed.port or (443 if https else 80)
+
+    start = time.perf_counter()
+    family, sock_type, proto, _, address = socket.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)[0]
+    resolved = time.perf_counter()
+    sock = socket.socket(family, sock_type, proto)
+    sock.settimeout(timeout)
+    # As http.client does: don't let Nagle hold back small request writes
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        sock.connect(address)
+        connected = time.perf_counter()
+        phases = {"dns": _ms(start, resolved), "connect": _ms(resolved, connected)}
+        if https:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parsed.hostname)
+            phases["tls"] = _ms(connected, time.perf_counter())
+    except BaseException:
+        sock.close()
+        raise
+
+    connection_class = http.client.HTTPSConnection if https else http.client.HTTPConnection
+    conn = connection_class(parsed.hostname, port, timeout=timeout)
+    conn.sock = sock
+    return conn, phases
+
+
+def timed_http_request(conn: http.client.HTTPConnection, url: str, method: str = "GET") -> tuple[float, float]:
+    """Send one request on an open connection; returns (time to first byte, total) in ms.
+
+    Time to first byte runs until the status line and headers are parsed.
+    """
+    parsed = urlparse(url)
+    path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+    start = time.perf_counter()
+    conn.request(method, path)
+    response = conn.getresponse()
+    first_byte = time.perf_counter()
+    response.read()
+    end = time.perf_counter()
+    if response.status >= 400:
+        raise RuntimeError(f"{response.status} {response.reason} for url: {url}")
+    return _ms(start, first_byte), _ms(start, end)
+
+
+def measure_http_phases(url: str, method: str = "GET", timeout: float = 10.0) -> dict[str, float]:
+    """One request on a new connection, broken into phases (ms)."""
+    start = time.perf_counter()
+    conn, phases = open_http_connection(url, timeout)
+    try:
+        ttfb, _ = timed_http_request(conn, url, method)
+    finally:
+        conn.close()
+    return {**phases, "ttfb": ttfb, "total": _ms(start, time.perf_counter())}
+
+
+def measure_http_keepalive(
+    url: str, method: str = "GET", samples: int = 5, warmup: bool = True, timeout: float = 10.0,
+) -> tuple[dict[str, float], list[float], int]:
+    """Warm request round trips on one reused connection.
+
+    Returns (setup phases of the first connection, per-sample RTTs in ms,
+    reconnects). A server that closes the connection forces a reconnect,
+    which is counted and kept out of the timings.
+    """
+    conn, setup = open_http_connection(url, timeout)
+    reconnects = 0
+    rtts: list[float] = []
+    try:
+        for i in range(samples + (1 if warmup else 0)):
+            if conn.sock is None:
+                conn.close()
+                conn, _ = open_http_connection(url, timeout)
+                reconnects += 1
+            _, total = timed_http_request(conn, url, method)
+            if warmup and i == 0:
+                continue
+            rtts.append(round(total, 2))
+    finally:
+        conn.close()
+    return {k: round(v, 2) for k, v in setup.items()}, rtts, reconnects
+
+
 def measure_websocket_latency(url: str, timeout: float = 10.0) -> float:
     """Measure WebSocket connection handshake latency in milliseconds."""
+    import websocket  # deferred: only WebSocket probes pay for the import
+
     start = time.perf_counter()
     ws = websocket.create_connection(url, timeout=timeout)
     end = time.perf_counter()
@@ -32,6 +157,91 @@ def measure_websocket_latency(url: str, timeout: float = 10.0) -> float:
     return (end - start) * 1000
 
 
+def measure_websocket_rtt(
+    url: str,
+    samples: int = 5,
+    warmup: bool = True,
+    timeout: float = 10.0,
+    message: str | None = None,
+    rate: float = DEFAULT_MESSAGE_RATE,
+) -> tuple[float, list[float], int]:
+    """Message round trips on one open WebSocket connection.
+
+    Returns (handshake ms, per-message RTTs in ms, messages lost). Sends ping
+    frames, or ``message`` with ``{id}`` replaced by a unique token, on a
+    fixed schedule while a reader thread matches responses by that token, so
+    a slow response does not delay the messages after it.
+    """
+    import websocket  # deferred: only WebSocket probes pay for the import
+
+    run = uuid.uuid4().hex[:12]
+    token_pattern = re.compile(re.escape(run) + r"-(\d+)")
+    total = samples + (1 if warmup else 0)
+    sent: dict[int, float] = {}
+    rtts: dict[int, float] = {}
+    lock = threading.Lock()
+    warmed = threading.Event()
+    complete = threading.Event()
+
+    start = time.perf_counter()
+    ws = websocket.create_connection(url, timeout=timeout)
+    handshake = _ms(start, time.perf_counter())
+
+    def read() -> None:
+        # Runs until the connection is closed (or times out) under it
+        while True:
+            try:
+                opcode, data = ws.recv_data(control_frame=True)
+            except Exception:
+                return
+            received = time.perf_counter()
+            if message is None and opcode != websocket.ABNF.OPCODE_PONG:
+                continue
+            text = data.decode("utf-8", "replace") if isinstance(data, bytes) else data
+            match = token_pattern.search(text)
+            if match is None:
+                continue  # unsolicited traffic, e.g. a subscription update
+            seq = int(match.group(1))
+            with lock:
+                if seq not in sent or seq in rtts:
+                    continue
+                rtts[seq] = _ms(sent[seq], received)
+                if seq == 0:
+                    warmed.set()
+                if len(rtts) == total:
+                    complete.set()
+
+    reader = threading.Thread(target=read, name="websocket-rtt-reader", daemon=True)
+    reader.start()
+    try:
+        interval = 1 / rate
+        next_send = time.perf_counter()
+        for seq in range(total):
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            token = f"{run}-{seq}"
+            with lock:
+                sent[seq] = time.perf_counter()
+            if message is None:
+                ws.ping(token)
+            else:
+                ws.send(message.replace("{id}", token))
+            if warmup and seq == 0:
+                if not warmed.wait(timeout):
+                    raise TimeoutError(f"no response to the warmup message within {timeout:g}s")
+                next_send = time.perf_counter()
+            next_send += interval
+        complete.wait(timeout)
+    finally:
+        ws.close()
+        reader.join(timeout)
+
+    with lock:
+        measured = [round(rtts[seq], 2) for seq in range(1 if warmup else 0, total) if seq in rtts]
+    return round(handshake, 2), measured, samples - len(measured)
+
+
 def measure_tcp_latency(host: str, port: int, use_ssl: bool = False, timeout: float = 10.0) -> float:
     """Measure raw TCP connection latency in milliseconds."""
     start = time.perf_counter()
@@ -63,6 +273,66 @@ def calculate_percentile(data: list[float], percentile: float) -> float:
     return sorted_data[lower] * (1 - weight) + sorted_data[upper] * weight
 
 
+def summarize_latencies(latencies: list[float]) -> dict[str, Any]:
+    return {
+        "samples": latencies,
+        "min": round(min(latencies), 2),
+        "max": round(max(latencies), 2),
+        "avg": round(statistics.mean(latencies), 2),
+        "p50": round(calculate_percentile(latencies, 50), 2),
+        "p95": round(calculate_percentile(latencies, 95), 2),
+    }
+
+
+def run_http_test(url: str, method: str, mode: str, samples: int, warmup: bool, timeout: float) -> dict[str, Any]:
+    """Detailed or keep-alive HTTP test; see the module docstring."""
+    if mode == "keepalive":
+        setup, rtts, reconnects = measure_http_keepalive(url, method, samples, warmup, timeout)
+        return {
+            "status": "success",
+            "mode": mode,
+            "latencies": summarize_latencies(rtts),
+            "connection": setup,
+            "reconnects": reconnects,
+        }
+
+    if warmup:
+        measure_http_phases(url, method, timeout)
+    runs = [measure_http_phases(url, method, timeout) for _ in range(samples)]
+    phases = {
+        phase: summarize_latencies([round(run[phase], 2) for run in runs])
+        for phase in runs[0]
+    }
+    return {
+        "status": "success",
+        "mode": mode,
+        "latencies": phases["total"],
+        "phases": phases,
+    }
+
+
+def run_websocket_rtt_test(
+    url: str, samples: int, warmup: bool, timeout: float, message: str | None, rate: float,
+) -> dict[str, Any]:
+    """WebSocket message RTT test; see the module docstring."""
+    if message is not None and (not isinstance(message, str) or "{id}" not in message):
+        raise ValueError("message must be a string containing {id} so responses can be matched")
+    if not 0 < rate <= MAX_MESSAGE_RATE:
+        raise ValueError(f"rate must be above 0 and at most {MAX_MESSAGE_RATE:g} messages per second")
+
+    handshake, rtts, lost = measure_websocket_rtt(url, samples, warmup, timeout, message, rate)
+    if not rtts:
+        raise RuntimeError(f"no responses to {samples} messages within {timeout:g}s")
+    return {
+        "status": "success",
+        "mode": "rtt",
+        "latencies": summarize_latencies(rtts),
+        "handshake": handshake,
+        "sent": samples,
+        "lost": lost,
+    }
+
+
 def run_latency_test(
     url: str,
     protocol: str,
@@ -70,11 +340,27 @@ def run_latency_test(
     samples: int = 5,
     warmup: bool = True,
     timeout: float = 10.0,
+    mode: str = "simple",
+    message: str | None = None,
+    rate: float = DEFAULT_MESSAGE_RATE,
 ) -> dict[str, Any]:
     """Run latency test with multiple samples."""
     parsed = urlparse(url)
     
     try:
+        if samples < 1:
+            raise ValueError("samples must be at least 1")
+        if protocol == "http" and mode not in HTTP_MODES:
+            raise ValueError(f"Unknown HTTP mode: {mode}")
+        if protocol == "http" and mode != "simple":
+            return run_http_test(url, method, mode, samples, warmup, timeout)
+        if protocol == "websocket" and mode not in WEBSOCKET_MODES:
+            raise ValueError(f"Unknown WebSocket mode: {mode}")
+        if protocol == "websocket" and mode != "simple":
+            return run_websocket_rtt_test(url, samples, warmup, timeout, message, rate)
+        if protocol not in ("http", "websocket") and mode != "simple":
+            raise ValueError(f"mode {mode} is not supported for {protocol}")
+
         # Warmup round (results discarded)
         if warmup:
             if protocol == "http":
@@ -103,14 +389,7 @@ def run_latency_test(
         
         return {
             "status": "success",
-            "latencies": {
-                "samples": latencies,
-                "min": round(min(latencies), 2),
-                "max": round(max(latencies), 2),
-                "avg": round(statistics.mean(latencies), 2),
-                "p50": round(calculate_percentile(latencies, 50), 2),
-                "p95": round(calculate_percentile(latencies, 95), 2),
-            }
+            "latencies": summarize_latencies(latencies),
         }
     except Exception as e:
         return {
@@ -120,17 +399,57 @@ def run_latency_test(
         }
 
 
+def run_targets(
+    targets: list[dict[str, Any]],
+    samples: int = 5,
+    warmup: bool = True,
+    timeout: float = 10.0,
+) -> list[dict[str, Any]]:
+    """Run latency tests for several targets concurrently, in target order."""
+    def run(target: dict[str, Any]) -> dict[str, Any]:
+        return run_latency_test(
+            target["url"],
+            target.get("protocol", "http"),
+            target.get("method", "GET"),
+            samples,
+            warmup,
+            timeout,
+            target.get("mode", "simple"),
+            target.get("message"),
+            target.get("rate", DEFAULT_MESSAGE_RATE),
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(targets), MAX_CONCURRENT_TARGETS)) as executor:
+        return list(executor.map(run, targets))
+
+
 def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     """Lambda handler for latency probe."""
     # Can be invoked directly with payload or via API Gateway
-    body = event if "url" in event else json.loads(event.get("body", "{}"))
+    body = event if "url" in event or "targets" in event else json.loads(event.get("body", "{}"))
     
-    url = body.get("url")
-    protocol = body.get("protocol", "http")
-    method = body.get("method", "GET")
     samples = body.get("samples", 5)
     warmup = body.get("warmup", True)
     timeout = body.get("timeout", 10000) / 1000  # Convert ms to seconds
+
+    targets = body.get("targets")
+    if targets is not None:
+        if not isinstance(targets, list) or not targets or not all(isinstance(t, dict) and t.get("url") for t in targets):
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "targets must be a non-empty list of objects with a url"})
+            }
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"results": run_targets(targets, samples, warmup, timeout)})
+        }
+
+    url = body.get("url")
+    protocol = body.get("protocol", "http")
+    method = body.get("method", "GET")
+    mode = body.get("mode", "simple")
+    message = body.get("message")
+    rate = body.get("rate", DEFAULT_MESSAGE_RATE)
     
     if not url:
         return {
@@ -138,7 +457,7 @@ def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
             "body": json.dumps({"error": "url is required"})
         }
     
-    result = run_latency_test(url, protocol, method, samples, warmup, timeout)
+    result = run_latency_test(url, protocol, method, samples, warmup, timeout, mode, message, rate)
     
     return {
         "statusCode": 200 if result["status"] == "success" else 500,
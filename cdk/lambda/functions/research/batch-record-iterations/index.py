@@ -0,0 +1,288 @@
+"""Record many research iterations in one request.
+
+Body: {"iterations": [<record-iteration body>, ...]} with at most
+MAX_ITERATIONS entries. ``last_iteration`` on META is first raised to the
+highest explicit ``iteration`` in the request, then entries without one get
+consecutive numbers reserved with one atomic bump (``research``), so
+allocated numbers never collide with explicit ones.
+Iterations are written with TransactWriteItems in chunks, each put
+conditional on the iteration not existing and each chunk checking that the
+session exists. A chunk cancelled for a transient reason (a conflicting
+transaction, throttling) is retried with backoff; entries still unwritten
+after MAX_WRITE_ATTEMPTS are reported as ``failed`` rather than failing the
+request, so a client retries exactly those. Explicit numbers that already
+exist are reported as ``conflict``; auto-numbered entries whose reserved
+number turns out to be taken (a legacy explicit write) get new numbers.
+META then gets a single ADD iteration_count / updated_at bump for
+everything written, and the best of the written iterations is offered to
+the conditional best-of update. Written iterations are then added to the
+search index. Oversized metrics/metadata/environment go to S3 first (see
+``blobs``), which also keeps large chunks under the 4 MB transaction limit.
+"""
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from blobs import ITERATION_FIELDS, offload
+from botocore.exceptions import ClientError
+from clients import get_table
+from metrics import instrumented
+from research import (
+    MAX_ITERATION,
+    IterationsExhausted,
+    SessionNotFound,
+    iteration_sk,
+    minimizes,
+    parse_iteration,
+    pick_best,
+    raise_iteration_counter,
+    reserve_iterations,
+    touch_session,
+    update_best,
+)
+from search_index import index_documents
+from utils import create_response, parse_body
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+SEARCH_TABLE = os.environ["SEARCH_TABLE"]
+MAX_ITERATIONS = 500
+# TransactWriteItems takes 100 actions; one is the session ConditionCheck
+CHUNK_SIZE = 99
+MAX_WRITE_ATTEMPTS = 4
+MAX_ALLOCATION_ATTEMPTS = 3
+# Cancellation reasons (and request errors) that a later attempt can succeed past
+TRANSIENT_REASONS = frozenset((
+    "TransactionConflict",
+    "ThrottlingError",
+    "ProvisionedThroughputExceeded",
+    "RequestLimitExceeded",
+))
+TRANSIENT_ERRORS = frozenset((
+    "ThrottlingException",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "TransactionInProgressException",
+    "InternalServerError",
+))
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _caller(event: dict) -> str:
+    try:
+        claims = event["requestContext"]["authorizer"]["claims"]
+        return claims.get("email") or claims.get("cognito:username", "cli")
+    except (KeyError, TypeError):
+        return "cli"
+
+
+def _build_item(session_name: str, iteration: int, body: dict, owner: str, now: str) -> dict:
+    return {
+        "session_name": session_name,
+        "sk": iteration_sk(iteration),
+        "iteration": iteration,
+        "timestamp": body.get("timestamp") or now,
+        "type": body.get("type", "local"),
+        "owner": owner,
+        "title": body.get("title", ""),
+        "description": body.get("description", ""),
+        "metrics": body.get("metrics", {}),
+        "metadata": body.get("metadata", {}),
+        "environment": body.get("environment", {}),
+    }
+
+
+def _backoff(attempt: int) -> None:
+    time.sleep(min(0.05 * 2 ** attempt, 1.0))
+
+
+def _write_chunk(session_name: str, items: list[dict]) -> tuple[list[dict], list[dict], str | None]:
+    """Transactionally put items, dropping conflicts and retrying transient cancellations.
+
+    Returns the conflicting items, the items left unwritten after
+    MAX_WRITE_ATTEMPTS, and the last transient reason (for reporting).
+    """
+    client = get_table(DYNAMODB_TABLE).meta.client
+    conflicts: list[dict] = []
+    attempt = 0
+    while items:
+        actions = [{
+            "ConditionCheck": {
+                "TableName": DYNAMODB_TABLE,
+                "Key": {"session_name": session_name, "sk": "META"},
+                "ConditionExpression": "attribute_exists(sk)",
+            },
+        }] + [{
+            "Put": {
+                "TableName": DYNAMODB_TABLE,
+                "Item": item,
+                "ConditionExpression": "attribute_not_exists(sk)",
+            },
+        } for item in items]
+        try:
+            client.transact_write_items(TransactItems=actions)
+            return conflicts, [], None
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "TransactionCanceledException":
+                reasons = [r.get("Code") for r in e.response.get("CancellationReasons", [])]
+                if not reasons:
+                    raise
+                if reasons[0] == "ConditionalCheckFailed":
+                    raise SessionNotFound(session_name) from e
+                failed = {i for i, code in enumerate(reasons[1:]) if code == "ConditionalCheckFailed"}
+                transient = next((code for code in reasons if code in TRANSIENT_REASONS), None)
+                if not failed and transient is None:
+                    raise
+            elif code in TRANSIENT_ERRORS:
+                failed, transient = set(), code
+            else:
+                raise
+        conflicts.extend(items[i] for i in sorted(failed))
+        items = [item for i, item in enumerate(items) if i not in failed]
+        if transient is not None:
+            attempt += 1
+            if attempt >= MAX_WRITE_ATTEMPTS:
+                return conflicts, items, transient
+            _backoff(attempt)
+    return conflicts, [], None
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    session_name = (event.get("pathParameters") or {}).get("sessionName")
+    if not session_name:
+        return create_response(400, {"error": "sessionName is required"})
+
+    try:
+        body = parse_body(event, parse_float=Decimal)
+    except ValueError:
+        return create_response(400, {"error": "body must be JSON"})
+
+    entries = body.get("iterations") if isinstance(body, dict) else None
+    if not isinstance(entries, list) or not entries:
+        return create_response(400, {"error": "iterations must be a non-empty list"})
+    if len(entries) > MAX_ITERATIONS:
+        return create_response(400, {"error": f"at most {MAX_ITERATIONS} iterations per request"})
+
+    now = _now_iso()
+    owner = _caller(event)
+    results: dict[int, dict] = {}
+    explicit: dict[int, int] = {}
+    seen = set()
+    unnumbered = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            results[index] = {"index": index, "status": "invalid", "error": "iteration must be an object"}
+        elif entry.get("iteration") is None:
+            unnumbered.append(index)
+        else:
+            try:
+                iteration = parse_iteration(entry["iteration"])
+            except ValueError:
+                # Reject before anything is reserved, so a bad number never moves last_iteration
+                return create_response(400, {
+                    "error": f"iterations[{index}].iteration must be an integer from 1 to {MAX_ITERATION}",
+                })
+            if iteration in seen:
+                results[index] = {"index": index, "iteration": iteration, "status": "conflict",
+                                  "error": "duplicate iteration in request"}
+                continue
+            seen.add(iteration)
+            explicit[index] = iteration
+
+    table = get_table(DYNAMODB_TABLE)
+    numbers = dict(explicit)
+    floor = max(explicit.values(), default=0)
+    try:
+        if explicit:
+            raise_iteration_counter(table, session_name, floor)
+        if unnumbered:
+            first = reserve_iterations(table, session_name, len(unnumbered), floor)
+            numbers.update({index: first + offset for offset, index in enumerate(unnumbered)})
+    except SessionNotFound:
+        return create_response(404, {"error": f"session '{session_name}' not found"})
+    except IterationsExhausted:
+        return create_response(409, {"error": f"iteration numbers above {MAX_ITERATION} are not supported"})
+
+    items = [(index, _build_item(session_name, numbers[index], entries[index], owner, now)) for index in sorted(numbers)]
+    offload((item for _, item in items), ITERATION_FIELDS)
+
+    # Items are renumbered in place, so track them by identity
+    index_of = {id(item): index for index, item in items}
+    auto = set(unnumbered)
+    written = []
+    meta = None
+    try:
+        pending = [item for _, item in items]
+        attempts = 0
+        while pending:
+            renumber = []
+            for start in range(0, len(pending), CHUNK_SIZE):
+                chunk = pending[start:start + CHUNK_SIZE]
+                conflicts, unwritten, reason = _write_chunk(session_name, chunk)
+                for item in conflicts:
+                    index = index_of[id(item)]
+                    if index in auto:
+                        renumber.append(item)
+                    else:
+                        results[index] = {"index": index, "iteration": item["iteration"], "status": "conflict",
+                                          "error": f"iteration {item['iteration']} already exists"}
+                for item in unwritten:
+                    index = index_of[id(item)]
+                    results[index] = {"index": index, "status": "failed", "error": f"not written ({reason}); retry it"}
+                skipped = {id(item) for item in conflicts + unwritten}
+                written.extend(item for item in chunk if id(item) not in skipped)
+            attempts += 1
+            pending = []
+            if renumber and attempts < MAX_ALLOCATION_ATTEMPTS:
+                # A legacy explicit write holds these reserved numbers: reserve new ones
+                try:
+                    first = reserve_iterations(table, session_name, len(renumber))
+                except IterationsExhausted:
+                    first = None
+                if first is not None:
+                    for offset, item in enumerate(renumber):
+                        item.update(sk=iteration_sk(first + offset), iteration=first + offset)
+                    pending, renumber = renumber, []
+            for item in renumber:
+                index = index_of[id(item)]
+                results[index] = {"index": index, "status": "failed", "error": "could not allocate an iteration number"}
+    except SessionNotFound:
+        return create_response(404, {"error": f"session '{session_name}' not found"})
+    finally:
+        # Count whatever was written even if a later chunk failed
+        if written:
+            meta = touch_session(table, session_name, len(written), now)
+
+    best = False
+    if meta is not None:
+        candidate = pick_best(written, meta.get("primary_metric"), minimizes(meta))
+        if candidate is not None:
+            best = update_best(table, session_name, meta, candidate)
+
+    if written:
+        try:
+            index_documents(get_table(SEARCH_TABLE), written)
+        except ClientError as e:
+            # The iterations are stored; scripts/backfill_search_index.py picks up anything missed here
+            print(f"search indexing failed for {session_name} ({len(written)} iterations): {e}")
+
+    for index, item in items:
+        results.setdefault(index, {"index": index, "iteration": item["iteration"], "status": "created"})
+
+    ordered = [results[i] for i in sorted(results)]
+    return create_response(200, {
+        "session_name": session_name,
+        "created": len(written),
+        "best": best,
+        "conflicts": sum(1 for r in ordered if r["status"] == "conflict"),
+        "invalid": sum(1 for r in ordered if r["status"] == "invalid"),
+        "failed": sum(1 for r in ordered if r["status"] == "failed"),
+        "results": ordered,
+    })
@@ -1,18 +1,19 @@
 """Create a new research session."""
 from __future__ import annotations
 
-import json
 import os
 from datetime import datetime, timezone
 
-import boto3
+from blobs import META_FIELDS, offload
 from botocore.exceptions import ClientError
-from utils import create_response
+from clients import get_table
+from metrics import instrumented
+from research import owner_index_item, session_list_pk, tag_index_item
+from utils import create_response, parse_body
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
-
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
+# Each tag is a listing index item written in the same transaction as META
+MAX_TAGS = 50
 
 
 def _now_iso() -> str:
@@ -27,9 +28,10 @@ def _caller(event: dict) -> str:
         return "cli"
 
 
+@instrumented
 def handler(event: dict, context) -> dict:
     try:
-        body = json.loads(event.get("body") or "{}")
+        body = parse_body(event)
     except Exception:
         body = event
 
@@ -37,6 +39,13 @@ def handler(event: dict, context) -> dict:
     if not session_name:
         return create_response(400, {"error": "session_name is required"})
 
+    tags = body.get("tags", [])
+    if not isinstance(tags, list) or not all(isinstance(t, str) and t for t in tags):
+        return create_response(400, {"error": "tags must be a list of non-empty strings"})
+    if len(tags) > MAX_TAGS:
+        return create_response(400, {"error": f"at most {MAX_TAGS} tags are allowed"})
+    tags = list(dict.fromkeys(tags))
+
     now = _now_iso()
     item = {
         "session_name": session_name,
@@ -46,20 +55,34 @@ def handler(event: dict, context) -> dict:
         "updated_at": now,
         "owner": _caller(event),
         "description": body.get("description", ""),
-        "tags": body.get("tags", []),
+        "tags": tags,
         "spec_yaml": body.get("spec_yaml", ""),
         "branch": body.get("branch", f"research/{session_name}"),
         "iteration_count": 0,
+        "last_iteration": 0,
+        "list_pk": session_list_pk(session_name),
+        "list_sk": now,
     }
+    # Optional: enables best-iteration tracking from the first recorded iteration
+    for field in ("primary_metric", "primary_metric_direction"):
+        if body.get(field):
+            item[field] = body[field]
+
+    offload([item], META_FIELDS)
 
+    # META and its listing index items are written together or not at all
+    index_items = [owner_index_item(session_name, item["owner"], now)]
+    index_items += [tag_index_item(session_name, tag, now) for tag in tags]
     try:
-        _table.put_item(
-            Item=item,
-            ConditionExpression="attribute_not_exists(sk)",
-        )
+        get_table(DYNAMODB_TABLE).meta.client.transact_write_items(TransactItems=[
+            {"Put": {"TableName": DYNAMODB_TABLE, "Item": item, "ConditionExpression": "attribute_not_exists(sk)"}},
+            *({"Put": {"TableName": DYNAMODB_TABLE, "Item": index_item}} for index_item in index_items),
+        ])
     except ClientError as e:
-        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
-            return create_response(409, {"error": f"session '{session_name}' already exists"})
+        if e.response["Error"]["Code"] == "TransactionCanceledException":
+            reasons = e.response.get("CancellationReasons") or [{}]
+            if reasons[0].get("Code") == "ConditionalCheckFailed":
+                return create_response(409, {"error": f"session '{session_name}' already exists"})
         raise
 
     return create_response(200, {
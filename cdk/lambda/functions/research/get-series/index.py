@@ -0,0 +1,160 @@
+"""Columnar metric time series for a research session, downsampled server-side.
+
+Query parameters:
+  metrics  comma-separated metric names (default: the session's primary_metric)
+  points   target number of points (default 500, max 5000)
+  method   "lttb" (default; Largest-Triangle-Three-Buckets on the first metric)
+           or "minmax" (per-bucket min and max of every metric)
+
+Response: {"iteration": [...], "timestamp": [...], "metrics": {name: [...]},
+"total": <iterations in session>, "method": ...}. Results are cached per
+container and reused until the session's updated_at changes.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+
+from boto3.dynamodb.conditions import Key
+from clients import get_table
+from metrics import instrumented
+from research import metric_value
+from utils import accepted_encoding, create_response, query_all
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+MAX_METRICS = 10
+CACHE_ENTRIES = 64
+
+_cache: OrderedDict[tuple, dict] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _load_rows(session_name: str, metric_names: list[str]) -> list[tuple[int, str, list[float | None]]]:
+    """(iteration, timestamp, [metric values]) for every iteration, fetching only the requested metric paths."""
+    names = {"#i": "iteration", "#t": "timestamp", "#m": "metrics"}
+    paths = []
+    for n, metric in enumerate(metric_names):
+        names[f"#k{n}"] = metric
+        paths.append(f"#m.#k{n}")
+    items = query_all(
+        get_table(DYNAMODB_TABLE),
+        KeyConditionExpression=Key("session_name").eq(session_name) & Key("sk").begins_with("ITER#"),
+        ProjectionExpression=", ".join(["#i", "#t", *paths]),
+        ExpressionAttributeNames=names,
+    )
+    rows = []
+    for item in items:
+        values = [metric_value(item, metric) for metric in metric_names]
+        rows.append((int(item["iteration"]), item.get("timestamp", ""), [None if v is None else float(v) for v in values]))
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+def _lttb(xs: list[float], ys: list[float], threshold: int) -> list[int]:
+    """Indices selected by Largest-Triangle-Three-Buckets."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+        best_area, best_index = -1.0, start
+        for i in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[i] - ys[a]) - (xs[a] - xs[i]) * (avg_y - ys[a]))
+            if area > best_area:
+                best_area, best_index = area, i
+        selected.append(best_index)
+        a = best_index
+    selected.append(n - 1)
+    return selected
+
+
+def _minmax(rows: list, metric_count: int, points: int) -> list[int]:
+    """Per-bucket indices of the min and max of every metric."""
+    n = len(rows)
+    buckets = max(1, points // (2 * metric_count))
+    if n <= points:
+        return list(range(n))
+    selected = set()
+    size = n / buckets
+    for bucket in range(buckets):
+        start, end = int(bucket * size), min(int((bucket + 1) * size), n)
+        for m in range(metric_count):
+            present = [i for i in range(start, end) if rows[i][2][m] is not None]
+            if present:
+                selected.add(min(present, key=lambda i: rows[i][2][m]))
+                selected.add(max(present, key=lambda i: rows[i][2][m]))
+    return sorted(selected)
+
+
+def _series(session_name: str, metric_names: list[str], points: int, method: str) -> dict:
+    rows = _load_rows(session_name, metric_names)
+    total = len(rows)
+    if method == "lttb":
+        # Downsample on the first metric; the others stay aligned to the chosen iterations
+        rows = [row for row in rows if row[2][0] is not None]
+        indices = _lttb([float(row[0]) for row in rows], [row[2][0] for row in rows], points)
+    else:
+        indices = _minmax(rows, len(metric_names), points)
+    picked = [rows[i] for i in indices]
+    return {
+        "session_name": session_name,
+        "method": method,
+        "total": total,
+        "iteration": [row[0] for row in picked],
+        "timestamp": [row[1] for row in picked],
+        "metrics": {metric: [row[2][m] for row in picked] for m, metric in enumerate(metric_names)},
+    }
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    session_name = (event.get("pathParameters") or {}).get("sessionName")
+    if not session_name:
+        return create_response(400, {"error": "sessionName is required"})
+
+    params = event.get("queryStringParameters") or {}
+    try:
+        points = min(max(int(params.get("points", DEFAULT_POINTS)), 3), MAX_POINTS)
+    except (ValueError, TypeError):
+        points = DEFAULT_POINTS
+    method = params.get("method", "lttb").lower()
+    if method not in ("lttb", "minmax"):
+        return create_response(400, {"error": "method must be lttb or minmax"})
+
+    meta = get_table(DYNAMODB_TABLE).get_item(
+        Key={"session_name": session_name, "sk": "META"},
+        ProjectionExpression="updated_at, primary_metric",
+    ).get("Item")
+    if not meta:
+        return create_response(404, {"error": f"session '{session_name}' not found"})
+
+    metric_names = [m.strip() for m in (params.get("metrics") or meta.get("primary_metric") or "").split(",") if m.strip()]
+    if not metric_names:
+        return create_response(400, {"error": "metrics is required (the session has no primary_metric)"})
+    if len(metric_names) > MAX_METRICS:
+        return create_response(400, {"error": f"at most {MAX_METRICS} metrics"})
+
+    key = (session_name, meta.get("updated_at"), tuple(metric_names), points, method)
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+    if result is None:
+        result = _series(session_name, metric_names, points, method)
+        with _cache_lock:
+            _cache[key] = result
+            while len(_cache) > CACHE_ENTRIES:
+                _cache.popitem(last=False)
+
+    return create_response(200, result, accept_encoding=accepted_encoding(event))
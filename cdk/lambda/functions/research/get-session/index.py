@@ -1,58 +1,73 @@
-"""Get a research session with all iterations and notes."""
+"""Get a research session with its latest iterations and notes.
+
+Only the newest page of each is embedded (iterations without their metadata
+and environment blobs); older pages and heavy fields come from the
+iterations and notes sub-resources using the returned cursors. A spec_yaml
+large enough to live in S3 is returned as ``spec_yaml_ref`` (with a preview)
+unless the caller passes ``include=spec_yaml``.
+"""
 from __future__ import annotations
 
-import json
 import os
-from decimal import Decimal
 
-import boto3
+from blobs import META_FIELDS, resolve
 from boto3.dynamodb.conditions import Key
-from utils import create_response
+from clients import get_table
+from metrics import instrumented
+from research import INTERNAL_META_FIELDS
+from utils import accepted_encoding, create_response, parse_body, projection, query_page
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+ITERATIONS_PAGE = 50
+NOTES_PAGE = 20
 
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
-
-
-def _decimal_to_native(obj):
-    if isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    if isinstance(obj, dict):
-        return {k: _decimal_to_native(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_decimal_to_native(v) for v in obj]
-    return obj
+ITERATION_SUMMARY_FIELDS = ("session_name", "sk", "iteration", "timestamp", "type", "owner", "title", "description", "metrics", "metrics_ref")
 
 
+@instrumented
 def handler(event: dict, context) -> dict:
     try:
         session_name = event["pathParameters"]["sessionName"]
     except (KeyError, TypeError):
-        body = json.loads(event.get("body") or "{}") if isinstance(event.get("body"), str) else event
+        body = parse_body(event) if isinstance(event.get("body"), str) else event
         session_name = body.get("session_name")
 
     if not session_name:
         return create_response(400, {"error": "sessionName is required"})
 
-    response = _table.query(
-        KeyConditionExpression=Key("session_name").eq(session_name),
-    )
-    items = _decimal_to_native(response.get("Items", []))
+    params = event.get("queryStringParameters") or {}
+    include = [f.strip() for f in (params.get("include") or "").split(",") if f.strip()]
+    unknown = [f for f in include if f not in META_FIELDS]
+    if unknown:
+        return create_response(400, {"error": f"unknown include field(s): {', '.join(unknown)}"})
 
-    meta = next((i for i in items if i.get("sk") == "META"), None)
+    table = get_table(DYNAMODB_TABLE)
+    meta = table.get_item(Key={"session_name": session_name, "sk": "META"}).get("Item")
     if not meta:
         return create_response(404, {"error": f"session '{session_name}' not found"})
+    resolve([meta], include)
+    for field in INTERNAL_META_FIELDS:
+        meta.pop(field, None)
 
-    iterations = sorted(
-        [i for i in items if i.get("sk", "").startswith("ITER#")],
-        key=lambda i: i.get("iteration", 0),
+    iterations, iterations_cursor = query_page(
+        table,
+        ITERATIONS_PAGE,
+        KeyConditionExpression=Key("session_name").eq(session_name) & Key("sk").begins_with("ITER#"),
+        ScanIndexForward=False,
+        **projection(ITERATION_SUMMARY_FIELDS),
     )
-    notes = sorted(
-        [i for i in items if i.get("sk", "").startswith("NOTE#")],
-        key=lambda i: i.get("timestamp", ""),
-        reverse=True,
+    notes, notes_cursor = query_page(
+        table,
+        NOTES_PAGE,
+        KeyConditionExpression=Key("session_name").eq(session_name) & Key("sk").begins_with("NOTE#"),
+        ScanIndexForward=False,
     )
 
-    result = {**meta, "iterations": iterations, "notes": notes}
-    return create_response(200, result)
+    result = {
+        **meta,
+        "iterations": iterations,
+        "iterations_next_cursor": iterations_cursor,
+        "notes": notes,
+        "notes_next_cursor": notes_cursor,
+    }
+    return create_response(200, result, accept_encoding=accepted_encoding(event))
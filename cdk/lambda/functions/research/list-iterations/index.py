@@ -0,0 +1,81 @@
+"""List a research session's iterations one page at a time.
+
+Query parameters:
+  limit    page size (default 50, max 500)
+  cursor   opaque cursor from a previous page's next_cursor
+  order    "desc" (newest first, default) or "asc"
+  start    iteration number to start from (inclusive) in the chosen order
+  include  comma-separated heavy fields to return: metadata, environment,
+           metrics (the full map, where only its numeric digest is inline)
+
+Heavy fields stored in S3 (see ``blobs``) are fetched only when included.
+"""
+from __future__ import annotations
+
+import os
+
+from blobs import ITERATION_FIELDS, ref_attribute, resolve
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from clients import get_table
+from metrics import instrumented
+from research import iteration_sk
+from utils import accepted_encoding, create_response, projection, query_page
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+SUMMARY_FIELDS = ("session_name", "sk", "iteration", "timestamp", "type", "owner", "title", "description", "metrics", "metrics_ref")
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    session_name = (event.get("pathParameters") or {}).get("sessionName")
+    if not session_name:
+        return create_response(400, {"error": "sessionName is required"})
+
+    params = event.get("queryStringParameters") or {}
+    try:
+        limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except (ValueError, TypeError):
+        limit = DEFAULT_LIMIT
+    descending = params.get("order", "desc").lower() != "asc"
+
+    include = [f.strip() for f in (params.get("include") or "").split(",") if f.strip()]
+    unknown = [f for f in include if f not in ITERATION_FIELDS]
+    if unknown:
+        return create_response(400, {"error": f"unknown include field(s): {', '.join(unknown)}"})
+
+    sk_condition = Key("sk").begins_with("ITER#")
+    if params.get("start") is not None:
+        try:
+            start_sk = iteration_sk(int(params["start"]))
+        except ValueError:
+            return create_response(400, {"error": "start must be an iteration number"})
+        # "$" sorts immediately after "#", bounding the range to ITER# keys
+        sk_condition = Key("sk").between("ITER#", start_sk) if descending else Key("sk").between(start_sk, "ITER$")
+
+    try:
+        items, next_cursor = query_page(
+            get_table(DYNAMODB_TABLE),
+            limit,
+            params.get("cursor"),
+            KeyConditionExpression=Key("session_name").eq(session_name) & sk_condition,
+            ScanIndexForward=not descending,
+            **projection(tuple(dict.fromkeys(SUMMARY_FIELDS + tuple(include) + tuple(ref_attribute(f) for f in include)))),
+        )
+    except ValueError as e:
+        return create_response(400, {"error": str(e)})
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ValidationException":
+            return create_response(400, {"error": "invalid cursor"})
+        raise
+
+    resolve(items, include)
+
+    return create_response(
+        200,
+        {"iterations": items, "count": len(items), "next_cursor": next_cursor},
+        accept_encoding=accepted_encoding(event),
+    )
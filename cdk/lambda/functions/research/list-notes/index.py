@@ -0,0 +1,51 @@
+"""List a research session's notes one page at a time, newest first by default.
+
+Query parameters: limit (default 20, max 200), cursor, order ("desc" or "asc").
+"""
+from __future__ import annotations
+
+import os
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from clients import get_table
+from metrics import instrumented
+from utils import accepted_encoding, create_response, query_page
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    session_name = (event.get("pathParameters") or {}).get("sessionName")
+    if not session_name:
+        return create_response(400, {"error": "sessionName is required"})
+
+    params = event.get("queryStringParameters") or {}
+    try:
+        limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except (ValueError, TypeError):
+        limit = DEFAULT_LIMIT
+
+    try:
+        items, next_cursor = query_page(
+            get_table(DYNAMODB_TABLE),
+            limit,
+            params.get("cursor"),
+            KeyConditionExpression=Key("session_name").eq(session_name) & Key("sk").begins_with("NOTE#"),
+            ScanIndexForward=params.get("order", "desc").lower() == "asc",
+        )
+    except ValueError as e:
+        return create_response(400, {"error": str(e)})
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ValidationException":
+            return create_response(400, {"error": "invalid cursor"})
+        raise
+
+    return create_response(
+        200,
+        {"notes": items, "count": len(items), "next_cursor": next_cursor},
+        accept_encoding=accepted_encoding(event),
+    )
@@ -1,56 +1,172 @@
-"""List research sessions (META records only), most recently updated first."""
+"""List research sessions (META records only), one page at a time.
+
+Query parameters (at most one filter):
+  status  sessions with this status, most recently updated first
+  owner   sessions created by this caller, newest first
+  tag     sessions carrying this tag, newest first
+  limit   page size (default 20, max 100)
+  cursor  ``next_cursor`` from the previous page
+
+Without a filter, sessions come back most recently updated first: META is
+spread over SESSION_LIST_SHARDS list-index partitions, each is queried for a
+page in parallel and the pages are merged, and the cursor records where each
+shard stopped. Other listings are a single index query (plus a BatchGetItem
+of META summaries for owner/tag pages), so every listing's cost tracks the
+page size, not the table size.
+"""
 from __future__ import annotations
 
+import concurrent.futures
 import os
-from decimal import Decimal
 
-import boto3
 from boto3.dynamodb.conditions import Attr, Key
-from utils import create_response
+from clients import get_resource, get_table
+from metrics import instrumented
+from research import INTERNAL_META_FIELDS, LIST_INDEX, session_list_pks
+from utils import accepted_encoding, batch_get, create_response, decode_cursor, encode_cursor, projection, query_page
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
 DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# A list-index key: table key plus index key, resumed from with ExclusiveStartKey
+INDEX_KEY_FIELDS = ("session_name", "sk", "list_pk", "list_sk")
+
+# META attributes returned in listings; spec_yaml can be large and is only served by get-session
+SESSION_SUMMARY_FIELDS = (
+    "session_name",
+    "status",
+    "created_at",
+    "updated_at",
+    "owner",
+    "description",
+    "tags",
+    "branch",
+    "iteration_count",
+    "primary_metric",
+    "primary_metric_direction",
+    "best_iteration",
+    "best_value",
+    "best_metric",
+    "best_pnl",
+    "best_sharpe",
+    "thresholds",
+    "targets",
+)
+
+
+def _index_page(list_pk: str, limit: int, cursor: str | None) -> tuple:
+    return query_page(
+        get_table(DYNAMODB_TABLE),
+        limit,
+        cursor,
+        IndexName=LIST_INDEX,
+        KeyConditionExpression=Key("list_pk").eq(list_pk),
+        ScanIndexForward=False,
+    )
+
+
+def _shard_page(client, list_pk: str, limit: int, start_key: dict | None) -> tuple:
+    kwargs = {"ExclusiveStartKey": start_key} if start_key else {}
+    response = client.query(
+        TableName=DYNAMODB_TABLE,
+        IndexName=LIST_INDEX,
+        KeyConditionExpression=Key("list_pk").eq(list_pk),
+        ScanIndexForward=False,
+        Limit=limit,
+        **projection(SESSION_SUMMARY_FIELDS + INDEX_KEY_FIELDS[1:]),
+        **kwargs,
+    )
+    return response.get("Items", []), response.get("LastEvaluatedKey")
+
+
+def _merged_page(limit: int, cursor: str | None) -> tuple:
+    """One page of sessions across the list-index shards, most recently updated first.
 
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
+    The cursor maps each shard that still has sessions to the key of the
+    last one returned from it (null if none has been yet). Each of those shards is read for a full page
+    (the shards' pages are queried in parallel on the thread-safe client),
+    and the merged page is the newest ``limit`` of them.
+    """
+    positions = decode_cursor(cursor) if cursor else dict.fromkeys(session_list_pks())
+    if cursor and (not positions or not set(positions) <= set(session_list_pks())
+                   or not all(key is None or isinstance(key, dict) for key in positions.values())):
+        raise ValueError("invalid cursor")
 
+    client = get_table(DYNAMODB_TABLE).meta.client
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(positions)) as executor:
+        pages = dict(zip(positions, executor.map(
+            lambda pk: _shard_page(client, pk, limit, positions[pk]), positions,
+        )))
 
-def _decimal_to_native(obj):
-    if isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    if isinstance(obj, dict):
-        return {k: _decimal_to_native(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_decimal_to_native(v) for v in obj]
-    return obj
+    candidates = [(item, pk) for pk, (items, _) in pages.items() for item in items]
+    candidates.sort(key=lambda c: (c[0].get("list_sk", ""), c[0]["session_name"]), reverse=True)
+    page = candidates[:limit]
 
+    taken: dict[str, int] = {}
+    for item, pk in page:
+        taken[pk] = taken.get(pk, 0) + 1
+        positions[pk] = {k: item[k] for k in INDEX_KEY_FIELDS}
+    for pk, (items, last_key) in pages.items():
+        if taken.get(pk, 0) == len(items) and not last_key:
+            del positions[pk]  # every session in this shard has been returned
 
+    items = [item for item, _ in page]
+    for item in items:
+        for field in INDEX_KEY_FIELDS[1:] + INTERNAL_META_FIELDS:
+            item.pop(field, None)
+    return items, encode_cursor(positions)
+
+
+def _summaries(index_items: list) -> list:
+    """META summaries for a page of TAG#/OWNER index items, in the page's order."""
+    names = [item["session_name"] for item in index_items]
+    metas = batch_get(
+        get_resource("dynamodb"),
+        DYNAMODB_TABLE,
+        [{"session_name": name, "sk": "META"} for name in dict.fromkeys(names)],
+        **projection(SESSION_SUMMARY_FIELDS),
+    )
+    by_name = {meta["session_name"]: meta for meta in metas}
+    return [by_name[name] for name in names if name in by_name]
+
+
+@instrumented
 def handler(event: dict, context) -> dict:
     params = event.get("queryStringParameters") or {}
-    status_filter = params.get("status")
+    filters = {k: params[k] for k in ("status", "owner", "tag") if params.get(k)}
+    if len(filters) > 1:
+        return create_response(400, {"error": "filter by at most one of status, owner, tag"})
     try:
-        limit = int(params.get("limit", DEFAULT_LIMIT))
+        limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
     except (ValueError, TypeError):
         limit = DEFAULT_LIMIT
+    cursor = params.get("cursor")
 
-    if status_filter:
-        response = _table.query(
-            IndexName="status-updated-index",
-            KeyConditionExpression=Key("status").eq(status_filter),
-            FilterExpression=Attr("sk").eq("META"),
-            ScanIndexForward=False,
-            Limit=limit * 3,  # overfetch since FilterExpression applies after Limit
-        )
-        items = _decimal_to_native(response.get("Items", []))[:limit]
-    else:
-        response = _table.scan(
-            FilterExpression=Attr("sk").eq("META"),
-        )
-        items = _decimal_to_native(response.get("Items", []))
-        items.sort(key=lambda i: i.get("updated_at", ""), reverse=True)
-        items = items[:limit]
-
-    for item in items:
-        item.pop("spec_yaml", None)
+    try:
+        if "status" in filters:
+            items, next_cursor = query_page(
+                get_table(DYNAMODB_TABLE),
+                limit,
+                cursor,
+                IndexName="status-updated-index",
+                KeyConditionExpression=Key("status").eq(filters["status"]),
+                FilterExpression=Attr("sk").eq("META"),
+                ScanIndexForward=False,
+                **projection(SESSION_SUMMARY_FIELDS),
+            )
+        elif "owner" in filters:
+            index_items, next_cursor = _index_page(f"OWNER#{filters['owner']}", limit, cursor)
+            items = _summaries(index_items)
+        elif "tag" in filters:
+            index_items, next_cursor = _index_page(f"TAG#{filters['tag']}", limit, cursor)
+            items = _summaries(index_items)
+        else:
+            items, next_cursor = _merged_page(limit, cursor)
+    except ValueError as e:
+        return create_response(400, {"error": str(e)})
 
-    return create_response(200, {"sessions": items, "count": len(items)})
+    return create_response(
+        200,
+        {"sessions": items, "count": len(items), "next_cursor": next_cursor},
+        accept_encoding=accepted_encoding(event),
+    )
@@ -1,18 +1,40 @@
-"""Record a research iteration result."""
+"""Record a research iteration result.
+
+The server allocates the iteration number by atomically bumping
+``last_iteration`` on the session's META item (``research.reserve_iterations``),
+so concurrent recorders never collide; ``updated_at`` moves only after the
+iteration is stored. Clients may still pass ``iteration`` explicitly (legacy
+behaviour); those writes are conditional and return 409 if the number is
+taken. If the iteration beats the session's best on its primary metric, the
+best-of fields on META are updated conditionally.
+"""
 from __future__ import annotations
 
-import json
 import os
 from datetime import datetime, timezone
+from decimal import Decimal
 
-import boto3
+from blobs import ITERATION_FIELDS, offload
 from botocore.exceptions import ClientError
-from utils import create_response
+from clients import get_table
+from metrics import instrumented
+from research import (
+    MAX_ITERATION,
+    IterationsExhausted,
+    SessionNotFound,
+    iteration_sk,
+    parse_iteration,
+    raise_iteration_counter,
+    reserve_iterations,
+    touch_session,
+    update_best,
+)
+from search_index import index_documents
+from utils import create_response, parse_body
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
-
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
+SEARCH_TABLE = os.environ["SEARCH_TABLE"]
+MAX_ALLOCATION_ATTEMPTS = 3
 
 
 def _now_iso() -> str:
@@ -27,32 +49,59 @@ def _caller(event: dict) -> str:
         return "cli"
 
 
+def _record_explicit(session_name: str, item: dict, now: str) -> dict | None:
+    """Write a client-numbered iteration; returns META as updated, or None if the number is taken."""
+    table = get_table(DYNAMODB_TABLE)
+    raise_iteration_counter(table, session_name, item["iteration"])
+    try:
+        table.put_item(Item=item, ConditionExpression="attribute_not_exists(sk)")
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return None
+        raise
+    return touch_session(table, session_name, 1, now)
+
+
+def _index(item: dict) -> None:
+    """Add the iteration's title and description to the search index."""
+    try:
+        index_documents(get_table(SEARCH_TABLE), [item])
+    except ClientError as e:
+        # The iteration is stored; scripts/backfill_search_index.py picks up anything missed here
+        print(f"search indexing failed for {item['session_name']} {item['sk']}: {e}")
+
+
+@instrumented
 def handler(event: dict, context) -> dict:
     try:
         session_name = event["pathParameters"]["sessionName"]
     except (KeyError, TypeError):
-        body = json.loads(event.get("body") or "{}") if isinstance(event.get("body"), str) else event
+        body = parse_body(event) if isinstance(event.get("body"), str) else event
         session_name = body.get("session_name")
 
     try:
-        body = json.loads(event.get("body") or "{}")
+        body = parse_body(event, parse_float=Decimal)
     except Exception:
         body = event
 
     if not session_name:
         return create_response(400, {"error": "sessionName is required"})
 
-    iteration = body.get("iteration")
-    if iteration is None:
-        return create_response(400, {"error": "iteration is required"})
+    explicit = body.get("iteration")
+    if explicit is not None:
+        try:
+            explicit = parse_iteration(explicit)
+        except ValueError:
+            return create_response(400, {"error": f"iteration must be an integer from 1 to {MAX_ITERATION}"})
 
-    now = body.get("timestamp") or _now_iso()
+    # META's updated_at/list_sk are server time so they only move forward (the
+    # series cache and session listing key on them); a client timestamp, e.g.
+    # from a backfill, is kept on the iteration alone
+    now = _now_iso()
 
     item = {
         "session_name": session_name,
-        "sk": f"ITER#{int(iteration):03d}",
-        "iteration": int(iteration),
-        "timestamp": now,
+        "timestamp": body.get("timestamp") or now,
         "type": body.get("type", "local"),
         "owner": _caller(event),
         "title": body.get("title", ""),
@@ -61,21 +110,37 @@ def handler(event: dict, context) -> dict:
         "metadata": body.get("metadata", {}),
         "environment": body.get("environment", {}),
     }
-
-    try:
-        _table.put_item(
-            Item=item,
-            ConditionExpression="attribute_not_exists(sk)",
-        )
-    except ClientError as e:
-        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
-            return create_response(409, {"error": f"iteration {iteration} already exists"})
-        raise
-
-    _table.update_item(
-        Key={"session_name": session_name, "sk": "META"},
-        UpdateExpression="ADD iteration_count :one SET updated_at = :now",
-        ExpressionAttributeValues={":one": 1, ":now": now},
-    )
-
-    return create_response(200, {"session_name": session_name, "iteration": int(iteration)})
+    offload([item], ITERATION_FIELDS)
+    table = get_table(DYNAMODB_TABLE)
+
+    if explicit is not None:
+        item.update(sk=iteration_sk(explicit), iteration=explicit)
+        meta = _record_explicit(session_name, item, now)
+        if meta is None:
+            return create_response(409, {"error": f"iteration {explicit} already exists"})
+        best = update_best(table, session_name, meta, item)
+        _index(item)
+        return create_response(200, {"session_name": session_name, "iteration": explicit, "best": best})
+
+    for _ in range(MAX_ALLOCATION_ATTEMPTS):
+        try:
+            iteration = reserve_iterations(table, session_name, 1)
+        except SessionNotFound:
+            return create_response(404, {"error": f"session '{session_name}' not found"})
+        except IterationsExhausted:
+            return create_response(409, {"error": f"iteration numbers above {MAX_ITERATION} are not supported"})
+
+        item.update(sk=iteration_sk(iteration), iteration=iteration)
+        try:
+            table.put_item(Item=item, ConditionExpression="attribute_not_exists(sk)")
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            # Only a legacy explicitly numbered write can hold a reserved number: reserve the next one
+            continue
+        meta = touch_session(table, session_name, 1, now)
+        best = update_best(table, session_name, meta, item)
+        _index(item)
+        return create_response(200, {"session_name": session_name, "iteration": iteration, "best": best})
+
+    return create_response(409, {"error": "could not allocate an iteration number"})
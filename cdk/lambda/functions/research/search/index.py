@@ -0,0 +1,108 @@
+"""Full-text search over research notes and iteration titles/descriptions.
+
+Query parameters:
+  q        search text (required)
+  session  restrict to one session
+  kind     "note" or "iteration"
+  limit    page size (default 20, max 100)
+  cursor   ``next_cursor`` from the previous page
+
+Hits are ranked by how many query terms they contain, then by BM25 score.
+Ranking reads only the query terms' postings from the search index; the
+research table is read just for the page of hits being returned. A term
+matching more than MAX_POSTINGS_PER_TERM documents contributes only its
+highest-frequency matches, and the response has ``truncated`` set.
+"""
+from __future__ import annotations
+
+import os
+
+from clients import get_resource, get_table
+from metrics import instrumented
+from search_index import search, tokenize
+from utils import accepted_encoding, batch_get, create_response, decode_cursor, encode_cursor, projection
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+SEARCH_TABLE = os.environ["SEARCH_TABLE"]
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+SNIPPET_LENGTH = 200
+
+_DOCUMENT_FIELDS = ("session_name", "sk", "iteration", "timestamp", "title", "description", "content", "author")
+
+
+def _snippet(text: str, terms: set[str]) -> str:
+    """Up to SNIPPET_LENGTH characters of ``text`` around its first query term."""
+    if len(text) <= SNIPPET_LENGTH:
+        return text
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(term) for term in terms) if p >= 0]
+    start = max(min(positions, default=0) - SNIPPET_LENGTH // 4, 0)
+    snippet = text[start:start + SNIPPET_LENGTH]
+    return ("…" if start else "") + snippet + ("…" if start + SNIPPET_LENGTH < len(text) else "")
+
+
+def _result(hit: dict, document: dict, terms: set[str]) -> dict:
+    result = {
+        "session_name": hit["session_name"],
+        "kind": hit["kind"],
+        "score": hit["score"],
+        "timestamp": document.get("timestamp"),
+    }
+    if hit["kind"] == "note":
+        result["author"] = document.get("author")
+        result["snippet"] = _snippet(document.get("content", ""), terms)
+    else:
+        result["iteration"] = document.get("iteration")
+        result["title"] = document.get("title", "")
+        result["snippet"] = _snippet(document.get("description", ""), terms)
+    return result
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    params = event.get("queryStringParameters") or {}
+    query = (params.get("q") or "").strip()
+    terms = set(tokenize(query))
+    if not terms:
+        return create_response(400, {"error": "q must contain at least one searchable term"})
+    kind = params.get("kind")
+    if kind not in (None, "", "note", "iteration"):
+        return create_response(400, {"error": "kind must be 'note' or 'iteration'"})
+    try:
+        limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except (ValueError, TypeError):
+        limit = DEFAULT_LIMIT
+    try:
+        offset = int((decode_cursor(params.get("cursor")) or {}).get("offset", 0))
+    except (ValueError, TypeError):
+        return create_response(400, {"error": "invalid cursor"})
+
+    hits, truncated = search(get_table(SEARCH_TABLE), query, session_name=params.get("session"), kind=kind or None)
+    page = hits[offset:offset + limit]
+
+    documents = batch_get(
+        get_resource("dynamodb"),
+        DYNAMODB_TABLE,
+        [{"session_name": hit["session_name"], "sk": hit["sk"]} for hit in page],
+        **projection(_DOCUMENT_FIELDS),
+    ) if page else []
+    by_key = {(d["session_name"], d["sk"]): d for d in documents}
+    results = [
+        _result(hit, by_key[(hit["session_name"], hit["sk"])], terms)
+        for hit in page
+        if (hit["session_name"], hit["sk"]) in by_key
+    ]
+
+    next_offset = offset + limit
+    return create_response(
+        200,
+        {
+            "query": query,
+            "results": results,
+            "total": len(hits),
+            "truncated": bool(truncated),
+            "next_cursor": encode_cursor({"offset": next_offset}) if next_offset < len(hits) else None,
+        },
+        accept_encoding=accepted_encoding(event),
+    )
@@ -1,24 +1,43 @@
-"""Update metadata fields on a research session."""
+"""Update metadata fields on a research session.
+
+The best-of fields are maintained by record-iteration; changing
+``primary_metric`` or ``primary_metric_direction`` recomputes them from the
+session's iterations. Changing ``tags`` writes META and the added/removed TAG#
+listing items in one transaction, conditional on the tags read beforehand, so
+the tag listing can't drift from the session.
+"""
 from __future__ import annotations
 
-import json
 import os
 from datetime import datetime, timezone
+from decimal import Decimal
 
-import boto3
+from blobs import META_FIELDS, offload, ref_attribute
 from boto3.dynamodb.conditions import Key
-from utils import create_response
+from botocore.exceptions import ClientError
+from clients import get_table
+from metrics import instrumented
+from research import best_fields, minimizes, pick_best, tag_index_item
+from utils import create_response, parse_body, projection, query_all
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+# Matches create-session, which writes each tag's index item in the META transaction
+MAX_TAGS = 50
+# TransactWriteItems takes 100 actions: the META update plus one per tag change
+MAX_TAG_CHANGES = 99
+# Attempts at the tag transaction when a concurrent update changes the tags under it
+MAX_TAG_ATTEMPTS = 3
 
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
+
+class SessionNotFound(Exception):
+    pass
+
+
+class TagConflict(Exception):
+    pass
 
 _ALLOWED_FIELDS = {
     "status",
-    "best_iteration",
-    "best_pnl",
-    "best_sharpe",
     "spec_yaml",
     "description",
     "tags",
@@ -33,15 +52,80 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _recompute_best(session_name: str, metric: str | None, minimize: bool) -> dict:
+    """Best-of fields for the session under a (possibly new) primary metric; None values are removed."""
+    iterations = query_all(
+        get_table(DYNAMODB_TABLE),
+        KeyConditionExpression=Key("session_name").eq(session_name) & Key("sk").begins_with("ITER#"),
+        **projection(("iteration", "metrics")),
+    )
+    best = pick_best(iterations, metric, minimize)
+    if best is None:
+        return {"best_iteration": None, "best_value": None, "best_metric": None, "best_pnl": None, "best_sharpe": None}
+    return best_fields(best, metric)
+
+
+def _update_with_tags(session_name: str, update: dict, tags: list) -> None:
+    """Apply the META ``update`` and the matching TAG# item puts/deletes in one transaction.
+
+    Raises SessionNotFound, TagConflict if the tags keep changing underneath,
+    or ValueError if the change needs more than MAX_TAG_CHANGES items.
+    """
+    table = get_table(DYNAMODB_TABLE)
+    key = {"session_name": session_name, "sk": "META"}
+    for _ in range(MAX_TAG_ATTEMPTS):
+        meta = table.get_item(Key=key, ConsistentRead=True, **projection(("tags", "created_at"))).get("Item")
+        if meta is None:
+            raise SessionNotFound(session_name)
+        old_tags = meta.get("tags")
+        added = [t for t in tags if t not in (old_tags or [])]
+        removed = [t for t in old_tags or [] if t not in tags]
+        if len(added) + len(removed) > MAX_TAG_CHANGES:
+            raise ValueError(f"at most {MAX_TAG_CHANGES} tags can be added or removed per update")
+
+        values = dict(update["ExpressionAttributeValues"])
+        if old_tags is None:
+            condition = "attribute_exists(sk) AND attribute_not_exists(#tags)"
+        else:
+            condition = "attribute_exists(sk) AND #tags = :expected_tags"
+            values[":expected_tags"] = old_tags
+        created_at = meta.get("created_at", "")
+        actions = [{
+            "Update": {
+                "TableName": DYNAMODB_TABLE,
+                "Key": key,
+                **update,
+                "ExpressionAttributeValues": values,
+                "ConditionExpression": condition,
+            },
+        }]
+        actions += [{"Put": {"TableName": DYNAMODB_TABLE, "Item": tag_index_item(session_name, tag, created_at)}}
+                    for tag in added]
+        actions += [{"Delete": {"TableName": DYNAMODB_TABLE, "Key": {"session_name": session_name, "sk": f"TAG#{tag}"}}}
+                    for tag in removed]
+        try:
+            table.meta.client.transact_write_items(TransactItems=actions)
+            return
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = e.response.get("CancellationReasons") or [{}]
+            if reasons[0].get("Code") != "ConditionalCheckFailed":
+                raise
+            # META is gone or its tags changed since the read: look again
+    raise TagConflict(session_name)
+
+
+@instrumented
 def handler(event: dict, context) -> dict:
     try:
         session_name = event["pathParameters"]["sessionName"]
     except (KeyError, TypeError):
-        body = json.loads(event.get("body") or "{}") if isinstance(event.get("body"), str) else event
+        body = parse_body(event) if isinstance(event.get("body"), str) else event
         session_name = body.get("session_name")
 
     try:
-        body = json.loads(event.get("body") or "{}")
+        body = parse_body(event, parse_float=Decimal)
     except Exception:
         body = event
 
@@ -51,19 +135,67 @@ def handler(event: dict, context) -> dict:
     updates = {k: v for k, v in body.items() if k in _ALLOWED_FIELDS and v is not None}
     if not updates:
         return create_response(400, {"error": "no valid fields to update"})
+    if "tags" in updates:
+        tags = updates["tags"]
+        if not isinstance(tags, list) or not all(isinstance(t, str) and t for t in tags):
+            return create_response(400, {"error": "tags must be a list of non-empty strings"})
+        if len(tags) > MAX_TAGS:
+            return create_response(400, {"error": f"at most {MAX_TAGS} tags are allowed"})
+        updates["tags"] = list(dict.fromkeys(tags))
 
     updates["updated_at"] = _now_iso()
+    updates["list_sk"] = updates["updated_at"]
+
+    removals = []
+    if "spec_yaml" in updates:
+        # A large spec moves to S3; either way the inline value and pointer must not disagree
+        offload([updates], META_FIELDS)
+        removals.append("spec_yaml" if ref_attribute("spec_yaml") in updates else ref_attribute("spec_yaml"))
+    if "primary_metric" in updates or "primary_metric_direction" in updates:
+        meta = get_table(DYNAMODB_TABLE).get_item(
+            Key={"session_name": session_name, "sk": "META"},
+            ProjectionExpression="primary_metric, primary_metric_direction",
+        ).get("Item")
+        if meta is None:
+            return create_response(404, {"error": f"session '{session_name}' not found"})
+        meta.update({k: v for k, v in updates.items() if k in ("primary_metric", "primary_metric_direction")})
+        for field, value in _recompute_best(session_name, meta.get("primary_metric"), minimizes(meta)).items():
+            if value is None:
+                removals.append(field)
+            else:
+                updates[field] = value
 
     set_parts = [f"#{k} = :{k}" for k in updates]
-    expr_attr_names = {f"#{k}": k for k in updates}
+    expr_attr_names = {f"#{k}": k for k in [*updates, *removals]}
     expr_attr_values = {f":{k}": v for k, v in updates.items()}
-
-    _table.update_item(
-        Key={"session_name": session_name, "sk": "META"},
-        UpdateExpression="SET " + ", ".join(set_parts),
-        ExpressionAttributeNames=expr_attr_names,
-        ExpressionAttributeValues=expr_attr_values,
-        ConditionExpression="attribute_exists(sk)",
-    )
-
-    return create_response(200, {"session_name": session_name, **{k: v for k, v in updates.items() if k != "updated_at"}})
+    update_expression = "SET " + ", ".join(set_parts)
+    if removals:
+        update_expression += " REMOVE " + ", ".join(f"#{k}" for k in removals)
+
+    update = {
+        "UpdateExpression": update_expression,
+        "ExpressionAttributeNames": expr_attr_names,
+        "ExpressionAttributeValues": expr_attr_values,
+    }
+    try:
+        if "tags" in updates:
+            _update_with_tags(session_name, update, updates["tags"])
+        else:
+            get_table(DYNAMODB_TABLE).update_item(
+                Key={"session_name": session_name, "sk": "META"},
+                ConditionExpression="attribute_exists(sk)",
+                **update,
+            )
+    except SessionNotFound:
+        return create_response(404, {"error": f"session '{session_name}' not found"})
+    except TagConflict:
+        return create_response(409, {"error": f"tags of session '{session_name}' are being changed concurrently"})
+    except ValueError as e:
+        return create_response(400, {"error": str(e)})
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return create_response(404, {"error": f"session '{session_name}' not found"})
+        raise
+
+    hidden = ("updated_at", "list_sk")
+    return create_response(200, {"session_name": session_name, **{k: v for k, v in updates.items() if k not in hidden}})
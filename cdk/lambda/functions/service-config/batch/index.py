@@ -0,0 +1,83 @@
+"""Fetch the configs of several services in one request.
+
+For hosts that run several services: POST /config with
+``{"services": [{"service": "collector", "defaults": {...}}, "risk", ...]}``
+reads every CURRENT item with one BatchGetItem and applies each service's
+defaults exactly as ``service-config/get`` does (missing keys are backfilled,
+stored values win, an unknown service is created from its defaults). Returns
+``{"configs": {<service>: {config, version, updated_at, updated_by}},
+"missing": [...]}``; ``missing`` lists services with neither a stored config
+nor defaults.
+"""
+from __future__ import annotations
+
+import os
+from decimal import Decimal
+
+from clients import get_resource, get_table
+from metrics import instrumented
+from service_config import CURRENT_SK, apply_defaults, config_body, service_pk
+from utils import batch_get, create_response, parse_body
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+MAX_SERVICES = 100
+
+
+def _requested(body) -> dict[str, dict | None] | str:
+    """Map of service name to its defaults, or an error message."""
+    if not isinstance(body, dict):
+        return "body must be a JSON object"
+    services = body.get("services")
+    if not isinstance(services, list) or not services:
+        return "services must be a non-empty list"
+    if len(services) > MAX_SERVICES:
+        return f"at most {MAX_SERVICES} services per request"
+    requested: dict[str, dict | None] = {}
+    for entry in services:
+        if isinstance(entry, str):
+            entry = {"service": entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get("service"), str) or not entry["service"]:
+            return "each service must be a name or an object with a 'service' name"
+        defaults = entry.get("defaults")
+        if defaults is not None and not isinstance(defaults, dict):
+            return f"defaults for '{entry['service']}' must be an object"
+        if entry["service"] in requested:
+            return f"service '{entry['service']}' is listed more than once"
+        requested[entry["service"]] = defaults
+    return requested
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    try:
+        body = parse_body(event, parse_float=Decimal)
+    except Exception:
+        return create_response(400, {"error": "invalid JSON body"})
+
+    requested = _requested(body)
+    if isinstance(requested, str):
+        return create_response(400, {"error": requested})
+
+    stored = {
+        item["pk"]: item
+        for item in batch_get(
+            get_resource("dynamodb"),
+            DYNAMODB_TABLE,
+            [{"pk": service_pk(service), "sk": CURRENT_SK} for service in requested],
+        )
+    }
+
+    table = get_table(DYNAMODB_TABLE)
+    configs = {}
+    missing = []
+    for service, defaults in requested.items():
+        pk = service_pk(service)
+        item = stored.get(pk)
+        if defaults:
+            item = apply_defaults(table, pk, item, defaults)
+        if item is None:
+            missing.append(service)
+        else:
+            configs[service] = config_body(item)
+
+    return create_response(200, {"configs": configs, "missing": missing})
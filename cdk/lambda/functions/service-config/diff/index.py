@@ -0,0 +1,51 @@
+"""Diff two versions of a service config.
+
+GET /config/{service}/diff?from=A[&to=B] returns ``{from, to, patch}`` where
+``patch`` is the JSON patch (RFC 6902) turning version A into version B. B
+defaults to the current version.
+"""
+from __future__ import annotations
+
+import os
+
+import json_patch
+from clients import get_table
+from metrics import instrumented
+from service_config import CURRENT_SK, config_at, service_pk
+from utils import accepted_encoding, create_response
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    service = event["pathParameters"]["service"]
+    params = event.get("queryStringParameters") or {}
+    pk = service_pk(service)
+    table = get_table(DYNAMODB_TABLE)
+
+    try:
+        versions = [int(params[name]) for name in ("from", "to") if name in params]
+    except ValueError:
+        return create_response(400, {"error": "from and to must be integers"})
+    if "from" not in params:
+        return create_response(400, {"error": "from is required"})
+
+    configs = []
+    for version in versions:
+        entry = config_at(table, pk, version)
+        if entry is None:
+            return create_response(404, {"error": f"version {version} of service '{service}' is not in the history"})
+        configs.append(entry["config"])
+    if len(versions) == 1:
+        current = table.get_item(Key={"pk": pk, "sk": CURRENT_SK}).get("Item")
+        if current is None:
+            return create_response(404, {"error": f"no config found for service '{service}'"})
+        versions.append(int(current["version"]))
+        configs.append(current["config"])
+
+    return create_response(
+        200,
+        {"from": versions[0], "to": versions[1], "patch": json_patch.diff(configs[0], configs[1])},
+        accept_encoding=accepted_encoding(event),
+    )
@@ -1,54 +1,96 @@
-"""Get service config, optionally merging with provided defaults."""
+"""Get service config, optionally merging with provided defaults.
+
+Built for fleet restarts, when hundreds of services ask at once:
+
+- ``CURRENT`` items are cached per container for CONFIG_CACHE_TTL_SECONDS,
+  so a burst of starts reads the table once per container, not once per call
+- the item records fingerprints of ``x-config-defaults`` headers already known
+  to add no keys; a repeated header skips decoding and the merge check
+- responses carry ``ETag: "<version>"`` and a matching ``If-None-Match``
+  returns 304 without a body
+- new default keys are backfilled by one conditional write per version (see
+  ``service_config.apply_defaults``), not one write per instance
+"""
 from __future__ import annotations
 
 import base64
+import hashlib
 import json
 import os
-from datetime import datetime, timezone
+import time
 from decimal import Decimal
 
-import boto3
-from utils import create_response
+from botocore.exceptions import ClientError
+from clients import get_table
+from metrics import instrumented
+from service_config import CURRENT_SK, apply_defaults, config_body, config_etag, has_new_keys, service_pk
+from utils import create_response, etag_matches, get_header, not_modified_response
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+CACHE_TTL_SECONDS = float(os.environ.get("CONFIG_CACHE_TTL_SECONDS", "5"))
+# Defaults headers differ per service build; keep the set from growing without bound
+MAX_DEFAULTS_FINGERPRINTS = 32
 
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
+_cache: dict[str, tuple[float, dict | None]] = {}
 
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+def _fingerprint(defaults_header: str) -> str:
+    return hashlib.sha256(defaults_header.encode()).hexdigest()[:32]
 
 
-def _deep_merge(defaults: dict, overrides: dict) -> dict:
-    """Merge two dicts recursively. overrides wins on conflict."""
-    result = dict(defaults)
-    for key, value in overrides.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = _deep_merge(result[key], value)
-        else:
-            result[key] = value
-    return result
+def _load(pk: str) -> dict | None:
+    """The CURRENT item, served from the container cache while it is fresh."""
+    cached = _cache.get(pk)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    item = get_table(DYNAMODB_TABLE).get_item(Key={"pk": pk, "sk": CURRENT_SK}).get("Item")
+    _store(pk, item)
+    return item
 
 
-def _has_new_keys(defaults: dict, stored: dict) -> bool:
-    for key, value in defaults.items():
-        if key not in stored:
-            return True
-        if isinstance(value, dict) and isinstance(stored[key], dict):
-            if _has_new_keys(value, stored[key]):
-                return True
-    return False
+def _store(pk: str, item: dict | None) -> None:
+    _cache[pk] = (time.monotonic() + CACHE_TTL_SECONDS, item)
 
 
+def _remember_fingerprint(pk: str, stored: dict, fingerprint: str) -> dict:
+    """Record that a defaults header adds nothing to this version of the config."""
+    known = stored.get("defaults_fingerprints", set())
+    full = len(known) >= MAX_DEFAULTS_FINGERPRINTS
+    try:
+        get_table(DYNAMODB_TABLE).update_item(
+            Key={"pk": pk, "sk": CURRENT_SK},
+            UpdateExpression="SET defaults_fingerprints = :fp" if full else "ADD defaults_fingerprints :fp",
+            ConditionExpression="#v = :version",
+            ExpressionAttributeNames={"#v": "version"},
+            ExpressionAttributeValues={":fp": {fingerprint}, ":version": stored["version"]},
+        )
+    except ClientError as e:
+        # The config changed underneath us; the next call re-checks against it
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return stored
+    return {**stored, "defaults_fingerprints": {fingerprint} if full else {*known, fingerprint}}
+
+
+def _config_response(event: dict, item: dict, changed: bool = False) -> dict:
+    etag = config_etag(item)
+    if not changed and etag_matches(get_header(event, "if-none-match"), etag):
+        return not_modified_response(etag)
+    return create_response(200, config_body(item), headers={"ETag": etag})
+
+
+@instrumented
 def handler(event: dict, context) -> dict:
     service = event["pathParameters"]["service"]
-    pk = f"SERVICE#{service}"
+    pk = service_pk(service)
+
+    stored = _load(pk)
 
-    response = _table.get_item(Key={"pk": pk, "sk": "CURRENT"})
-    stored = response.get("Item")
+    defaults_header = get_header(event, "x-config-defaults")
+    fingerprint = _fingerprint(defaults_header) if defaults_header else None
+    if stored and fingerprint and fingerprint in stored.get("defaults_fingerprints", ()):
+        return _config_response(event, stored)
 
-    defaults_header = (event.get("headers") or {}).get("x-config-defaults")
     defaults = None
     if defaults_header:
         try:
@@ -56,49 +98,18 @@ def handler(event: dict, context) -> dict:
         except Exception:
             return create_response(400, {"error": "invalid x-config-defaults header"})
 
-    if stored and defaults:
-        config = stored["config"]
-        if _has_new_keys(defaults, config):
-            merged = _deep_merge(defaults, config)
-            _table.put_item(Item={
-                "pk": pk,
-                "sk": "CURRENT",
-                "config": merged,
-                "version": stored["version"],
-                "updated_at": _now_iso(),
-                "updated_by": "service",
-            })
-            config = merged
-        return create_response(200, {
-            "config": config,
-            "version": stored["version"],
-            "updated_at": stored["updated_at"],
-            "updated_by": stored["updated_by"],
-        })
-
-    if stored:
-        return create_response(200, {
-            "config": stored["config"],
-            "version": stored["version"],
-            "updated_at": stored["updated_at"],
-            "updated_by": stored["updated_by"],
-        })
+    if stored and defaults and not has_new_keys(defaults, stored["config"]):
+        stored = _remember_fingerprint(pk, stored, fingerprint)
+        _store(pk, stored)
+        return _config_response(event, stored)
 
+    changed = False
     if defaults:
-        now = _now_iso()
-        _table.put_item(Item={
-            "pk": pk,
-            "sk": "CURRENT",
-            "config": defaults,
-            "version": 1,
-            "updated_at": now,
-            "updated_by": "service",
-        })
-        return create_response(200, {
-            "config": defaults,
-            "version": 1,
-            "updated_at": now,
-            "updated_by": "service",
-        })
+        stored = apply_defaults(get_table(DYNAMODB_TABLE), pk, stored, defaults, defaults_fingerprints={fingerprint})
+        _store(pk, stored)
+        changed = True
+
+    if stored:
+        return _config_response(event, stored, changed=changed)
 
     return create_response(404, {"error": f"no config found for service '{service}'"})
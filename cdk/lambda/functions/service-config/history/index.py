@@ -0,0 +1,91 @@
+"""Service config history: list versions or read one as of a version or time.
+
+GET /config/{service}/history
+  version  config as of this version
+  at       config as of this ISO 8601 time (naive times are UTC)
+  limit    without version/at: page size for the version list (default 20, max 100)
+  cursor   ``next_cursor`` from the previous page
+
+A historical config is rebuilt from the nearest snapshot plus the patches
+after it (see ``service_config.config_at``).
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+
+from boto3.dynamodb.conditions import Key
+from clients import get_table
+from metrics import instrumented
+from service_config import HISTORY_PREFIX, config_at, service_pk, version_at
+from utils import accepted_encoding, create_response, projection, query_page
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+VERSION_SUMMARY_FIELDS = ["version", "updated_at", "updated_by", "rollback_of"]
+
+
+def _utc_iso(value: str) -> str:
+    """Normalise a timestamp to the UTC isoformat() the history is keyed by."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def _list_versions(event: dict, pk: str, params: dict) -> dict:
+    try:
+        limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except (ValueError, TypeError):
+        limit = DEFAULT_LIMIT
+    try:
+        items, next_cursor = query_page(
+            get_table(DYNAMODB_TABLE),
+            limit,
+            params.get("cursor"),
+            KeyConditionExpression=Key("pk").eq(pk) & Key("sk").begins_with(HISTORY_PREFIX),
+            ScanIndexForward=False,
+            **projection(VERSION_SUMMARY_FIELDS),
+        )
+    except ValueError as e:
+        return create_response(400, {"error": str(e)})
+    return create_response(
+        200,
+        {"versions": items, "count": len(items), "next_cursor": next_cursor},
+        accept_encoding=accepted_encoding(event),
+    )
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    service = event["pathParameters"]["service"]
+    params = event.get("queryStringParameters") or {}
+    pk = service_pk(service)
+    table = get_table(DYNAMODB_TABLE)
+
+    if "version" in params and "at" in params:
+        return create_response(400, {"error": "pass either version or at, not both"})
+
+    if "at" in params:
+        try:
+            at = _utc_iso(params["at"])
+        except ValueError:
+            return create_response(400, {"error": "at must be an ISO 8601 timestamp"})
+        version = version_at(table, pk, at)
+        if version is None:
+            return create_response(404, {"error": f"service '{service}' had no recorded config at {at}"})
+    elif "version" in params:
+        try:
+            version = int(params["version"])
+        except ValueError:
+            return create_response(400, {"error": "version must be an integer"})
+    else:
+        return _list_versions(event, pk, params)
+
+    entry = config_at(table, pk, version)
+    if entry is None:
+        return create_response(404, {"error": f"version {version} of service '{service}' is not in the history"})
+    entry.pop("pk")
+    entry.pop("sk")
+    return create_response(200, entry, accept_encoding=accepted_encoding(event))
@@ -1,20 +1,22 @@
-"""Update service config (Cognito-authenticated, UI only)."""
+"""Update service config (Cognito-authenticated, UI only).
+
+The change is written with ``service_config.write_version``, so watchers see
+it and the previous version stays readable from the history.
+"""
 from __future__ import annotations
 
-import json
 import os
 from datetime import datetime, timezone
 from decimal import Decimal
 
-import boto3
 from botocore.exceptions import ClientError
-from utils import create_response
+from clients import get_table
+from metrics import instrumented
+from service_config import CURRENT_SK, config_body, is_conflict, service_pk, write_version
+from utils import create_response, parse_body
 
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
 
-_ddb = boto3.resource("dynamodb")
-_table = _ddb.Table(DYNAMODB_TABLE)
-
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -28,11 +30,12 @@ def _caller(event: dict) -> str:
         return "unknown"
 
 
+@instrumented
 def handler(event: dict, context) -> dict:
     service = event["pathParameters"]["service"]
 
     try:
-        body = json.loads(event.get("body") or "{}", parse_float=Decimal)
+        body = parse_body(event, parse_float=Decimal)
     except Exception:
         return create_response(400, {"error": "invalid JSON body"})
 
@@ -47,28 +50,27 @@ def handler(event: dict, context) -> dict:
     now = _now_iso()
     new_version = expected_version + 1
 
-    try:
-        _table.put_item(
-            Item={
-                "pk": f"SERVICE#{service}",
-                "sk": "CURRENT",
-                "config": config,
-                "version": new_version,
-                "updated_at": now,
-                "updated_by": _caller(event),
-            },
-            ConditionExpression="attribute_not_exists(pk) OR #v = :expected",
-            ExpressionAttributeNames={"#v": "version"},
-            ExpressionAttributeValues={":expected": expected_version},
-        )
-    except ClientError as e:
-        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
-            return create_response(409, {"error": "config was modified by another request, please reload and try again"})
-        raise
-
-    return create_response(200, {
+    conflict = create_response(409, {"error": "config was modified by another request, please reload and try again"})
+    pk = service_pk(service)
+    table = get_table(DYNAMODB_TABLE)
+    # The previous config is needed for the history patch
+    stored = table.get_item(Key={"pk": pk, "sk": CURRENT_SK}, ConsistentRead=True).get("Item")
+    if stored and stored["version"] != expected_version:
+        return conflict
+
+    item = {
+        "pk": pk,
+        "sk": CURRENT_SK,
         "config": config,
         "version": new_version,
         "updated_at": now,
         "updated_by": _caller(event),
-    })
+    }
+    try:
+        write_version(table, stored, item)
+    except ClientError as e:
+        if is_conflict(e):
+            return conflict
+        raise
+
+    return create_response(200, config_body(item))
@@ -0,0 +1,76 @@
+"""Roll a service config back to an earlier version (Cognito-authenticated, UI only).
+
+POST /config/{service}/rollback with ``{"to_version": N, "version": current}``
+writes version N's config as a new version, the same way ``put`` does:
+conditional on ``version`` still being current (409 otherwise) and recorded
+in the history with ``rollback_of: N``.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+from clients import get_table
+from metrics import instrumented
+from service_config import CURRENT_SK, config_at, config_body, is_conflict, service_pk, write_version
+from utils import create_response, parse_body
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _caller(event: dict) -> str:
+    try:
+        claims = event["requestContext"]["authorizer"]["claims"]
+        return claims.get("email") or claims.get("cognito:username", "unknown")
+    except (KeyError, TypeError):
+        return "unknown"
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    service = event["pathParameters"]["service"]
+
+    try:
+        body = parse_body(event)
+    except Exception:
+        return create_response(400, {"error": "invalid JSON body"})
+
+    target = body.get("to_version")
+    expected_version = body.get("version")
+    if not isinstance(target, int) or not isinstance(expected_version, int):
+        return create_response(400, {"error": "to_version and version are required integers"})
+
+    conflict = create_response(409, {"error": "config was modified by another request, please reload and try again"})
+    pk = service_pk(service)
+    table = get_table(DYNAMODB_TABLE)
+    stored = table.get_item(Key={"pk": pk, "sk": CURRENT_SK}, ConsistentRead=True).get("Item")
+    if stored is None:
+        return create_response(404, {"error": f"no config found for service '{service}'"})
+    if stored["version"] != expected_version:
+        return conflict
+
+    entry = config_at(table, pk, target)
+    if entry is None:
+        return create_response(404, {"error": f"version {target} of service '{service}' is not in the history"})
+
+    item = {
+        "pk": pk,
+        "sk": CURRENT_SK,
+        "config": entry["config"],
+        "version": expected_version + 1,
+        "updated_at": _now_iso(),
+        "updated_by": _caller(event),
+    }
+    try:
+        write_version(table, stored, item, rollback_of=target)
+    except ClientError as e:
+        if is_conflict(e):
+            return conflict
+        raise
+
+    return create_response(200, config_body(item))
@@ -0,0 +1,91 @@
+"""Long-poll for a service config newer than the version a caller already has.
+
+GET /config/{service}/watch?version=N[&timeout=S] blocks until ``CURRENT`` has
+a version above N and returns it exactly like ``service-config/get`` (body and
+ETag). If nothing changes within the timeout it returns 304 with ``ETag: "N"``
+and the caller simply watches again.
+
+Each poll is a get_item on the one-attribute ``VERSION`` item that put writes
+in the same transaction as ``CURRENT``, so a change is seen within
+WATCH_POLL_SECONDS at the cost of a fraction of a read unit, and the config
+itself is read once per change.
+
+Every open watch holds a Lambda execution, so the function has reserved
+concurrency (WATCH_CONCURRENCY in the service-config stack, 20 watchers).
+Watches beyond that are throttled rather than eating into the account-wide
+pool the other controller Lambdas share; ConfigClient treats the failure like
+any other and backs off before watching again. Services that don't need
+changes within a second should poll GET instead.
+"""
+from __future__ import annotations
+
+import math
+import os
+import time
+
+from clients import get_table
+from metrics import instrumented
+from service_config import CURRENT_SK, VERSION_SK, config_body, config_etag, service_pk
+from utils import create_response, not_modified_response
+
+DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
+POLL_SECONDS = float(os.environ.get("WATCH_POLL_SECONDS", "1"))
+DEFAULT_TIMEOUT_SECONDS = 20
+# API Gateway ends integrations at 29s
+MAX_TIMEOUT_SECONDS = 25
+# Time kept back from the Lambda timeout to read CURRENT and respond
+RESPONSE_MARGIN_SECONDS = 2
+
+
+def _version(pk: str) -> int | None:
+    table = get_table(DYNAMODB_TABLE)
+    for sk in (VERSION_SK, CURRENT_SK):
+        # Configs last written before VERSION existed only have CURRENT
+        item = table.get_item(
+            Key={"pk": pk, "sk": sk},
+            ProjectionExpression="#v",
+            ExpressionAttributeNames={"#v": "version"},
+        ).get("Item")
+        if item:
+            return int(item["version"])
+    return None
+
+
+@instrumented
+def handler(event: dict, context) -> dict:
+    service = event["pathParameters"]["service"]
+    params = event.get("queryStringParameters") or {}
+
+    try:
+        known = int(params["version"])
+    except KeyError:
+        return create_response(400, {"error": "version is required"})
+    except ValueError:
+        return create_response(400, {"error": "version must be an integer"})
+
+    try:
+        timeout = float(params.get("timeout", DEFAULT_TIMEOUT_SECONDS))
+    except ValueError:
+        timeout = math.nan
+    if not math.isfinite(timeout):
+        return create_response(400, {"error": "timeout must be a number"})
+    timeout = min(max(timeout, 0), MAX_TIMEOUT_SECONDS)
+
+    deadline = time.monotonic() + timeout
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        lambda_deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - RESPONSE_MARGIN_SECONDS
+        deadline = min(deadline, lambda_deadline)
+
+    pk = service_pk(service)
+    while True:
+        current = _version(pk)
+        if current is not None and current > known:
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return not_modified_response(f'"{known}"')
+        time.sleep(min(POLL_SECONDS, remaining))
+
+    # VERSION and CURRENT are written together; a strong read can't see the older CURRENT
+    item = get_table(DYNAMODB_TABLE).get_item(Key={"pk": pk, "sk": CURRENT_SK}, ConsistentRead=True)["Item"]
+    return create_response(200, config_body(item), headers={"ETag": config_etag(item)})
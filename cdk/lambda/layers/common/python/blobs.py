@@ -0,0 +1,140 @@
+"""Content-addressed S3 storage for large research item attributes.
+
+Attributes whose JSON form exceeds ``BLOB_INLINE_BYTES`` are written to
+``s3://$BLOB_BUCKET/research/blobs/<sha256>.json.gz`` and replaced on the item
+by a ``<field>_ref`` pointer ``{'key', 'sha256', 'size'}`` (plus a ``preview``
+for strings). Identical values share one object, so an environment repeated
+across a thousand iterations is stored once. What stays inline is a digest
+small enough for queries that never need the body:
+
+- ``metrics`` keeps its numeric top-level entries (best tracking, series and
+  listings read only those); nested or non-numeric entries live in the blob
+- every other offloaded field is removed from the item
+
+Readers call ``resolve`` only for the fields a caller asked for; objects are
+immutable, so fetched bodies are cached per container.
+"""
+import collections
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import os
+import threading
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from clients import get_client
+from utils import dumps
+
+BLOB_BUCKET = os.environ.get('BLOB_BUCKET', '')
+BLOB_PREFIX = 'research/blobs/'
+INLINE_LIMIT = int(os.environ.get('BLOB_INLINE_BYTES', '8192'))
+PREVIEW_CHARS = 200
+CACHE_ENTRIES = 256
+META_FIELDS = ('spec_yaml',)
+ITERATION_FIELDS = ('metrics', 'metadata', 'environment')
+MAX_WORKERS = 16
+
+_cache: 'collections.OrderedDict[str, Any]' = collections.OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def ref_attribute(field: str) -> str:
+    return f'{field}_ref'
+
+
+def _digest(field: str, value: Any) -> Optional[Any]:
+    """The inline stand-in for an offloaded value, or None to drop the attribute."""
+    if field != 'metrics' or not isinstance(value, dict):
+        return None
+    numeric = {
+        k: v for k, v in value.items()
+        if isinstance(v, (int, float, Decimal)) and not isinstance(v, bool)
+    }
+    return numeric if len(dumps(numeric)) <= INLINE_LIMIT else None
+
+
+def offload(items: Iterable[Dict[str, Any]], fields: Iterable[str]) -> int:
+    """Move oversized ``fields`` of each item to S3 in place; returns objects uploaded.
+
+    Uploads are de-duplicated by content and run in parallel. A field that is
+    small enough stays inline and any stale ``<field>_ref`` is dropped from
+    the item, so callers writing a whole item (or SET/REMOVE-ing from it) get
+    a consistent pair.
+    """
+    fields = tuple(fields)
+    uploads: Dict[str, bytes] = {}
+    for item in items:
+        for field in fields:
+            if field not in item:
+                continue
+            value = item[field]
+            body = dumps(value).encode()
+            if len(body) <= INLINE_LIMIT:
+                item.pop(ref_attribute(field), None)
+                continue
+            sha256 = hashlib.sha256(body).hexdigest()
+            key = f'{BLOB_PREFIX}{sha256}.json.gz'
+            uploads.setdefault(key, body)
+            ref = {'key': key, 'sha256': sha256, 'size': len(body)}
+            if isinstance(value, str):
+                ref['preview'] = value[:PREVIEW_CHARS]
+            item[ref_attribute(field)] = ref
+            digest = _digest(field, value)
+            if digest is None:
+                del item[field]
+            else:
+                item[field] = digest
+
+    if uploads:
+        if not BLOB_BUCKET:
+            raise RuntimeError('BLOB_BUCKET is not configured')
+        s3 = get_client('s3')
+
+        def _put(key: str) -> None:
+            s3.put_object(
+                Bucket=BLOB_BUCKET,
+                Key=key,
+                Body=gzip.compress(uploads[key]),
+                ContentType='application/json',
+                ContentEncoding='gzip',
+            )
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(uploads), MAX_WORKERS)) as executor:
+            list(executor.map(_put, uploads))
+    return len(uploads)
+
+
+def _fetch(key: str) -> Any:
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    obj = get_client('s3').get_object(Bucket=BLOB_BUCKET, Key=key)
+    value = json.loads(gzip.decompress(obj['Body'].read()), parse_float=Decimal)
+    with _cache_lock:
+        _cache[key] = value
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return value
+
+
+def resolve(items: Iterable[Dict[str, Any]], fields: Iterable[str]) -> None:
+    """Replace ``<field>_ref`` pointers on each item with the stored body, in place."""
+    fields = tuple(fields)
+    pending: List[tuple] = []
+    for item in items:
+        for field in fields:
+            ref = item.get(ref_attribute(field))
+            if ref:
+                pending.append((item, field, ref['key']))
+    if not pending:
+        return
+
+    keys = list(dict.fromkeys(key for _, _, key in pending))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(keys), MAX_WORKERS)) as executor:
+        bodies = dict(zip(keys, executor.map(_fetch, keys)))
+    for item, field, key in pending:
+        item[field] = bodies[key]
+        del item[ref_attribute(field)]
@@ -0,0 +1,65 @@
+"""Shared, lazily created boto3 clients and resources.
+
+Handlers ask for clients at call time instead of building them at import, so an
+invocation only pays for the AWS services it actually touches, and every client
+in a container reuses one tuned botocore ``Config`` (connection pool, TCP
+keep-alive, adaptive retries) and reports its calls to ``metrics``.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+import metrics
+
+BOTO_CONFIG = Config(
+    max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '50')),
+    tcp_keepalive=True,
+    connect_timeout=5,
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+)
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_resources: Dict[Tuple[str, Optional[str]], Any] = {}
+_tables: Dict[str, Any] = {}
+
+
+def get_client(service_name: str, region_name: Optional[str] = None) -> Any:
+    """Return the container-wide client for a service (and optional region)."""
+    key = (service_name, region_name)
+    client = _clients.get(key)
+    if client is None:
+        # boto3's default session is not thread-safe to build clients from
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = boto3.client(service_name, region_name=region_name, config=BOTO_CONFIG)
+                metrics.attach(client)
+                _clients[key] = client
+    return client
+
+
+def get_resource(service_name: str, region_name: Optional[str] = None) -> Any:
+    """Return the container-wide boto3 resource for a service (and optional region)."""
+    key = (service_name, region_name)
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = boto3.resource(service_name, region_name=region_name, config=BOTO_CONFIG)
+                metrics.attach(resource.meta.client)
+                _resources[key] = resource
+    return resource
+
+
+def get_table(table_name: str) -> Any:
+    """Return a cached DynamoDB Table resource."""
+    table = _tables.get(table_name)
+    if table is None:
+        table = get_resource('dynamodb').Table(table_name)
+        _tables[table_name] = table
+    return table
@@ -0,0 +1,246 @@
+"""Client for the service-config API, for services that read their own config.
+
+    client = ConfigClient(API_URL, 'classifier', api_key=KEY, defaults=DEFAULTS).start()
+    threshold = client.get('risk.max_position', 100)
+
+- ``start`` serves the last good config from a disk cache straight away and
+  fetches from the API only when there is no cache, so restarts are instant
+  and survive an API outage. With neither available it falls back to
+  ``defaults``
+- a daemon thread refreshes in the background (stale-while-revalidate): reads
+  never wait on the network. It polls every ``refresh_interval`` seconds
+  with jitter, or long-polls ``/watch`` when ``watch=True``, and backs off
+  on errors (including a watch throttled because the endpoint's reserved
+  concurrency is in use)
+- refreshes send ``If-None-Match`` so an unchanged config costs a bodiless
+  304, and the same ``x-config-defaults`` header every time, which the API
+  recognises without re-checking it
+- ``on_change`` callbacks run on the refresh thread with (new, old) configs
+- ``get`` is a dict lookup on a flattened copy of the config, rebuilt once
+  per change
+"""
+import base64
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'GNOME_CONFIG_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'gnome-config'),
+)
+# The API holds a watch open for at most 25s; the read timeout must outlast it
+WATCH_SECONDS = 20
+MAX_BACKOFF_SECONDS = 300
+
+_MISSING = object()
+
+ChangeCallback = Callable[[Dict[str, Any], Dict[str, Any]], None]
+
+
+class ConfigUnavailableError(RuntimeError):
+    """No config could be loaded from the API, the disk cache or defaults."""
+
+
+def _flatten(config: Dict[str, Any], prefix: str = '', into: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Every value in ``config`` keyed by its dotted path, subtrees included."""
+    flat = {} if into is None else into
+    for key, value in config.items():
+        path = f'{prefix}{key}'
+        flat[path] = value
+        if isinstance(value, dict):
+            _flatten(value, f'{path}.', flat)
+    return flat
+
+
+class ConfigClient:
+    """A service's config, kept current in memory by a background thread."""
+
+    def __init__(
+        self,
+        base_url: str,
+        service: str,
+        api_key: Optional[str] = None,
+        defaults: Optional[Dict[str, Any]] = None,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        refresh_interval: float = 30.0,
+        jitter: float = 0.2,
+        watch: bool = False,
+        timeout: float = 5.0,
+    ) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.service = service
+        self.defaults = defaults
+        self.cache_path = os.path.join(cache_dir, f'{service}.json') if cache_dir else None
+        self.refresh_interval = refresh_interval
+        self.jitter = jitter
+        self.watch = watch
+        self.timeout = timeout
+
+        self._session = requests.Session()
+        self._session.headers['Accept'] = 'application/json'
+        if api_key:
+            self._session.headers['x-api-key'] = api_key
+        self._defaults_header = (
+            base64.b64encode(json.dumps(defaults, sort_keys=True).encode()).decode() if defaults else None
+        )
+        self._config: Dict[str, Any] = {}
+        self._flat: Dict[str, Any] = {}
+        self._version = 0
+        self._callbacks: List[ChangeCallback] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- reads ---------------------------------------------------------------
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """The current config; treat it as read-only, it is shared with other readers."""
+        return self._config
+
+    @property
+    def version(self) -> int:
+        """Version of the current config; 0 while running on ``defaults`` only."""
+        return self._version
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """Value at a dotted path (``'risk.max_position'``), or ``default``."""
+        value = self._flat.get(path, _MISSING)
+        return default if value is _MISSING else value
+
+    def on_change(self, callback: ChangeCallback) -> ChangeCallback:
+        """Call ``callback(new, old)`` after each config change; usable as a decorator."""
+        self._callbacks.append(callback)
+        return callback
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self) -> 'ConfigClient':
+        """Load a config (disk cache, else API, else defaults) and start refreshing."""
+        # A cached config may be stale: serve it now and revalidate straight away
+        revalidate = self._load_cache()
+        if not revalidate:
+            try:
+                self.refresh()
+            except (requests.RequestException, ValueError, KeyError) as e:
+                if self.defaults is None:
+                    raise ConfigUnavailableError(f'no config for {self.service!r}: {e}') from e
+                logger.warning('config %s unavailable, using defaults: %s', self.service, e)
+                self._apply(self.defaults, 0)
+        self._thread = threading.Thread(target=self._run, args=(revalidate,), name=f'config-{self.service}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + WATCH_SECONDS if self.watch else self.timeout)
+        self._session.close()
+
+    def __enter__(self) -> 'ConfigClient':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    # -- refresh -------------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """Fetch the config now if it changed; returns whether it did."""
+        headers = {}
+        if self._version:
+            headers['If-None-Match'] = f'"{self._version}"'
+        if self._defaults_header:
+            headers['x-config-defaults'] = self._defaults_header
+        response = self._session.get(f'{self.base_url}/config/{self.service}', headers=headers, timeout=self.timeout)
+        return self._handle(response)
+
+    def _watch_once(self) -> bool:
+        response = self._session.get(
+            f'{self.base_url}/config/{self.service}/watch',
+            params={'version': self._version, 'timeout': WATCH_SECONDS},
+            timeout=(self.timeout, WATCH_SECONDS + self.timeout),
+        )
+        return self._handle(response)
+
+    def _handle(self, response: requests.Response) -> bool:
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        body = response.json()
+        return self._apply(body['config'], int(body['version']), body)
+
+    def _apply(self, config: Dict[str, Any], version: int, body: Optional[Dict[str, Any]] = None) -> bool:
+        with self._lock:
+            old = self._config
+            if version == self._version and config == old:
+                return False
+            # Readers hold no lock: publish the flattened view before the version moves
+            self._flat = _flatten(config)
+            self._config = config
+            self._version = version
+        if body is not None:
+            self._save_cache(body)
+        for callback in list(self._callbacks):
+            try:
+                callback(config, old)
+            except Exception:
+                logger.exception('config %s change callback failed', self.service)
+        return True
+
+    def _next_delay(self, failures: int) -> float:
+        base = self.refresh_interval if not failures else min(self.refresh_interval * 2 ** failures, MAX_BACKOFF_SECONDS)
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _run(self, revalidate: bool) -> None:
+        failures = 0
+        delay = 0.0 if revalidate or self.watch else self._next_delay(0)
+        while not self._stop.wait(delay):
+            try:
+                # A watch carries no defaults; revalidating with a GET lets the API backfill them
+                if self.watch and not revalidate:
+                    self._watch_once()
+                else:
+                    self.refresh()
+                revalidate = False
+                failures = 0
+            except (requests.RequestException, ValueError, KeyError) as e:
+                failures += 1
+                logger.warning('config %s refresh failed (%d in a row): %s', self.service, failures, e)
+            # A watch returns as soon as something changes (or times out): re-arm it at once
+            delay = 0.0 if self.watch and not failures else self._next_delay(failures)
+
+    # -- disk cache ----------------------------------------------------------
+
+    def _load_cache(self) -> bool:
+        if not self.cache_path:
+            return False
+        try:
+            with open(self.cache_path) as f:
+                body = json.load(f)
+            self._apply(body['config'], int(body['version']))
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+    def _save_cache(self, body: Dict[str, Any]) -> None:
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write-then-rename so a crash never leaves a torn cache file
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{self.service}.')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({**body, 'fetched_at': time.time()}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning('could not write config cache %s: %s', self.cache_path, e)
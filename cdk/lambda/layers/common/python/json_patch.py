@@ -0,0 +1,106 @@
+"""Minimal RFC 6902 JSON Patch: diff two documents and apply the result.
+
+``diff`` emits only ``add``, ``remove`` and ``replace`` operations, recursing
+into objects so a change deep in a large config costs one small operation.
+Arrays are compared as values and replaced whole. ``apply`` understands the
+same three operations (plus array indices and ``-`` for ``add``), which is
+all the config history stores.
+"""
+import copy
+from typing import Any, Dict, List
+
+
+class PatchError(ValueError):
+    """A patch that does not apply to the document it was given."""
+
+
+def _escape(token: str) -> str:
+    return token.replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _tokens(path: str) -> List[str]:
+    if path == '':
+        return []
+    if not path.startswith('/'):
+        raise PatchError(f'invalid JSON pointer {path!r}')
+    return [_unescape(token) for token in path[1:].split('/')]
+
+
+def diff(source: Any, target: Any, path: str = '') -> List[Dict[str, Any]]:
+    """Operations that turn ``source`` into ``target``."""
+    if isinstance(source, dict) and isinstance(target, dict):
+        ops: List[Dict[str, Any]] = []
+        for key, value in source.items():
+            child = f'{path}/{_escape(key)}'
+            if key not in target:
+                ops.append({'op': 'remove', 'path': child})
+            else:
+                ops.extend(diff(value, target[key], child))
+        for key, value in target.items():
+            if key not in source:
+                ops.append({'op': 'add', 'path': f'{path}/{_escape(key)}', 'value': value})
+        return ops
+    # Stored numbers are Decimal and new ones may be int; only bool vs number must differ
+    if source == target and isinstance(source, bool) == isinstance(target, bool):
+        return []
+    return [{'op': 'replace', 'path': path, 'value': target}]
+
+
+def _index(container: list, token: str, allow_end: bool) -> int:
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith('0')):
+        raise PatchError(f'invalid array index {token!r}')
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f'array index {index} out of range')
+    return index
+
+
+def apply(document: Any, patch: List[Dict[str, Any]]) -> Any:
+    """Return a copy of ``document`` with ``patch`` applied; the input is not modified."""
+    document = copy.deepcopy(document)
+    for operation in patch:
+        op = operation.get('op')
+        tokens = _tokens(operation.get('path', ''))
+        value = copy.deepcopy(operation.get('value'))
+        if op not in ('add', 'remove', 'replace'):
+            raise PatchError(f'unsupported operation {op!r}')
+        if not tokens:
+            if op == 'remove':
+                raise PatchError('cannot remove the whole document')
+            document = value
+            continue
+
+        parent = document
+        for token in tokens[:-1]:
+            if isinstance(parent, dict) and token in parent:
+                parent = parent[token]
+            elif isinstance(parent, list):
+                parent = parent[_index(parent, token, allow_end=False)]
+            else:
+                raise PatchError(f'path {operation["path"]!r} does not exist')
+
+        last = tokens[-1]
+        if isinstance(parent, dict):
+            if op != 'add' and last not in parent:
+                raise PatchError(f'path {operation["path"]!r} does not exist')
+            if op == 'remove':
+                del parent[last]
+            else:
+                parent[last] = value
+        elif isinstance(parent, list):
+            index = _index(parent, last, allow_end=op == 'add')
+            if op == 'add':
+                parent.insert(index, value)
+            elif op == 'remove':
+                del parent[index]
+            else:
+                parent[index] = value
+        else:
+            raise PatchError(f'path {operation["path"]!r} does not exist')
+    return document
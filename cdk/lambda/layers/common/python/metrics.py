@@ -0,0 +1,187 @@
+"""Per-invocation latency and AWS-call metrics written as CloudWatch Embedded Metric Format.
+
+``@instrumented`` wraps a raw ``handler(event, context)`` (stack it above
+``@lambda_handler`` for body-style handlers). Clients built through
+``clients.py`` are attached to botocore's event hooks, so every AWS call made
+during the invocation is timed and its DynamoDB consumed capacity and returned
+item count are tallied. At the end of the invocation one EMF line is printed
+for the invocation as a whole and one per (service, operation) — or several,
+since EMF caps a metric at EMF_MAX_VALUES values — which lets CloudWatch
+attribute latency per endpoint and per dependency without X-Ray.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'GnomeController')
+# CloudWatch drops an EMF document whose metric has more values than this
+EMF_MAX_VALUES = 100
+
+_lock = threading.Lock()
+_active = False
+_calls: Dict[tuple, Dict[str, Any]] = {}
+_timings: Dict[str, float] = {}
+
+
+def _reset() -> None:
+    global _active
+    with _lock:
+        _active = True
+        _calls.clear()
+        _timings.clear()
+
+
+def add_timing(name: str, elapsed_ms: float) -> None:
+    """Add time spent in a named in-process phase (e.g. serialization) to the current invocation."""
+    if not _active:
+        return
+    with _lock:
+        _timings[name] = _timings.get(name, 0.0) + elapsed_ms
+
+
+def _consumed_capacity(parsed: Dict[str, Any]) -> float:
+    consumed = parsed.get('ConsumedCapacity')
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(float(c.get('CapacityUnits', 0)) for c in consumed or [])
+
+
+def _items_returned(parsed: Dict[str, Any]) -> int:
+    if 'Count' in parsed:
+        return int(parsed['Count'])
+    if 'Item' in parsed:
+        return 1
+    if 'Responses' in parsed:
+        responses = parsed['Responses']
+        if isinstance(responses, dict):
+            return sum(len(items) for items in responses.values())
+        return len(responses)
+    return 0
+
+
+def _request_capacity(params: Dict[str, Any], model: Any, **kwargs: Any) -> None:
+    if 'ReturnConsumedCapacity' in model.input_shape.members:
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+
+def _before_call(context: Dict[str, Any], **kwargs: Any) -> None:
+    context['metrics_start'] = time.perf_counter()
+
+
+def _after_call(parsed: Dict[str, Any], model: Any, context: Dict[str, Any], **kwargs: Any) -> None:
+    start = context.get('metrics_start')
+    if not _active or start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    key = (model.service_model.service_name, model.name)
+    with _lock:
+        stats = _calls.setdefault(key, {'latencies': [], 'capacity': 0.0, 'items': 0})
+        stats['latencies'].append(round(elapsed_ms, 2))
+        stats['capacity'] += _consumed_capacity(parsed or {})
+        stats['items'] += _items_returned(parsed or {})
+
+
+def attach(client: Any) -> None:
+    """Register the timing hooks on a botocore client."""
+    events = client.meta.events
+    if client.meta.service_model.service_name == 'dynamodb':
+        events.register('provide-client-params.dynamodb.*', _request_capacity)
+    events.register('before-call.*.*', _before_call)
+    events.register('after-call.*.*', _after_call)
+
+
+def _endpoint(event: Any) -> str:
+    if isinstance(event, dict) and event.get('httpMethod') and event.get('resource'):
+        return f"{event['httpMethod']} {event['resource']}"
+    return 'direct'
+
+
+def _emf(dimensions: List[str], values: Dict[str, Any], metrics: Dict[str, str]) -> str:
+    return json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [dimensions],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, unit in metrics.items()],
+            }],
+        },
+        **values,
+    }, separators=(',', ':'))
+
+
+def _flush(function: str, endpoint: str, duration_ms: float, status_code: Optional[int], error: bool) -> None:
+    global _active
+    with _lock:
+        _active = False
+        calls = dict(_calls)
+        timings = dict(_timings)
+
+    aws_ms = sum(sum(stats['latencies']) for stats in calls.values())
+    invocation = {
+        'Function': function,
+        'Endpoint': endpoint,
+        'Duration': round(duration_ms, 2),
+        'AwsCalls': sum(len(stats['latencies']) for stats in calls.values()),
+        'AwsTime': round(aws_ms, 2),
+        'ConsumedCapacity': sum(stats['capacity'] for stats in calls.values()),
+        'ItemsReturned': sum(stats['items'] for stats in calls.values()),
+        'Errors': int(error or (status_code or 0) >= 500),
+        'StatusCode': status_code,
+    }
+    units = {
+        'Duration': 'Milliseconds',
+        'AwsCalls': 'Count',
+        'AwsTime': 'Milliseconds',
+        'ConsumedCapacity': 'Count',
+        'ItemsReturned': 'Count',
+        'Errors': 'Count',
+    }
+    for name, elapsed_ms in timings.items():
+        invocation[f'{name}Time'] = round(elapsed_ms, 2)
+        units[f'{name}Time'] = 'Milliseconds'
+    print(_emf(['Function', 'Endpoint'], invocation, units))
+
+    for (service, operation), stats in calls.items():
+        latencies = stats['latencies']
+        # Latencies go out EMF_MAX_VALUES per document; the totals only on the first
+        for offset in range(0, len(latencies), EMF_MAX_VALUES):
+            values = {
+                'Function': function,
+                'Endpoint': endpoint,
+                'Service': service,
+                'Operation': operation,
+                'CallLatency': latencies[offset:offset + EMF_MAX_VALUES],
+            }
+            units = {'CallLatency': 'Milliseconds'}
+            if offset == 0:
+                values.update({'ConsumedCapacity': stats['capacity'], 'ItemsReturned': stats['items']})
+                units.update({'ConsumedCapacity': 'Count', 'ItemsReturned': 'Count'})
+            print(_emf(['Function', 'Endpoint', 'Service', 'Operation'], values, units))
+
+
+def instrumented(func: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    """Time a ``handler(event, context)`` and emit its EMF metrics when it returns or raises."""
+    @functools.wraps(func)
+    def wrapper(event: Any, context: Any) -> Any:
+        function = getattr(context, 'function_name', None) or os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')
+        _reset()
+        start = time.perf_counter()
+        result = None
+        error = False
+        try:
+            result = func(event, context)
+            return result
+        except Exception:
+            error = True
+            raise
+        finally:
+            status_code = result.get('statusCode') if isinstance(result, dict) else None
+            try:
+                _flush(function, _endpoint(event), (time.perf_counter() - start) * 1000, status_code, error)
+            except Exception:
+                pass
+    return wrapper
@@ -0,0 +1,262 @@
+"""Helpers shared by the research session functions.
+
+Iteration sort keys and number allocation, the session listing index items,
+and best-iteration tracking on a session's META item.
+
+Iteration numbers come from ``last_iteration`` on META, bumped atomically by
+``reserve_iterations`` (and seeded from the stored iterations for sessions
+created before it existed). Reserving moves only the counter: writers store
+their iterations first and then call ``touch_session``, so a reader that sees
+the new ``updated_at`` (the series cache keys on it) also sees them.
+
+Best-iteration tracking:
+META carries ``primary_metric`` and ``primary_metric_direction``, and
+``best_iteration`` / ``best_value`` / ``best_metric`` (plus ``best_pnl`` and
+``best_sharpe`` taken from that iteration) are kept current as iterations are
+recorded, so listings can rank sessions without reading their iterations.
+"""
+import zlib
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from utils import query_all
+
+# Metric keys copied onto META alongside the best iteration
+BEST_SUMMARY_METRICS = {'best_pnl': 'final_pnl', 'best_sharpe': 'sharpe'}
+# Iteration numbers fit the 10-digit sort key; 0 and negatives would sort wrongly
+MAX_ITERATION = 10 ** 10 - 1
+
+
+def iteration_sk(iteration: int) -> str:
+    """Fixed-width iteration sort key, so lexical order matches numeric order."""
+    return f'ITER#{iteration:010d}'
+
+
+class SessionNotFound(Exception):
+    """The session has no META item."""
+
+
+class IterationsExhausted(Exception):
+    """Reserving would take iteration numbers past MAX_ITERATION."""
+
+
+def parse_iteration(value: Any) -> int:
+    """A client-supplied iteration number; raises ValueError unless 1 <= n <= MAX_ITERATION."""
+    try:
+        iteration = int(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'invalid iteration {value!r}') from e
+    if not 1 <= iteration <= MAX_ITERATION:
+        raise ValueError(f'iteration {iteration} out of range')
+    return iteration
+
+
+def _meta_key(session_name: str) -> Dict[str, str]:
+    return {'session_name': session_name, 'sk': 'META'}
+
+
+def reserve_iterations(table: Any, session_name: str, count: int, floor: int = 0) -> int:
+    """Atomically reserve ``count`` consecutive iteration numbers; returns the first.
+
+    ``floor`` is the highest number the caller is about to write explicitly,
+    so a counter seeded here starts above it. Raises SessionNotFound or
+    IterationsExhausted.
+    """
+    try:
+        response = table.update_item(
+            Key=_meta_key(session_name),
+            UpdateExpression='ADD last_iteration :n',
+            ConditionExpression='attribute_exists(last_iteration)',
+            ExpressionAttributeValues={':n': count},
+            ReturnValues='UPDATED_NEW',
+        )
+        last = int(response['Attributes']['last_iteration'])
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        last = _seed_counter(table, session_name, count, floor)
+    if last > MAX_ITERATION:
+        raise IterationsExhausted(session_name)
+    return last - count + 1
+
+
+def _seed_counter(table: Any, session_name: str, count: int, floor: int) -> int:
+    """Initialise last_iteration for a session created before server-side allocation; returns it."""
+    if table.get_item(Key=_meta_key(session_name), ProjectionExpression='sk').get('Item') is None:
+        raise SessionNotFound(session_name)
+    existing = query_all(
+        table,
+        KeyConditionExpression=Key('session_name').eq(session_name) & Key('sk').begins_with('ITER#'),
+        ProjectionExpression='iteration',
+    )
+    last = max([floor] + [int(i.get('iteration', 0)) for i in existing]) + count
+    try:
+        table.update_item(
+            Key=_meta_key(session_name),
+            UpdateExpression='SET last_iteration = :last',
+            ConditionExpression='attribute_exists(sk) AND attribute_not_exists(last_iteration)',
+            ExpressionAttributeValues={':last': last},
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        # META was deleted, or a concurrent writer seeded the counter first
+        return reserve_iterations(table, session_name, count, floor) + count - 1
+    return last
+
+
+def raise_iteration_counter(table: Any, session_name: str, iteration: int) -> None:
+    """Keep the allocator ahead of an explicitly chosen number.
+
+    A no-op for sessions without a counter yet: seeding covers stored
+    iterations, and ``floor`` covers ones about to be written.
+    """
+    try:
+        table.update_item(
+            Key=_meta_key(session_name),
+            UpdateExpression='SET last_iteration = :n',
+            ConditionExpression='last_iteration < :n',
+            ExpressionAttributeValues={':n': iteration},
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def touch_session(table: Any, session_name: str, count: int, now: str) -> Dict[str, Any]:
+    """Count ``count`` stored iterations on META and bump updated_at/list_sk; returns META as updated."""
+    return table.update_item(
+        Key=_meta_key(session_name),
+        UpdateExpression='ADD iteration_count :n SET updated_at = :now, list_sk = :now',
+        ExpressionAttributeValues={':n': count, ':now': now},
+        ReturnValues='ALL_NEW',
+    )['Attributes']
+
+
+def metric_value(item: Dict[str, Any], metric: Optional[str]) -> Optional[Decimal]:
+    """A numeric metric from an iteration's ``metrics`` map, or None if absent or non-numeric."""
+    if not metric:
+        return None
+    value = (item.get('metrics') or {}).get(metric)
+    if isinstance(value, bool) or not isinstance(value, (int, Decimal)):
+        return None
+    if isinstance(value, Decimal) and not value.is_finite():
+        return None
+    return Decimal(value)
+
+
+def minimizes(meta: Dict[str, Any]) -> bool:
+    return str(meta.get('primary_metric_direction', 'maximize')).lower() in ('minimize', 'min')
+
+
+def is_better(value: Decimal, best: Optional[Decimal], minimize: bool) -> bool:
+    if best is None:
+        return True
+    return value < best if minimize else value > best
+
+
+def pick_best(items: Iterable[Dict[str, Any]], metric: Optional[str], minimize: bool) -> Optional[Dict[str, Any]]:
+    """The iteration with the best value of ``metric`` (earliest wins ties), or None."""
+    best_item = None
+    best_value = None
+    for item in sorted(items, key=lambda i: int(i.get('iteration', 0))):
+        value = metric_value(item, metric)
+        if value is not None and is_better(value, best_value, minimize):
+            best_item, best_value = item, value
+    return best_item
+
+
+def best_fields(item: Dict[str, Any], metric: str) -> Dict[str, Any]:
+    """META attributes describing ``item`` as the session's best iteration."""
+    fields = {
+        'best_iteration': int(item['iteration']),
+        'best_value': metric_value(item, metric),
+        'best_metric': metric,
+    }
+    for attribute, key in BEST_SUMMARY_METRICS.items():
+        fields[attribute] = metric_value(item, key)
+    return fields
+
+
+def update_best(table: Any, session_name: str, meta: Dict[str, Any], item: Dict[str, Any]) -> bool:
+    """Record ``item`` as the best iteration if it beats the stored best.
+
+    ``meta`` is a recent copy of META, used to skip the write when the item
+    clearly does not win. The write itself is conditional on the stored best
+    (and on the primary metric being unchanged), so concurrent recorders
+    cannot replace a better value with a worse one. Returns True if written.
+    """
+    metric = meta.get('primary_metric')
+    value = metric_value(item, metric)
+    if value is None:
+        return False
+    minimize = minimizes(meta)
+    stored = meta.get('best_value') if meta.get('best_metric') == metric else None
+    if not is_better(value, stored, minimize):
+        return False
+
+    fields = best_fields(item, metric)
+    present = {k: v for k, v in fields.items() if v is not None}
+    removed = [k for k, v in fields.items() if v is None]
+    update_expression = 'SET ' + ', '.join(f'{k} = :{k}' for k in present)
+    if removed:
+        update_expression += ' REMOVE ' + ', '.join(removed)
+    try:
+        table.update_item(
+            Key={'session_name': session_name, 'sk': 'META'},
+            UpdateExpression=update_expression,
+            ConditionExpression=(
+                'primary_metric = :metric AND (attribute_not_exists(best_value) '
+                f'OR best_metric <> :metric OR best_value {">" if minimize else "<"} :best_value)'
+            ),
+            ExpressionAttributeValues={**{f':{k}': v for k, v in present.items()}, ':metric': metric},
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+    return True
+
+
+# Session listing. META carries list_pk=session_list_pk(name) and
+# list_sk=updated_at (every writer that bumps updated_at mirrors it into
+# list_sk); tag and owner listings use small index items in the session's
+# partition whose list_sk is the session's created_at. All of them share the
+# list-index GSI. list_sk moves on every recorded iteration, so META is spread
+# over SESSION_LIST_SHARDS index partitions and the unfiltered listing merges
+# them; one constant partition would take every session's writes.
+LIST_INDEX = 'list-index'
+SESSION_LIST_PREFIX = 'SESSION#'
+SESSION_LIST_SHARDS = 8
+# META bookkeeping that is not part of the session API
+INTERNAL_META_FIELDS = ('list_pk', 'list_sk', 'last_iteration')
+
+
+def session_list_pk(session_name: str) -> str:
+    """META's list-index partition (stable across processes, unlike hash())."""
+    return f'{SESSION_LIST_PREFIX}{zlib.crc32(session_name.encode()) % SESSION_LIST_SHARDS}'
+
+
+def session_list_pks() -> List[str]:
+    return [f'{SESSION_LIST_PREFIX}{shard}' for shard in range(SESSION_LIST_SHARDS)]
+
+
+def tag_index_item(session_name: str, tag: str, created_at: str) -> Dict[str, Any]:
+    return {
+        'session_name': session_name,
+        'sk': f'TAG#{tag}',
+        'list_pk': f'TAG#{tag}',
+        'list_sk': f'{created_at}#{session_name}',
+    }
+
+
+def owner_index_item(session_name: str, owner: str, created_at: str) -> Dict[str, Any]:
+    return {
+        'session_name': session_name,
+        'sk': 'OWNER',
+        'list_pk': f'OWNER#{owner}',
+        'list_sk': f'{created_at}#{session_name}',
+    }
@@ -0,0 +1,60 @@
+"""Single-Lambda entry point that dispatches API Gateway requests to the per-route handlers.
+
+When a stack is deployed in router mode, one function is built from a whole
+``functions/<area>`` directory with ``router.handler`` as its handler and a
+``ROUTER_ROUTES`` environment variable mapping ``"<METHOD> <resource>"`` (the
+API Gateway resource template, e.g. ``GET /backtests/{runId}``) to the
+sub-directory holding that route's ``index.py``. Route modules are imported on
+first use and kept for the life of the container, so rarely used endpoints ride
+on a container kept warm by the busy ones and every route shares the clients
+cached in ``clients.py``.
+"""
+import importlib.util
+import json
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict
+
+from utils import create_response
+
+ROUTES: Dict[str, str] = json.loads(os.environ.get('ROUTER_ROUTES', '{}'))
+FUNCTIONS_ROOT = os.environ.get('LAMBDA_TASK_ROOT') or os.getcwd()
+
+_lock = threading.Lock()
+_handlers: Dict[str, Callable[[Any, Any], Any]] = {}
+
+
+def _load_handler(function_dir: str) -> Callable[[Any, Any], Any]:
+    """Import ``<function_dir>/index.py`` under a unique module name and return its ``handler``."""
+    path = os.path.join(FUNCTIONS_ROOT, function_dir)
+    module_name = 'route_' + function_dir.replace('/', '_').replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(path, 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    # Route modules import their siblings (e.g. submit's sweep.py) as top-level names
+    sys.path.insert(0, path)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(path)
+    sys.modules[module_name] = module
+    return module.handler
+
+
+def _route_handler(function_dir: str) -> Callable[[Any, Any], Any]:
+    route_handler = _handlers.get(function_dir)
+    if route_handler is None:
+        with _lock:
+            route_handler = _handlers.get(function_dir)
+            if route_handler is None:
+                route_handler = _load_handler(function_dir)
+                _handlers[function_dir] = route_handler
+    return route_handler
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    route = f"{event.get('httpMethod')} {event.get('resource')}"
+    function_dir = ROUTES.get(route)
+    if function_dir is None:
+        return create_response(404, {'error': f'No route for {route}'})
+    return _route_handler(function_dir)(event, context)
@@ -0,0 +1,299 @@
+"""Inverted index over research notes and iterations, kept in its own DynamoDB table.
+
+Each (term, document) pair is one posting item keyed ``term`` / ``doc``, where
+``doc`` is ``<session_name>#<sk>`` of the note or iteration in the research
+table, so a term's postings are a single partition query and restricting a
+search to one session is a ``begins_with`` on the sort key. Postings carry the
+document's weighted term frequency and length; ``#STATS#<shard>`` items keep
+the document count and total length that BM25 needs, spread over
+STATS_SHARDS partitions so a burst of writes does not throttle on one key.
+Each document is counted once: its ``#DOC#`` marker is put, conditional on
+not existing, in the same transaction that adds it to its shard. Documents are indexed when
+they are written (add-note, record-iteration, batch-record-iterations), so the
+index grows incrementally and a search never touches the research table except
+to fetch the page of hits it returns.
+
+A search reads at most MAX_POSTINGS_PER_TERM postings per term. Across all
+sessions they come from ``tf-index`` highest term frequency first, so a
+common term keeps its strongest matches; ``search`` reports which terms were
+cut, and their document frequency (hence IDF) is then a lower bound.
+"""
+import concurrent.futures
+import math
+import re
+import time
+import zlib
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from utils import batch_get, projection
+
+STATS_TERM = '#STATS'
+STATS_SHARDS = 16
+TF_INDEX = 'tf-index'
+# Per-document marker: only documents whose marker is new are added to #STATS
+DOC_MARKER_PREFIX = '#DOC#'
+# TransactWriteItems takes 100 actions: one update per #STATS shard plus the markers
+MARKERS_PER_TRANSACTION = 100 - STATS_SHARDS
+MAX_TRANSACTION_ATTEMPTS = 5
+TRANSIENT_REASONS = frozenset(('TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded'))
+# Title matches count for more than body matches
+FIELD_WEIGHTS = {'title': 3, 'description': 1, 'content': 1}
+MAX_TERMS_PER_DOCUMENT = 256
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+# Postings read per query term; beyond this a term is too common to rank by
+MAX_POSTINGS_PER_TERM = 5000
+# BatchWriteItem takes 25 puts; a document batch's postings are written in parallel
+WRITE_BATCH = 25
+MAX_WRITE_WORKERS = 8
+MAX_READ_WORKERS = 8
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset((
+    'a an and are as at be but by for from has have in is it its of on or that the this to was were will with'
+).split())
+
+_TOKEN = re.compile(r'[a-z0-9_]+')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased alphanumeric terms of ``text``, without stopwords and one-character tokens."""
+    if not text:
+        return []
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in _TOKEN.findall(str(text).lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def document_terms(fields: Dict[str, Any]) -> Tuple[Dict[str, int], int]:
+    """Weighted term frequencies and the weighted length of a document's text fields."""
+    frequencies: Dict[str, int] = {}
+    length = 0
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(fields.get(field)):
+            frequencies[term] = frequencies.get(term, 0) + weight
+            length += weight
+    if len(frequencies) > MAX_TERMS_PER_DOCUMENT:
+        kept = sorted(frequencies, key=lambda t: (-frequencies[t], t))[:MAX_TERMS_PER_DOCUMENT]
+        frequencies = {term: frequencies[term] for term in kept}
+    return frequencies, length
+
+
+def document_id(session_name: str, sk: str) -> str:
+    return f'{session_name}#{sk}'
+
+
+def stats_key(shard: int) -> Dict[str, str]:
+    return {'term': f'{STATS_TERM}#{shard:02d}', 'doc': '#'}
+
+
+def stats_shard(doc: str) -> int:
+    """The #STATS shard a document is counted in (stable across processes, unlike hash())."""
+    return zlib.crc32(doc.encode()) % STATS_SHARDS
+
+
+def _backoff(attempt: int) -> None:
+    time.sleep(min(0.05 * 2 ** attempt, 1.0))
+
+
+def _count_new(client: Any, table_name: str, lengths: Dict[str, int]) -> None:
+    """Add documents to #STATS unless already counted, in transactions with their markers."""
+    pending = list(lengths.items())
+    for start in range(0, len(pending), MARKERS_PER_TRANSACTION):
+        chunk = pending[start:start + MARKERS_PER_TRANSACTION]
+        attempt = 0
+        while chunk:
+            shards: Dict[int, List[int]] = {}
+            for doc, length in chunk:
+                totals = shards.setdefault(stats_shard(doc), [0, 0])
+                totals[0] += 1
+                totals[1] += length
+            actions = [{
+                'Put': {
+                    'TableName': table_name,
+                    'Item': {'term': DOC_MARKER_PREFIX + doc, 'doc': '#', 'length': length},
+                    'ConditionExpression': 'attribute_not_exists(#term)',
+                    'ExpressionAttributeNames': {'#term': 'term'},
+                },
+            } for doc, length in chunk] + [{
+                'Update': {
+                    'TableName': table_name,
+                    'Key': stats_key(shard),
+                    'UpdateExpression': 'ADD documents :n, total_length :length',
+                    'ExpressionAttributeValues': {':n': n, ':length': length},
+                },
+            } for shard, (n, length) in shards.items()]
+            try:
+                client.transact_write_items(TransactItems=actions)
+                break
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+                reasons = [r.get('Code') for r in e.response.get('CancellationReasons', [])]
+                counted = {i for i, code in enumerate(reasons[:len(chunk)]) if code == 'ConditionalCheckFailed'}
+                transient = any(code in TRANSIENT_REASONS for code in reasons)
+                if not counted and not transient:
+                    raise
+                # Already counted (a re-index or retry): drop them and count the rest
+                chunk = [entry for i, entry in enumerate(chunk) if i not in counted]
+                if transient:
+                    attempt += 1
+                    if attempt >= MAX_TRANSACTION_ATTEMPTS:
+                        raise
+                    _backoff(attempt)
+
+
+def _put_all(client: Any, table_name: str, items: List[Dict[str, Any]]) -> None:
+    """BatchWriteItem ``items`` (at most 25), retrying UnprocessedItems with a short backoff."""
+    pending = {table_name: [{'PutRequest': {'Item': item}} for item in items]}
+    attempt = 0
+    while pending:
+        pending = client.batch_write_item(RequestItems=pending).get('UnprocessedItems') or {}
+        if pending:
+            attempt += 1
+            _backoff(attempt)
+
+
+def index_documents(table: Any, documents: Iterable[Dict[str, Any]]) -> int:
+    """Write postings for research items (notes or iterations); returns documents indexed.
+
+    Each document is the research item itself (``session_name``, ``sk`` and
+    its text fields). Postings go out as parallel BatchWriteItem calls, so a
+    large batch costs a few round trips rather than one per 25 postings.
+    Items are immutable once written, so re-indexing one only rewrites
+    identical postings, and its marker keeps it from being counted in
+    #STATS twice. Workers share the thread-safe low-level client, not the
+    ``table`` resource.
+    """
+    count = 0
+    lengths: Dict[str, int] = {}
+    postings: List[Dict[str, Any]] = []
+    for document in documents:
+        frequencies, length = document_terms(document)
+        doc = document_id(document['session_name'], document['sk'])
+        if not frequencies or doc in lengths:
+            continue
+        kind = 'note' if document['sk'].startswith('NOTE#') else 'iteration'
+        for term, frequency in frequencies.items():
+            postings.append({
+                'term': term,
+                'doc': doc,
+                'session_name': document['session_name'],
+                'sk': document['sk'],
+                'kind': kind,
+                'tf': frequency,
+                'length': length,
+            })
+        count += 1
+        lengths[doc] = length
+    if not lengths:
+        return 0
+
+    client = table.meta.client
+    chunks = [postings[i:i + WRITE_BATCH] for i in range(0, len(postings), WRITE_BATCH)]
+    if len(chunks) == 1:
+        _put_all(client, table.name, chunks[0])
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(chunks), MAX_WRITE_WORKERS)) as executor:
+            list(executor.map(lambda chunk: _put_all(client, table.name, chunk), chunks))
+    # Counted only once the postings are in, so a failed write leaves the
+    # document uncounted and a retry (or the backfill) counts it
+    _count_new(client, table.name, lengths)
+    return count
+
+
+def _postings(client: Any, table_name: str, term: str, session_name: Optional[str]) -> Tuple[List[Dict[str, Any]], bool]:
+    """Up to MAX_POSTINGS_PER_TERM postings of ``term`` and whether more were left unread."""
+    if session_name:
+        condition = Key('term').eq(term) & Key('doc').begins_with(f'{session_name}#')
+        kwargs = {'KeyConditionExpression': condition}
+    else:
+        kwargs = {'IndexName': TF_INDEX, 'KeyConditionExpression': Key('term').eq(term), 'ScanIndexForward': False}
+    kwargs.update(projection(('session_name', 'sk', 'kind', 'tf', 'length')))
+    items: List[Dict[str, Any]] = []
+    while len(items) < MAX_POSTINGS_PER_TERM:
+        response = client.query(TableName=table_name, Limit=MAX_POSTINGS_PER_TERM - len(items), **kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items, False
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items, True
+
+
+def _stats(client: Any, table_name: str) -> Tuple[int, int]:
+    """Document count and total length, summed over the #STATS shards."""
+    shards = batch_get(client, table_name, [stats_key(shard) for shard in range(STATS_SHARDS)])
+    return (
+        sum(int(item.get('documents', 0)) for item in shards),
+        sum(int(item.get('total_length', 0)) for item in shards),
+    )
+
+
+def search(
+    table: Any,
+    query: str,
+    session_name: Optional[str] = None,
+    kind: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Every document matching any query term, best BM25 score first, and the
+    query terms whose postings were cut at MAX_POSTINGS_PER_TERM.
+
+    Each hit is ``{'session_name', 'sk', 'kind', 'score', 'matched'}`` where
+    ``matched`` is the number of distinct query terms the document contains.
+    Term postings are read in parallel, one partition query per term, on
+    the thread-safe low-level client.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return [], []
+
+    client = table.meta.client
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(terms) + 1, MAX_READ_WORKERS)) as executor:
+        stats_future = executor.submit(_stats, client, table.name)
+        posting_futures = {term: executor.submit(_postings, client, table.name, term, session_name) for term in terms}
+        documents, total_length = stats_future.result()
+        postings = {}
+        truncated = []
+        for term, future in posting_futures.items():
+            postings[term], cut = future.result()
+            if cut:
+                truncated.append(term)
+
+    documents = max(documents, 1)
+    average_length = float(total_length) / documents or 1.0
+    hits: Dict[str, Dict[str, Any]] = {}
+    for term, items in postings.items():
+        if not items:
+            continue
+        frequency_of_docs = len(items)
+        idf = math.log(1 + (documents - frequency_of_docs + 0.5) / (frequency_of_docs + 0.5))
+        for item in items:
+            if kind and item.get('kind') != kind:
+                continue
+            tf = float(item.get('tf', 0))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * float(item.get('length', 0)) / average_length)
+            score = idf * tf * (BM25_K1 + 1) / (tf + norm)
+            key = document_id(item['session_name'], item['sk'])
+            hit = hits.get(key)
+            if hit is None:
+                hit = hits[key] = {
+                    'session_name': item['session_name'],
+                    'sk': item['sk'],
+                    'kind': item.get('kind'),
+                    'score': 0.0,
+                    'matched': 0,
+                }
+            hit['score'] += score
+            hit['matched'] += 1
+
+    ranked = sorted(hits.values(), key=lambda h: (-h['matched'], -h['score'], h['session_name'], h['sk']))
+    for hit in ranked:
+        hit['score'] = Decimal(str(round(hit['score'], 4)))
+    return ranked, truncated
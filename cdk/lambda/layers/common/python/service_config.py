@@ -0,0 +1,318 @@
+"""Item layout shared by the service-config functions.
+
+Each service's config lives in partition ``SERVICE#<service>``:
+
+- ``CURRENT`` holds the config, its ``version`` and who last changed it
+- ``VERSION`` holds only the version number, written in the same transaction
+  as every version change, so watchers can poll a tiny item instead of the
+  whole config
+- ``V#<version>`` records each version: a JSON patch from the version before
+  it, or a full ``snapshot`` every CONFIG_SNAPSHOT_INTERVAL versions (and
+  whenever the patch would be no smaller than the config). CURRENT's
+  ``snapshot_version`` names the latest snapshot
+- ``T#<updated_at>#<version>`` maps change times to versions for
+  point-in-time reads
+
+Every version change goes through ``write_version`` or ``apply_defaults``,
+which write CURRENT, VERSION and the history items in one transaction.
+
+Services send their built-in defaults when they fetch their config;
+``apply_defaults`` backfills keys the stored config lacks (stored values win)
+or creates the config from the defaults, so ``get`` and ``batch`` behave the
+same. A backfill is an update conditioned on the version it was computed
+from that SETs only the missing paths and bumps the version. When a fleet
+restarts with new defaults, one instance writes and the rest fail the
+condition, re-read, and find nothing left to add. A concurrent UI ``put``
+is never overwritten.
+"""
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import json_patch
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from utils import dumps
+
+CURRENT_SK = 'CURRENT'
+VERSION_SK = 'VERSION'
+HISTORY_PREFIX = 'V#'
+TIMELINE_PREFIX = 'T#'
+# Bounds how many patches a historical read replays
+SNAPSHOT_INTERVAL = int(os.environ.get('CONFIG_SNAPSHOT_INTERVAL', '20'))
+# Conflicting writers re-read and retry; past this the caller gets the latest stored config
+MAX_BACKFILL_ATTEMPTS = 3
+# DynamoDB's limit on an UpdateExpression; larger backfills SET the whole config
+MAX_UPDATE_EXPRESSION = 4096
+
+
+def service_pk(service: str) -> str:
+    return f'SERVICE#{service}'
+
+
+def version_item(pk: str, version: int) -> Dict[str, Any]:
+    return {'pk': pk, 'sk': VERSION_SK, 'version': version}
+
+
+def history_sk(version: int) -> str:
+    return f'{HISTORY_PREFIX}{int(version):010d}'
+
+
+def _timeline_sk(updated_at: str, version: int) -> str:
+    return f'{TIMELINE_PREFIX}{updated_at}#{int(version):010d}'
+
+
+def config_etag(item: Dict[str, Any]) -> str:
+    return f'"{item["version"]}"'
+
+
+def config_body(item: Dict[str, Any]) -> Dict[str, Any]:
+    """The public view of a CURRENT item."""
+    return {
+        'config': item['config'],
+        'version': item['version'],
+        'updated_at': item['updated_at'],
+        'updated_by': item['updated_by'],
+    }
+
+
+def deep_merge(defaults: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge two dicts recursively. overrides wins on conflict."""
+    result = dict(defaults)
+    for key, value in overrides.items():
+        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
+            result[key] = deep_merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def has_new_keys(defaults: Dict[str, Any], stored: Dict[str, Any]) -> bool:
+    for key, value in defaults.items():
+        if key not in stored:
+            return True
+        if isinstance(value, dict) and isinstance(stored[key], dict):
+            if has_new_keys(value, stored[key]):
+                return True
+    return False
+
+
+def missing_paths(
+    defaults: Dict[str, Any], stored: Dict[str, Any], prefix: Tuple[str, ...] = (),
+) -> List[Tuple[Tuple[str, ...], Any]]:
+    """Paths of ``defaults`` absent from ``stored``, each with its default value.
+
+    A missing key is reported once with its whole default subtree, so every
+    path's parent already exists in ``stored``.
+    """
+    paths = []
+    for key, value in defaults.items():
+        if key not in stored:
+            paths.append((prefix + (key,), value))
+        elif isinstance(value, dict) and isinstance(stored[key], dict):
+            paths.extend(missing_paths(value, stored[key], prefix + (key,)))
+    return paths
+
+
+def is_conflict(e: ClientError) -> bool:
+    """Whether a version-change transaction failed because CURRENT had moved on."""
+    if e.response['Error']['Code'] != 'TransactionCanceledException':
+        return False
+    reasons = e.response.get('CancellationReasons') or [{}]
+    return reasons[0].get('Code') == 'ConditionalCheckFailed'
+
+
+def history_items(
+    previous: Optional[Dict[str, Any]], item: Dict[str, Any], **attributes: Any,
+) -> List[Dict[str, Any]]:
+    """History items recording CURRENT ``item`` as the version after ``previous``.
+
+    Sets ``item['snapshot_version']``. ``attributes`` are stored on the
+    ``V#`` item (e.g. ``rollback_of``). A config with no history yet (created
+    before history was kept) starts with a snapshot.
+    """
+    entry = {
+        'pk': item['pk'],
+        'sk': history_sk(item['version']),
+        'version': item['version'],
+        'updated_at': item['updated_at'],
+        'updated_by': item['updated_by'],
+        **attributes,
+    }
+    patch = None
+    if previous and 'snapshot_version' in previous and item['version'] - previous['snapshot_version'] < SNAPSHOT_INTERVAL:
+        patch = json_patch.diff(previous['config'], item['config'])
+    if patch is None or len(dumps(patch)) >= len(dumps(item['config'])):
+        entry['snapshot'] = item['config']
+        item['snapshot_version'] = item['version']
+    else:
+        entry['patch'] = patch
+        item['snapshot_version'] = previous['snapshot_version']
+    timeline = {
+        'pk': item['pk'],
+        'sk': _timeline_sk(item['updated_at'], item['version']),
+        'version': item['version'],
+    }
+    return [entry, timeline]
+
+
+def write_version(
+    table: Any, previous: Optional[Dict[str, Any]], item: Dict[str, Any], **attributes: Any,
+) -> Dict[str, Any]:
+    """Replace CURRENT with ``item``, the version after ``previous`` (None to create).
+
+    Conditional on CURRENT still being ``previous``; raises the ClientError
+    (see ``is_conflict``) if it is not. ``attributes`` go on the history item.
+    """
+    history = history_items(previous, item, **attributes)
+    if previous is None:
+        condition: Dict[str, Any] = {'ConditionExpression': 'attribute_not_exists(pk)'}
+    else:
+        condition = {
+            'ConditionExpression': '#v = :expected',
+            'ExpressionAttributeNames': {'#v': 'version'},
+            'ExpressionAttributeValues': {':expected': previous['version']},
+        }
+    table.meta.client.transact_write_items(TransactItems=[
+        {'Put': {'TableName': table.name, 'Item': item, **condition}},
+        {'Put': {'TableName': table.name, 'Item': version_item(item['pk'], item['version'])}},
+        *({'Put': {'TableName': table.name, 'Item': entry}} for entry in history),
+    ])
+    return item
+
+
+def _backfill(
+    table: Any, stored: Dict[str, Any], item: Dict[str, Any], paths: list, attributes: Dict[str, Any],
+) -> None:
+    history = history_items(stored, item)
+    attributes = {**attributes, 'snapshot_version': item['snapshot_version']}
+    names = {'#c': 'config', '#v': 'version', '#u': 'updated_at', '#b': 'updated_by'}
+    values = {
+        ':expected': stored['version'],
+        ':version': item['version'],
+        ':now': item['updated_at'],
+        ':by': item['updated_by'],
+    }
+    sets = ['#v = :version', '#u = :now', '#b = :by']
+    for i, (name, value) in enumerate(attributes.items()):
+        names[f'#a{i}'] = name
+        values[f':a{i}'] = value
+        sets.append(f'#a{i} = :a{i}')
+
+    placeholders: Dict[str, str] = {}
+    config_sets = []
+    config_values = {}
+    for i, (path, value) in enumerate(paths):
+        parts = []
+        for key in path:
+            if key not in placeholders:
+                placeholders[key] = f'#k{len(placeholders)}'
+            parts.append(placeholders[key])
+        config_sets.append(f'#c.{".".join(parts)} = :p{i}')
+        config_values[f':p{i}'] = value
+    expression = 'SET ' + ', '.join(sets + config_sets)
+    if len(expression) <= MAX_UPDATE_EXPRESSION:
+        names.update({placeholder: key for key, placeholder in placeholders.items()})
+        values.update(config_values)
+    else:
+        expression = 'SET ' + ', '.join(sets + ['#c = :config'])
+        values[':config'] = item['config']
+
+    table.meta.client.transact_write_items(TransactItems=[
+        {'Update': {
+            'TableName': table.name,
+            'Key': {'pk': item['pk'], 'sk': CURRENT_SK},
+            'UpdateExpression': expression,
+            'ConditionExpression': '#v = :expected',
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': values,
+        }},
+        {'Put': {'TableName': table.name, 'Item': version_item(item['pk'], item['version'])}},
+        *({'Put': {'TableName': table.name, 'Item': entry}} for entry in history),
+    ])
+
+
+def apply_defaults(
+    table: Any,
+    pk: str,
+    stored: Optional[Dict[str, Any]],
+    defaults: Dict[str, Any],
+    **attributes: Any,
+) -> Optional[Dict[str, Any]]:
+    """Write ``defaults`` into a config and return the resulting CURRENT item.
+
+    Creates version 1 when nothing is stored and otherwise backfills the
+    missing paths as a new version. ``attributes`` are extra CURRENT
+    attributes to write, e.g. get's ``defaults_fingerprints``. If another
+    writer gets there first, the config is re-read and the defaults checked
+    against it. Returns the stored item unchanged when the defaults add
+    nothing.
+    """
+    for _ in range(MAX_BACKFILL_ATTEMPTS):
+        paths = missing_paths(defaults, stored['config']) if stored else None
+        if stored is not None and not paths:
+            return stored
+        item = {
+            **(stored or {}),
+            'pk': pk,
+            'sk': CURRENT_SK,
+            'config': deep_merge(defaults, stored['config']) if stored else defaults,
+            'version': stored['version'] + 1 if stored else 1,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            'updated_by': 'service',
+            **attributes,
+        }
+        try:
+            if stored:
+                _backfill(table, stored, item, paths, attributes)
+            else:
+                write_version(table, None, item)
+            return item
+        except ClientError as e:
+            if not is_conflict(e):
+                raise
+        stored = table.get_item(Key={'pk': pk, 'sk': CURRENT_SK}, ConsistentRead=True).get('Item')
+    return stored
+
+
+def config_at(table: Any, pk: str, version: int) -> Optional[Dict[str, Any]]:
+    """The history entry for ``version`` with its ``config`` rebuilt, or None.
+
+    Reads back from ``version`` to the nearest snapshot (one query page while
+    the snapshot interval is unchanged) and replays the patches after it.
+    None means the version was never written or predates history.
+    """
+    entries: List[Dict[str, Any]] = []
+    kwargs = {
+        'KeyConditionExpression': Key('pk').eq(pk) & Key('sk').between(history_sk(0), history_sk(version)),
+        'ScanIndexForward': False,
+        'Limit': SNAPSHOT_INTERVAL,
+    }
+    while True:
+        response = table.query(**kwargs)
+        for entry in response.get('Items', []):
+            if not entries and entry['version'] != version:
+                return None
+            entries.append(entry)
+            if 'snapshot' in entry:
+                config = entry.pop('snapshot')
+                for later in reversed(entries[:-1]):
+                    config = json_patch.apply(config, later['patch'])
+                latest = entries[0]
+                latest.pop('patch', None)
+                latest['config'] = config
+                return latest
+        if 'LastEvaluatedKey' not in response:
+            return None
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def version_at(table: Any, pk: str, timestamp: str) -> Optional[int]:
+    """The version that was current at ``timestamp`` (UTC ISO 8601, as stored), or None."""
+    items = table.query(
+        # '~' sorts after the '#<version>' suffix, so changes at exactly ``timestamp`` count
+        KeyConditionExpression=Key('pk').eq(pk) & Key('sk').between(TIMELINE_PREFIX, f'{TIMELINE_PREFIX}{timestamp}~'),
+        ScanIndexForward=False,
+        Limit=1,
+    ).get('Items', [])
+    return int(items[0]['version']) if items else None
@@ -1,16 +1,42 @@
+import base64
+import gzip
 import json
 import functools
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Optional
 from decimal import Decimal
 import datetime
+import time
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return int(obj) if obj == obj.to_integral_value() else float(obj)
-        if isinstance(obj, datetime.datetime):
-            return obj.isoformat()
-        return super().default(obj)
+import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; below a few KB the base64
+# overhead and compression time outweigh the transfer saved.
+COMPRESSION_MIN_BYTES = 8 * 1024
+GZIP_LEVEL = 6
+# Must match the REST API's binaryMediaTypes (backend-stack.ts). API Gateway
+# only decodes a base64 proxy response for requests whose Accept header
+# (its first media type) is one of these, so only those get compressed bodies.
+BINARY_MEDIA_TYPES = ('application/json',)
+
+def _json_default(obj: Any) -> Any:
+    """Convert the non-JSON types boto3 and handlers produce; called only for those values."""
+    if isinstance(obj, Decimal):
+        as_float = float(obj)
+        return as_float if not as_float.is_integer() else int(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """Serialize DynamoDB-shaped data (Decimal, datetime, set) to compact JSON in one pass."""
+    return json.dumps(obj, default=_json_default, sort_keys=sort_keys, separators=(',', ':'))
 
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
@@ -19,21 +45,184 @@ CORS_HEADERS = {
     'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
 }
 
-def create_response(status_code: int, body: Any) -> Dict[str, Any]:
-    """Create a standardized API response with CORS headers."""
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """Case-insensitive lookup of a request header from an API Gateway event."""
+    headers = event.get('headers') or {}
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def accepted_encoding(event: Dict[str, Any]) -> Optional[str]:
+    """The request's Accept-Encoding, or None when API Gateway would not decode a compressed body."""
+    accept = (get_header(event, 'accept') or '').split(',')[0].split(';')[0].strip().lower()
+    if accept not in BINARY_MEDIA_TYPES:
+        return None
+    return get_header(event, 'accept-encoding')
+
+def parse_body(event: Dict[str, Any], **loads_kwargs: Any) -> Any:
+    """Decode an API Gateway JSON body, undoing base64 when binary media types are enabled."""
+    body = event.get('body') or '{}'
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    return json.loads(body, **loads_kwargs)
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br (if the brotli module is installed) or gzip from an Accept-Encoding header."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    wildcard = accepted.get('*', 0.0)
+    for coding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+def _compress(payload: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(payload, quality=5)
+    return gzip.compress(payload, compresslevel=GZIP_LEVEL)
+
+def create_response(
+    status_code: int,
+    body: Any,
+    sort_keys: bool = False,
+    accept_encoding: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Create a standardized API response with CORS headers (plus any extra ``headers``).
+
+    When an Accept-Encoding is passed (see ``accepted_encoding``) and the body
+    is at least COMPRESSION_MIN_BYTES, the body is compressed and returned
+    base64-encoded for API Gateway to decode as a binary media type.
+    """
+    start = time.perf_counter()
+    payload = dumps(body, sort_keys=sort_keys)
+    metrics.add_timing('Serialization', (time.perf_counter() - start) * 1000)
+    encoding = None
+    if accept_encoding and len(payload) >= COMPRESSION_MIN_BYTES:
+        encoding = _negotiate_encoding(accept_encoding)
+    if not encoding:
+        return {
+            'statusCode': status_code,
+            'headers': {**CORS_HEADERS, **headers} if headers else CORS_HEADERS,
+            'body': payload
+        }
+    start = time.perf_counter()
+    compressed = base64.b64encode(_compress(payload.encode(), encoding)).decode()
+    metrics.add_timing('Compression', (time.perf_counter() - start) * 1000)
     return {
         'statusCode': status_code,
-        'headers': CORS_HEADERS,
-        'body': json.dumps(body, cls=DecimalEncoder, sort_keys=True)
+        'headers': {
+            **CORS_HEADERS,
+            'Content-Type': 'application/json',
+            'Content-Encoding': encoding,
+            'Vary': 'Accept-Encoding',
+            **(headers or {}),
+        },
+        'body': compressed,
+        'isBase64Encoded': True,
     }
 
+def not_modified_response(etag: str) -> Dict[str, Any]:
+    """Bodiless 304 for a conditional GET whose If-None-Match matched ``etag``."""
+    return {
+        'statusCode': 304,
+        'headers': {**CORS_HEADERS, 'ETag': etag},
+        'body': '',
+    }
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value (a list, possibly weak tags or ``*``) matches ``etag``."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
 def lambda_handler(func: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
     @functools.wraps(func)
     def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         try:
-            body = json.loads(event.get('body') or '{}')
+            body = parse_body(event)
             result = func(body)
-            return create_response(200, result)
+            return create_response(200, result, accept_encoding=accepted_encoding(event))
         except Exception as e:
             return create_response(400, {'error': str(e)})
-    return wrapper 
\ No newline at end of file
+    return wrapper 
+
+def query_all(table: Any, **kwargs: Any) -> list:
+    """Run a DynamoDB query, following LastEvaluatedKey until every page is read."""
+    items: list = []
+    while True:
+        response = table.query(**kwargs)
+        items.extend(response.get('Items', []))
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return items
+        kwargs['ExclusiveStartKey'] = last_key
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Turn a DynamoDB LastEvaluatedKey into an opaque, URL-safe pagination cursor."""
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(dumps(last_evaluated_key).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError('invalid cursor') from e
+    if not isinstance(key, dict):
+        raise ValueError('invalid cursor')
+    return key
+
+def query_page(table: Any, limit: int, cursor: Optional[str] = None, **kwargs: Any) -> tuple:
+    """Run one page of a DynamoDB query, returning (items, next_cursor)."""
+    start_key = decode_cursor(cursor)
+    if start_key:
+        kwargs['ExclusiveStartKey'] = start_key
+    response = table.query(Limit=limit, **kwargs)
+    return response.get('Items', []), encode_cursor(response.get('LastEvaluatedKey'))
+
+def projection(fields: Any) -> Dict[str, Any]:
+    """ProjectionExpression kwargs for a query, aliasing every name so reserved words are safe."""
+    names = {f'#p{i}': field for i, field in enumerate(fields)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names,
+    }
+
+def batch_get(dynamodb: Any, table_name: str, keys: list, **kwargs: Any) -> list:
+    """BatchGetItem for any number of keys against a DynamoDB service resource.
+
+    Keys are sent 100 at a time and UnprocessedKeys are retried with a short
+    backoff. Extra kwargs (e.g. ProjectionExpression) apply to the table's
+    request. Items come back in no particular order.
+    """
+    items: list = []
+    for start in range(0, len(keys), 100):
+        pending = {table_name: {'Keys': keys[start:start + 100], **kwargs}}
+        attempt = 0
+        while pending:
+            response = dynamodb.batch_get_item(RequestItems=pending)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+            pending = response.get('UnprocessedKeys') or {}
+            if pending:
+                attempt += 1
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+    return items
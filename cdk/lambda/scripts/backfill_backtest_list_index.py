@@ -0,0 +1,64 @@
+"""Backfill the backtest run listing index for runs submitted before it existed.
+
+Sets ``list_pk`` on every META item that lacks it, so the run appears in the
+sparse ``list-index`` the list handler pages through. The update is
+conditional on META still existing, so an expired run is not resurrected as
+a bare item. Safe to re-run.
+
+Usage: python scripts/backfill_backtest_list_index.py [--table gnome-backtests] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+RUN_LIST_PK = "RUN"
+
+
+def _unlisted_metas(table) -> list[dict]:
+    items = []
+    kwargs = {
+        "FilterExpression": Attr("sk").eq("META") & Attr("list_pk").not_exists(),
+        "ProjectionExpression": "run_id",
+    }
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default="gnome-backtests")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be written")
+    args = parser.parse_args()
+
+    table = boto3.resource("dynamodb").Table(args.table)
+    metas = _unlisted_metas(table)
+    listed = 0
+    if not args.dry_run:
+        for meta in metas:
+            try:
+                table.update_item(
+                    Key={"run_id": meta["run_id"], "sk": "META"},
+                    UpdateExpression="SET list_pk = :pk",
+                    ConditionExpression="attribute_exists(sk)",
+                    ExpressionAttributeValues={":pk": RUN_LIST_PK},
+                )
+                listed += 1
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+    if args.dry_run:
+        print(f"{len(metas)} runs to list")
+    else:
+        print(f"{len(metas)} unlisted runs, {listed} listed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Build the research search index from the notes and iterations already stored.
+
+Scans the research table for NOTE# and ITER# items, writes their postings to
+the search table, then resets each ``#STATS#<shard>`` item to the exact
+document count and total length of what was indexed and removes the
+pre-sharding ``#STATS`` item (run it once after deploying sharded stats).
+Postings are plain puts of derived data and each document is counted once,
+so re-running (e.g. after an indexing failure was logged) is safe.
+
+Usage: python scripts/backfill_search_index.py [--table gnome-research-sessions]
+       [--search-table gnome-research-search] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "layers", "common", "python"))
+
+from search_index import (  # noqa: E402
+    STATS_SHARDS,
+    STATS_TERM,
+    document_id,
+    document_terms,
+    index_documents,
+    stats_key,
+    stats_shard,
+)
+
+
+def _documents(table):
+    kwargs = {
+        "FilterExpression": Attr("sk").begins_with("NOTE#") | Attr("sk").begins_with("ITER#"),
+        "ProjectionExpression": "session_name, sk, title, description, content",
+    }
+    while True:
+        response = table.scan(**kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default="gnome-research-sessions")
+    parser.add_argument("--search-table", default="gnome-research-search")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be indexed")
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb")
+    search_table = dynamodb.Table(args.search_table)
+    documents = 0
+    shards = [[0, 0] for _ in range(STATS_SHARDS)]
+    batch = []
+    for item in _documents(dynamodb.Table(args.table)):
+        frequencies, length = document_terms(item)
+        if not frequencies:
+            continue
+        documents += 1
+        totals = shards[stats_shard(document_id(item["session_name"], item["sk"]))]
+        totals[0] += 1
+        totals[1] += length
+        batch.append(item)
+        if len(batch) >= 500:
+            if not args.dry_run:
+                index_documents(search_table, batch)
+            batch = []
+    if batch and not args.dry_run:
+        index_documents(search_table, batch)
+
+    if not args.dry_run:
+        with search_table.batch_writer() as writer:
+            for shard, (count, total_length) in enumerate(shards):
+                writer.put_item(Item={**stats_key(shard), "documents": count, "total_length": total_length})
+            writer.delete_item(Key={"term": STATS_TERM, "doc": "#"})
+    print(f"{documents} documents {'to index' if args.dry_run else 'indexed'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Backfill the research session listing index for sessions created before it existed.
+
+Sets ``list_pk``/``list_sk`` on every META item that lacks them (or moves
+``list_pk`` from the single pre-sharding ``SESSION`` partition to the
+session's ``SESSION#<n>`` shard) and writes the ``OWNER`` and ``TAG#<tag>``
+index items the session listing reads. META keys are set conditionally, so a
+concurrent writer's newer ``list_sk`` is never overwritten, and index items
+are plain puts of derived data. Safe to re-run.
+
+Usage: python scripts/backfill_session_indexes.py [--table gnome-research-sessions] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "layers", "common", "python"))
+
+from research import session_list_pk  # noqa: E402
+
+# list_pk every session shared before META was sharded
+LEGACY_LIST_PK = "SESSION"
+
+
+def _metas(table) -> list[dict]:
+    items = []
+    kwargs = {
+        "FilterExpression": Attr("sk").eq("META"),
+        "ProjectionExpression": "session_name, created_at, updated_at, #owner, tags, list_pk",
+        "ExpressionAttributeNames": {"#owner": "owner"},
+    }
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _index_items(meta: dict) -> list[dict]:
+    session_name = meta["session_name"]
+    list_sk = f"{meta.get('created_at', '')}#{session_name}"
+    items = [{
+        "session_name": session_name,
+        "sk": "OWNER",
+        "list_pk": f"OWNER#{meta.get('owner', 'unknown')}",
+        "list_sk": list_sk,
+    }]
+    for tag in dict.fromkeys(meta.get("tags") or []):
+        if isinstance(tag, str) and tag:
+            items.append({"session_name": session_name, "sk": f"TAG#{tag}", "list_pk": f"TAG#{tag}", "list_sk": list_sk})
+    return items
+
+
+def backfill_session(table, meta: dict, dry_run: bool) -> int:
+    """Index one session; returns the number of index items (re)written."""
+    items = _index_items(meta)
+    if dry_run:
+        return len(items)
+    if meta.get("list_pk", LEGACY_LIST_PK) == LEGACY_LIST_PK:
+        try:
+            table.update_item(
+                Key={"session_name": meta["session_name"], "sk": "META"},
+                UpdateExpression="SET list_pk = :pk, list_sk = if_not_exists(list_sk, :sk)",
+                ConditionExpression="attribute_exists(sk) AND (attribute_not_exists(list_pk) OR list_pk = :legacy)",
+                ExpressionAttributeValues={
+                    ":pk": session_list_pk(meta["session_name"]),
+                    ":sk": meta.get("updated_at", ""),
+                    ":legacy": LEGACY_LIST_PK,
+                },
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+    with table.batch_writer() as batch:
+        for item in items:
+            batch.put_item(Item=item)
+    return len(items)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default="gnome-research-sessions")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be written")
+    args = parser.parse_args()
+
+    table = boto3.resource("dynamodb").Table(args.table)
+    sessions = 0
+    written = 0
+    for meta in _metas(table):
+        written += backfill_session(table, meta, args.dry_run)
+        sessions += 1
+    print(f"{sessions} sessions, {written} index items {'to write' if args.dry_run else 'written'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Rewrite legacy research iteration sort keys to the fixed-width encoding.
+
+Iterations used to be stored under ``ITER#{n:03d}``, which stops sorting
+numerically past 999. They are now stored under ``ITER#{n:010d}``. For every
+session this copies each legacy row to its new key and then deletes the
+legacy row. If the new key is already taken by an identical row (an earlier
+run copied it) the legacy row is just deleted; if it holds a different
+iteration, both rows are kept and the conflict is reported for manual
+resolution. It also seeds ``last_iteration`` on META for sessions that
+predate server-side allocation. Safe to re-run.
+
+Usage: python scripts/migrate_iteration_keys.py [--table gnome-research-sessions] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+
+def _iteration_sk(iteration: int) -> str:
+    return f"ITER#{iteration:010d}"
+
+
+def _session_names(table) -> list[str]:
+    names = []
+    kwargs = {"FilterExpression": Attr("sk").eq("META"), "ProjectionExpression": "session_name"}
+    while True:
+        response = table.scan(**kwargs)
+        names.extend(item["session_name"] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return names
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _iterations(table, session_name: str) -> list[dict]:
+    items = []
+    kwargs = {"KeyConditionExpression": Key("session_name").eq(session_name) & Key("sk").begins_with("ITER#")}
+    while True:
+        response = table.query(**kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def migrate_session(table, session_name: str, dry_run: bool) -> tuple[int, int]:
+    """Returns (legacy rows migrated, legacy rows kept because their new key holds another row)."""
+    rows = _iterations(table, session_name)
+    legacy = [row for row in rows if row["sk"] != _iteration_sk(int(row["iteration"]))]
+    migrated = conflicts = 0
+    for row in legacy:
+        if dry_run:
+            migrated += 1
+            continue
+        item = {**row, "sk": _iteration_sk(int(row["iteration"]))}
+        try:
+            table.put_item(Item=item, ConditionExpression="attribute_not_exists(sk)")
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            existing = table.get_item(
+                Key={"session_name": session_name, "sk": item["sk"]}, ConsistentRead=True,
+            ).get("Item")
+            if existing != item:
+                print(f"{session_name}: kept {row['sk']}, {item['sk']} already holds a different iteration")
+                conflicts += 1
+                continue
+        table.delete_item(Key={"session_name": session_name, "sk": row["sk"]})
+        migrated += 1
+
+    highest = max((int(row["iteration"]) for row in rows), default=0)
+    if not dry_run:
+        try:
+            table.update_item(
+                Key={"session_name": session_name, "sk": "META"},
+                UpdateExpression="SET last_iteration = :last",
+                ConditionExpression="attribute_exists(sk) AND attribute_not_exists(last_iteration)",
+                ExpressionAttributeValues={":last": highest},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+    return migrated, conflicts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default="gnome-research-sessions")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be rewritten")
+    args = parser.parse_args()
+
+    table = boto3.resource("dynamodb").Table(args.table)
+    total = total_conflicts = 0
+    for session_name in _session_names(table):
+        migrated, conflicts = migrate_session(table, session_name, args.dry_run)
+        if migrated:
+            print(f"{session_name}: {migrated} legacy iteration keys{' (dry run)' if args.dry_run else ''}")
+        total += migrated
+        total_conflicts += conflicts
+    print(f"{total} iteration rows {'to migrate' if args.dry_run else 'migrated'}")
+    if total_conflicts:
+        print(f"{total_conflicts} legacy rows kept: their new key holds a different iteration")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Move oversized inline research attributes written before S3 offload existed.
+
+Scans the research table for META items with a large ``spec_yaml`` and ITER#
+items with large ``metrics``/``metadata``/``environment``, uploads those values
+to the research bucket (content-addressed, see the layer's ``blobs`` module)
+and rewrites the item with the pointer and inline digest. Each rewrite is
+conditional on the item's ``updated_at``/``timestamp`` being unchanged, so
+concurrent edits win. Safe to re-run.
+
+Usage: python scripts/offload_research_blobs.py --bucket gnome-research-<stage>
+       [--table gnome-research-sessions] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "layers", "common", "python"))
+
+import blobs  # noqa: E402
+from utils import dumps  # noqa: E402
+
+
+def _items(table):
+    kwargs = {"FilterExpression": Attr("sk").eq("META") | Attr("sk").begins_with("ITER#")}
+    while True:
+        response = table.scan(**kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default="gnome-research-sessions")
+    parser.add_argument("--bucket", required=True)
+    parser.add_argument("--dry-run", action="store_true", help="only count items that would be rewritten")
+    args = parser.parse_args()
+
+    blobs.BLOB_BUCKET = args.bucket
+    table = boto3.resource("dynamodb").Table(args.table)
+    rewritten = 0
+    for item in _items(table):
+        is_meta = item["sk"] == "META"
+        fields = blobs.META_FIELDS if is_meta else blobs.ITERATION_FIELDS
+        if not any(f in item and len(dumps(item[f]).encode()) > blobs.INLINE_LIMIT for f in fields):
+            continue
+        rewritten += 1
+        if args.dry_run:
+            continue
+        guard = "updated_at" if is_meta else "timestamp"
+        original = dict(item)
+        blobs.offload([item], fields)
+        try:
+            table.put_item(
+                Item=item,
+                ConditionExpression=Attr(guard).eq(original.get(guard)) if guard in original else Attr(guard).not_exists(),
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            rewritten -= 1
+    print(f"{rewritten} items {'to rewrite' if args.dry_run else 'rewritten'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,14 @@ export interface ControllerConfig {
   controllerIdentityProviderUrl: string;
   domainName: string;
   certificateArn: string;
+
+  // Serve each API area (backtests, research, service config) from a single
+  // router Lambda instead of one function per route
+  useRouterLambda: boolean;
 }
 
 const defaultConfig = {
+  useRouterLambda: false,
 }
 
 export const CONFIGS: { [stage in Stage]?:  ControllerConfig } = {
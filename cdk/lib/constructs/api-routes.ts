@@ -0,0 +1,142 @@
+import * as cdk from "aws-cdk-lib";
+import * as lambda from "aws-cdk-lib/aws-lambda";
+import * as apigateway from "aws-cdk-lib/aws-apigateway";
+import { Construct } from "constructs";
+import { PythonLambdaFunction } from "./python-lambda";
+
+/**
+ * A Lambda proxy integration whose request bodies always reach the handler
+ * as text: JSON bodies (a binary media type, see BackendStack) arrive
+ * base64-encoded with isBase64Encoded set, which utils.parse_body decodes.
+ */
+export function lambdaIntegration(fn: lambda.IFunction): apigateway.LambdaIntegration {
+  return new apigateway.LambdaIntegration(fn, { contentHandling: apigateway.ContentHandling.CONVERT_TO_TEXT });
+}
+
+export interface ApiRoute {
+  /** Construct id of the dedicated function (per-function mode). */
+  readonly id: string;
+  /** Sub-directory of the area's code path holding the route's index.py. */
+  readonly functionDir: string;
+  readonly functionName?: string;
+  readonly description?: string;
+  readonly memorySize?: number;
+  readonly timeout?: cdk.Duration;
+  readonly environment?: { [key: string]: string };
+  /**
+   * Cap on the route's concurrent executions. A capped route always gets its
+   * own function, even in router mode, so the cap applies to it alone.
+   */
+  readonly reservedConcurrentExecutions?: number;
+  readonly resource: apigateway.IResource;
+  readonly method: string;
+  readonly methodOptions?: apigateway.MethodOptions;
+  /** Grants the permissions the route's handler needs. */
+  readonly grant?: (fn: lambda.Function) => void;
+}
+
+export interface ApiRoutesProps {
+  /** Directory containing one sub-directory per route, e.g. "lambda/functions/research". */
+  readonly codePath: string;
+  /** Serve every route from one function running the common layer's router. */
+  readonly useRouter: boolean;
+  readonly routerFunctionName?: string;
+  readonly routerDescription?: string;
+  readonly routes: ApiRoute[];
+}
+
+/**
+ * API Gateway routes backed either by one Lambda per route or by a single
+ * router Lambda.
+ *
+ * In router mode the whole area directory is deployed as one function whose
+ * handler is `router.handler` (common layer). It receives the union of the
+ * routes' environment and permissions, the largest memory size and timeout,
+ * and a ROUTER_ROUTES map from "<METHOD> <resource path>" to the route's
+ * sub-directory. Rarely called endpoints then share a warm container with the
+ * busy ones instead of cold-starting on almost every call. Routes with
+ * reserved concurrency stay on their own functions.
+ *
+ * Usage:
+ * ```typescript
+ * const routes = new ApiRoutes(this, "ResearchRoutes", {
+ *   codePath: "lambda/functions/research",
+ *   useRouter: props.useRouterLambda,
+ *   routes: [
+ *     {
+ *       id: "ResearchAddNoteLambda",
+ *       functionDir: "add-note",
+ *       resource: notesResource,
+ *       method: "POST",
+ *       grant: (fn) => table.grantReadWriteData(fn),
+ *     },
+ *   ],
+ * });
+ * ```
+ */
+export class ApiRoutes extends Construct {
+  /** Every function created — one per route, or the router plus any capped routes. */
+  public readonly functions: lambda.Function[];
+
+  constructor(scope: Construct, id: string, props: ApiRoutesProps) {
+    super(scope, id);
+
+    const capped = (route: ApiRoute) => route.reservedConcurrentExecutions !== undefined;
+    const routed = props.useRouter ? props.routes.filter((route) => !capped(route)) : [];
+    const dedicated = props.useRouter ? props.routes.filter(capped) : props.routes;
+
+    this.functions = [];
+    if (routed.length > 0) {
+      const router = this.createRouter(scope, props, routed);
+      for (const route of routed) {
+        route.grant?.(router.function);
+        route.resource.addMethod(route.method, lambdaIntegration(router.function), route.methodOptions);
+      }
+      this.functions.push(router.function);
+    }
+
+    for (const route of dedicated) {
+      const fn = new PythonLambdaFunction(scope, route.id, {
+        codePath: `${props.codePath}/${route.functionDir}`,
+        functionName: route.functionName,
+        description: route.description,
+        memorySize: route.memorySize,
+        timeout: route.timeout,
+        environment: route.environment,
+        reservedConcurrentExecutions: route.reservedConcurrentExecutions,
+      });
+      route.grant?.(fn.function);
+      route.resource.addMethod(route.method, lambdaIntegration(fn.function), route.methodOptions);
+      this.functions.push(fn.function);
+    }
+  }
+
+  private createRouter(scope: Construct, props: ApiRoutesProps, routes: ApiRoute[]): PythonLambdaFunction {
+    const routeMap: { [route: string]: string } = {};
+    let environment: { [key: string]: string } = {};
+    let memorySize = 256;
+    let timeout = cdk.Duration.seconds(30);
+
+    for (const route of routes) {
+      routeMap[`${route.method} ${route.resource.path}`] = route.functionDir;
+      environment = { ...environment, ...route.environment };
+      memorySize = Math.max(memorySize, route.memorySize ?? 256);
+      if (route.timeout && route.timeout.toSeconds() > timeout.toSeconds()) {
+        timeout = route.timeout;
+      }
+    }
+
+    return new PythonLambdaFunction(scope, `${this.node.id}Router`, {
+      codePath: props.codePath,
+      handler: "router.handler",
+      functionName: props.routerFunctionName,
+      description: props.routerDescription,
+      memorySize,
+      timeout,
+      environment: {
+        ...environment,
+        ROUTER_ROUTES: JSON.stringify(routeMap),
+      },
+    });
+  }
+}
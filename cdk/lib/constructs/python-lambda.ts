@@ -7,11 +7,14 @@ const DEFAULT_RUNTIME = lambda.Runtime.PYTHON_3_13;
 
 export interface PythonLambdaFunctionProps {
   readonly codePath: string;
+  readonly handler?: string;
   readonly description?: string;
   readonly memorySize?: number;
   readonly timeout?: cdk.Duration;
   readonly environment?: { [key: string]: string };
   readonly functionName?: string;
+  /** Cap on concurrent executions, reserved out of the account's pool. */
+  readonly reservedConcurrentExecutions?: number;
 }
 
 /**
@@ -49,13 +52,14 @@ export class PythonLambdaFunction extends Construct {
     this.function = new lambda.Function(this, "Function", {
       functionName: props.functionName,
       runtime: DEFAULT_RUNTIME,
-      handler: "index.handler",
+      handler: props.handler ?? "index.handler",
       code: lambda.Code.fromAsset(props.codePath),
       layers: [layer],
       memorySize: props.memorySize ?? 256,
       timeout: props.timeout ?? cdk.Duration.seconds(30),
       description: props.description,
       environment: props.environment,
+      reservedConcurrentExecutions: props.reservedConcurrentExecutions,
     });
   }
 
@@ -29,21 +29,25 @@ class AppStage extends cdk.Stage {
       userPool: frontendStack.userPool,
     });
 
-    new BacktestStack(this, "ControllerBacktestStack", {
+    const backtestStack = new BacktestStack(this, "ControllerBacktestStack", {
       stage: config.account.stage,
       apiGateway: backendStack.apiGateway,
       cognitoAuthorizer: backendStack.cognitoAuthorizer,
+      useRouterLambda: config.useRouterLambda,
     });
 
     new ResearchStack(this, "ControllerResearchStack", {
       stage: config.account.stage,
       apiGateway: backendStack.apiGateway,
       cognitoAuthorizer: backendStack.cognitoAuthorizer,
+      researchBucket: backtestStack.researchBucket,
+      useRouterLambda: config.useRouterLambda,
     });
 
     new ServiceConfigStack(this, "ControllerServiceConfigStack", {
       apiGateway: backendStack.apiGateway,
       cognitoAuthorizer: backendStack.cognitoAuthorizer,
+      useRouterLambda: config.useRouterLambda,
     });
 
     new MonitoringStack(this, "ControllerMonitoringStack", {
@@ -4,6 +4,7 @@ import * as cognito from "aws-cdk-lib/aws-cognito";
 import { Construct } from "constructs";
 import { createProbeInvokePolicy, PROBE_LAMBDA_NAME } from "./latency-probe-stack";
 import { PythonLambdaFunction } from "../constructs/python-lambda";
+import { lambdaIntegration } from "../constructs/api-routes";
 
 
 interface BackendStackProps extends cdk.StackProps {
@@ -24,6 +25,12 @@ export class BackendStack extends cdk.Stack {
       deployOptions: {
         stageName: 'api',
       },
+      // Lambdas return large JSON payloads gzip/br-compressed as base64 bodies
+      // (see create_response in the common layer); API Gateway only decodes
+      // them for requests that Accept a binary media type. Only JSON is
+      // listed (utils.BINARY_MEDIA_TYPES must match): JSON request bodies
+      // arrive base64-encoded as a result, which utils.parse_body handles.
+      binaryMediaTypes: ['application/json'],
       defaultCorsPreflightOptions: {
         allowOrigins: apigateway.Cors.ALL_ORIGINS,
         allowMethods: apigateway.Cors.ALL_METHODS,
@@ -38,6 +45,17 @@ export class BackendStack extends cdk.Stack {
       },
     });
 
+    // The CORS preflights added by defaultCorsPreflightOptions are MOCK
+    // integrations, which fail on a body API Gateway considers binary; keep
+    // them on text. Resources added by other stacks live under this API too.
+    cdk.Aspects.of(this.apiGateway).add({
+      visit(node) {
+        if (node instanceof apigateway.CfnMethod && node.httpMethod === 'OPTIONS') {
+          node.addPropertyOverride('Integration.ContentHandling', 'CONVERT_TO_TEXT');
+        }
+      },
+    });
+
     this.cognitoAuthorizer = new apigateway.CognitoUserPoolsAuthorizer(this, "CognitoAuthorizer", {
       cognitoUserPools: [props.userPool],
       identitySource: 'method.request.header.Authorization',
@@ -61,7 +79,7 @@ export class BackendStack extends cdk.Stack {
     const runResource = latencyProbeResource.addResource("run");
     runResource.addMethod(
       "POST",
-      new apigateway.LambdaIntegration(latencyProbeOrchestrator.function),
+      lambdaIntegration(latencyProbeOrchestrator.function),
       {
         authorizationType: apigateway.AuthorizationType.COGNITO,
         authorizer: this.cognitoAuthorizer,
@@ -9,17 +9,25 @@ import * as apigateway from "aws-cdk-lib/aws-apigateway";
 import * as s3 from "aws-cdk-lib/aws-s3";
 import * as events from "aws-cdk-lib/aws-events";
 import * as targets from "aws-cdk-lib/aws-events-targets";
+import * as sqs from "aws-cdk-lib/aws-sqs";
+import * as destinations from "aws-cdk-lib/aws-lambda-destinations";
 import { Construct } from "constructs";
 import { Stage } from "@gnome-trading-group/gnome-shared-cdk";
 import { PythonLambdaFunction } from "../constructs/python-lambda";
+import { ApiRoutes } from "../constructs/api-routes";
 
 export interface BacktestStackProps extends cdk.StackProps {
   stage: Stage;
   apiGateway: apigateway.RestApi;
   cognitoAuthorizer: apigateway.CognitoUserPoolsAuthorizer;
+  /** Serve the API routes from one router Lambda instead of one function per route. */
+  useRouterLambda: boolean;
 }
 
 export class BacktestStack extends cdk.Stack {
+  /** Shared research results bucket; the research API keeps large session/iteration blobs under research/blobs/. */
+  public readonly researchBucket: s3.Bucket;
+
   constructor(scope: Construct, id: string, props: BacktestStackProps) {
     super(scope, id, props);
 
@@ -36,6 +44,7 @@ export class BacktestStack extends cdk.Stack {
       versioned: false,
       removalPolicy: cdk.RemovalPolicy.RETAIN,
     });
+    this.researchBucket = researchBucket;
 
     // ---------------------------------------------------------------------------
     // ECR repository
@@ -67,6 +76,15 @@ export class BacktestStack extends cdk.Stack {
       projectionType: dynamodb.ProjectionType.ALL,
     });
 
+    // Sparse run listing: only META rows carry list_pk ("RUN"). META is
+    // written a handful of times per run, so one partition is plenty.
+    table.addGlobalSecondaryIndex({
+      indexName: "list-index",
+      partitionKey: { name: "list_pk", type: dynamodb.AttributeType.STRING },
+      sortKey: { name: "submitted_at", type: dynamodb.AttributeType.STRING },
+      projectionType: dynamodb.ProjectionType.ALL,
+    });
+
     // ---------------------------------------------------------------------------
     // AWS Batch — Spot compute
     // ---------------------------------------------------------------------------
@@ -145,68 +163,9 @@ export class BacktestStack extends cdk.Stack {
       S3_BUCKET: researchBucket.bucketName,
     };
 
-    const submitLambda = new PythonLambdaFunction(this, "BacktestSubmitLambda", {
-      codePath: "lambda/functions/backtests/submit",
-      functionName: "gnome-backtest-submit",
-      description: "Submit a backtest run (or sweep) to AWS Batch",
-      timeout: cdk.Duration.seconds(60),
-      memorySize: 512,
-      environment: {
-        ...commonEnv,
-        BATCH_JOB_QUEUE: jobQueue.jobQueueArn,
-        BATCH_JOB_DEFINITION: jobDefinition.jobDefinitionArn,
-      },
-    });
-    table.grantWriteData(submitLambda.function);
-    submitLambda.function.addToRolePolicy(new iam.PolicyStatement({
-      actions: ["s3:PutObject"],
-      resources: [`${researchBucket.bucketArn}/backtests/*`],
-    }));
-    submitLambda.function.addToRolePolicy(new iam.PolicyStatement({
-      actions: ["batch:SubmitJob"],
-      resources: [jobQueue.jobQueueArn, jobDefinition.jobDefinitionArn],
-    }));
-
-    const getLambda = new PythonLambdaFunction(this, "BacktestGetLambda", {
-      codePath: "lambda/functions/backtests/get",
-      functionName: "gnome-backtest-get",
-      description: "Get backtest run details and job statuses",
-      timeout: cdk.Duration.seconds(30),
-      environment: {
-        ...commonEnv,
-      },
-    });
-    table.grantReadData(getLambda.function);
-    getLambda.function.addToRolePolicy(new iam.PolicyStatement({
-      actions: ["s3:GetObject"],
-      resources: [`${researchBucket.bucketArn}/backtests/*`],
-    }));
-
-    const listLambda = new PythonLambdaFunction(this, "BacktestListLambda", {
-      codePath: "lambda/functions/backtests/list",
-      functionName: "gnome-backtest-list",
-      description: "List backtest runs",
-      timeout: cdk.Duration.seconds(30),
-      environment: { ...commonEnv },
-    });
-    table.grantReadData(listLambda.function);
-
-    const cancelLambda = new PythonLambdaFunction(this, "BacktestCancelLambda", {
-      codePath: "lambda/functions/backtests/cancel",
-      functionName: "gnome-backtest-cancel",
-      description: "Cancel a backtest run",
-      timeout: cdk.Duration.seconds(30),
-      environment: { ...commonEnv },
-    });
-    table.grantReadWriteData(cancelLambda.function);
-    cancelLambda.function.addToRolePolicy(new iam.PolicyStatement({
-      actions: ["batch:TerminateJob"],
-      resources: ["*"],
-    }));
-
     const statusHandlerLambda = new PythonLambdaFunction(this, "BacktestStatusHandlerLambda", {
       codePath: "lambda/functions/backtests/status-handler",
-      description: "Handle Batch job state changes and update DynamoDB",
+      description: "Handle Batch job state changes, update DynamoDB and compact finished runs to S3",
       timeout: cdk.Duration.seconds(60),
       memorySize: 256,
       environment: {
@@ -215,8 +174,19 @@ export class BacktestStack extends cdk.Stack {
       },
     });
     table.grantReadWriteData(statusHandlerLambda.function);
+    // An event that beats submit's JOB row write fails the invoke and is
+    // redelivered by Lambda's async retries (~1 and ~3 minutes later); events
+    // that still fail are kept here for inspection and redrive.
+    const statusHandlerDlq = new sqs.Queue(this, "BacktestStatusHandlerDlq", {
+      retentionPeriod: cdk.Duration.days(14),
+    });
+    statusHandlerLambda.function.configureAsyncInvoke({
+      retryAttempts: 2,
+      maxEventAge: cdk.Duration.hours(1),
+      onFailure: new destinations.SqsDestination(statusHandlerDlq),
+    });
     statusHandlerLambda.function.addToRolePolicy(new iam.PolicyStatement({
-      actions: ["s3:GetObject"],
+      actions: ["s3:GetObject", "s3:PutObject"],
       resources: [`${researchBucket.bucketArn}/backtests/*`],
     }));
     statusHandlerLambda.function.addToRolePolicy(new iam.PolicyStatement({
@@ -249,12 +219,91 @@ export class BacktestStack extends cdk.Stack {
     };
 
     const backtestsResource = props.apiGateway.root.addResource("backtests");
-    backtestsResource.addMethod("GET", new apigateway.LambdaIntegration(listLambda.function), cognitoOpts);
-    backtestsResource.addMethod("POST", new apigateway.LambdaIntegration(submitLambda.function), cognitoOpts);
-
     const runResource = backtestsResource.addResource("{runId}");
-    runResource.addMethod("GET", new apigateway.LambdaIntegration(getLambda.function), cognitoOpts);
-    runResource.addMethod("DELETE", new apigateway.LambdaIntegration(cancelLambda.function), cognitoOpts);
+
+    new ApiRoutes(this, "BacktestApi", {
+      codePath: "lambda/functions/backtests",
+      useRouter: props.useRouterLambda,
+      routerFunctionName: "gnome-backtest-api",
+      routerDescription: "Backtest API routes (submit, get, list, cancel)",
+      routes: [
+        {
+          id: "BacktestSubmitLambda",
+          functionDir: "submit",
+          functionName: "gnome-backtest-submit",
+          description: "Submit a backtest run (or sweep) to AWS Batch",
+          timeout: cdk.Duration.seconds(60),
+          memorySize: 512,
+          environment: {
+            ...commonEnv,
+            BATCH_JOB_QUEUE: jobQueue.jobQueueArn,
+            BATCH_JOB_DEFINITION: jobDefinition.jobDefinitionArn,
+          },
+          resource: backtestsResource,
+          method: "POST",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantWriteData(fn);
+            fn.addToRolePolicy(new iam.PolicyStatement({
+              actions: ["s3:PutObject"],
+              resources: [`${researchBucket.bucketArn}/backtests/*`],
+            }));
+            fn.addToRolePolicy(new iam.PolicyStatement({
+              actions: ["batch:SubmitJob"],
+              resources: [jobQueue.jobQueueArn, jobDefinition.jobDefinitionArn],
+            }));
+          },
+        },
+        {
+          id: "BacktestGetLambda",
+          functionDir: "get",
+          functionName: "gnome-backtest-get",
+          description: "Get backtest run details and job statuses",
+          timeout: cdk.Duration.seconds(30),
+          environment: { ...commonEnv },
+          resource: runResource,
+          method: "GET",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantReadData(fn);
+            fn.addToRolePolicy(new iam.PolicyStatement({
+              actions: ["s3:GetObject"],
+              resources: [`${researchBucket.bucketArn}/backtests/*`],
+            }));
+          },
+        },
+        {
+          id: "BacktestListLambda",
+          functionDir: "list",
+          functionName: "gnome-backtest-list",
+          description: "List backtest runs",
+          timeout: cdk.Duration.seconds(30),
+          environment: { ...commonEnv },
+          resource: backtestsResource,
+          method: "GET",
+          methodOptions: cognitoOpts,
+          grant: (fn) => table.grantReadData(fn),
+        },
+        {
+          id: "BacktestCancelLambda",
+          functionDir: "cancel",
+          functionName: "gnome-backtest-cancel",
+          description: "Cancel a backtest run",
+          timeout: cdk.Duration.seconds(30),
+          environment: { ...commonEnv },
+          resource: runResource,
+          method: "DELETE",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantReadWriteData(fn);
+            fn.addToRolePolicy(new iam.PolicyStatement({
+              actions: ["batch:TerminateJob"],
+              resources: ["*"],
+            }));
+          },
+        },
+      ],
+    });
 
     // ---------------------------------------------------------------------------
     // GitHub Actions OIDC — allows CI to push images to ECR without long-lived keys
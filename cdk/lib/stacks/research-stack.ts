@@ -1,14 +1,19 @@
 import * as cdk from "aws-cdk-lib";
 import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
 import * as apigateway from "aws-cdk-lib/aws-apigateway";
+import * as s3 from "aws-cdk-lib/aws-s3";
 import { Construct } from "constructs";
 import { Stage } from "@gnome-trading-group/gnome-shared-cdk";
-import { PythonLambdaFunction } from "../constructs/python-lambda";
+import { ApiRoutes } from "../constructs/api-routes";
 
 export interface ResearchStackProps extends cdk.StackProps {
   stage: Stage;
   apiGateway: apigateway.RestApi;
   cognitoAuthorizer: apigateway.CognitoUserPoolsAuthorizer;
+  /** Bucket for spec/metrics/metadata/environment blobs too large to keep inline. */
+  researchBucket: s3.IBucket;
+  /** Serve the API routes from one router Lambda instead of one function per route. */
+  useRouterLambda: boolean;
 }
 
 export class ResearchStack extends cdk.Stack {
@@ -16,7 +21,8 @@ export class ResearchStack extends cdk.Stack {
     super(scope, id, props);
 
     // ---------------------------------------------------------------------------
-    // DynamoDB — research sessions (single-table: META, ITER#NNN, NOTE#<ts>)
+    // DynamoDB — research sessions (single-table: META, ITER#<10-digit n>, NOTE#<ts>,
+    // plus OWNER and TAG#<tag> listing index items)
     // ---------------------------------------------------------------------------
 
     const table = new dynamodb.Table(this, "ResearchSessionsTable", {
@@ -34,70 +40,50 @@ export class ResearchStack extends cdk.Stack {
       projectionType: dynamodb.ProjectionType.ALL,
     });
 
-    // ---------------------------------------------------------------------------
-    // Lambda functions
-    // ---------------------------------------------------------------------------
-
-    const commonEnv = { DYNAMODB_TABLE: table.tableName };
-
-    const createSessionLambda = new PythonLambdaFunction(this, "ResearchCreateSessionLambda", {
-      codePath: "lambda/functions/research/create-session",
-      functionName: "gnome-research-create-session",
-      description: "Create a new research session",
-      timeout: cdk.Duration.seconds(30),
-      environment: commonEnv,
-    });
-    table.grantWriteData(createSessionLambda.function);
-
-    const listSessionsLambda = new PythonLambdaFunction(this, "ResearchListSessionsLambda", {
-      codePath: "lambda/functions/research/list-sessions",
-      functionName: "gnome-research-list-sessions",
-      description: "List research sessions",
-      timeout: cdk.Duration.seconds(30),
-      environment: commonEnv,
-    });
-    table.grantReadData(listSessionsLambda.function);
-
-    const getSessionLambda = new PythonLambdaFunction(this, "ResearchGetSessionLambda", {
-      codePath: "lambda/functions/research/get-session",
-      functionName: "gnome-research-get-session",
-      description: "Get a research session with all iterations and notes",
-      timeout: cdk.Duration.seconds(30),
-      environment: commonEnv,
-    });
-    table.grantReadData(getSessionLambda.function);
-
-    const updateSessionLambda = new PythonLambdaFunction(this, "ResearchUpdateSessionLambda", {
-      codePath: "lambda/functions/research/update-session",
-      functionName: "gnome-research-update-session",
-      description: "Update research session metadata",
-      timeout: cdk.Duration.seconds(30),
-      environment: commonEnv,
+    // Session listings: META (list_pk "SESSION#<shard>", list_sk updated_at) and the
+    // OWNER / TAG#<tag> index items (list_pk "OWNER#<owner>" / "TAG#<tag>",
+    // list_sk "<created_at>#<session>"). One overloaded index because
+    // CloudFormation can only add one GSI per table update.
+    table.addGlobalSecondaryIndex({
+      indexName: "list-index",
+      partitionKey: { name: "list_pk", type: dynamodb.AttributeType.STRING },
+      sortKey: { name: "list_sk", type: dynamodb.AttributeType.STRING },
+      projectionType: dynamodb.ProjectionType.ALL,
     });
-    table.grantReadWriteData(updateSessionLambda.function);
 
-    const recordIterationLambda = new PythonLambdaFunction(this, "ResearchRecordIterationLambda", {
-      codePath: "lambda/functions/research/record-iteration",
-      functionName: "gnome-research-record-iteration",
-      description: "Record a research iteration result",
-      timeout: cdk.Duration.seconds(30),
-      environment: commonEnv,
+    // Full-text search postings: one item per (term, "<session_name>#<sk>") for
+    // note content and iteration title/description, a "#DOC#<doc>" marker per
+    // indexed document, counted with it in one transaction, and "#STATS#<nn>"
+    // document-count shards.
+    const searchTable = new dynamodb.Table(this, "ResearchSearchTable", {
+      tableName: "gnome-research-search",
+      partitionKey: { name: "term", type: dynamodb.AttributeType.STRING },
+      sortKey: { name: "doc", type: dynamodb.AttributeType.STRING },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      removalPolicy: cdk.RemovalPolicy.RETAIN,
     });
-    table.grantReadWriteData(recordIterationLambda.function);
 
-    const addNoteLambda = new PythonLambdaFunction(this, "ResearchAddNoteLambda", {
-      codePath: "lambda/functions/research/add-note",
-      functionName: "gnome-research-add-note",
-      description: "Add a research note to a session",
-      timeout: cdk.Duration.seconds(30),
-      environment: commonEnv,
+    // A term's postings by descending term frequency, so a search that can only
+    // read the first MAX_POSTINGS_PER_TERM of a common term reads the strongest
+    searchTable.addGlobalSecondaryIndex({
+      indexName: "tf-index",
+      partitionKey: { name: "term", type: dynamodb.AttributeType.STRING },
+      sortKey: { name: "tf", type: dynamodb.AttributeType.NUMBER },
+      projectionType: dynamodb.ProjectionType.INCLUDE,
+      nonKeyAttributes: ["session_name", "sk", "kind", "length"],
     });
-    table.grantReadWriteData(addNoteLambda.function);
 
     // ---------------------------------------------------------------------------
     // API Gateway routes — Cognito auth (shared authorizer from BackendStack)
     // ---------------------------------------------------------------------------
 
+    const commonEnv = {
+      DYNAMODB_TABLE: table.tableName,
+      SEARCH_TABLE: searchTable.tableName,
+      BLOB_BUCKET: props.researchBucket.bucketName,
+    };
+    const blobPrefix = "research/blobs/*";
+
     const cognitoOpts: apigateway.MethodOptions = {
       authorizationType: apigateway.AuthorizationType.COGNITO,
       authorizer: props.cognitoAuthorizer,
@@ -105,17 +91,181 @@ export class ResearchStack extends cdk.Stack {
 
     const researchResource = props.apiGateway.root.addResource("research");
     const sessionsResource = researchResource.addResource("sessions");
-    sessionsResource.addMethod("GET", new apigateway.LambdaIntegration(listSessionsLambda.function), cognitoOpts);
-    sessionsResource.addMethod("POST", new apigateway.LambdaIntegration(createSessionLambda.function), cognitoOpts);
-
     const sessionResource = sessionsResource.addResource("{sessionName}");
-    sessionResource.addMethod("GET", new apigateway.LambdaIntegration(getSessionLambda.function), cognitoOpts);
-    sessionResource.addMethod("PATCH", new apigateway.LambdaIntegration(updateSessionLambda.function), cognitoOpts);
-
     const iterationsResource = sessionResource.addResource("iterations");
-    iterationsResource.addMethod("POST", new apigateway.LambdaIntegration(recordIterationLambda.function), cognitoOpts);
-
+    const iterationsBatchResource = iterationsResource.addResource("batch");
     const notesResource = sessionResource.addResource("notes");
-    notesResource.addMethod("POST", new apigateway.LambdaIntegration(addNoteLambda.function), cognitoOpts);
+    const seriesResource = sessionResource.addResource("series");
+    const searchResource = researchResource.addResource("search");
+
+    new ApiRoutes(this, "ResearchApi", {
+      codePath: "lambda/functions/research",
+      useRouter: props.useRouterLambda,
+      routerFunctionName: "gnome-research-api",
+      routerDescription: "Research session API routes",
+      routes: [
+        {
+          id: "ResearchCreateSessionLambda",
+          functionDir: "create-session",
+          functionName: "gnome-research-create-session",
+          description: "Create a new research session",
+          timeout: cdk.Duration.seconds(30),
+          environment: commonEnv,
+          resource: sessionsResource,
+          method: "POST",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantWriteData(fn);
+            props.researchBucket.grantPut(fn, blobPrefix);
+          },
+        },
+        {
+          id: "ResearchListSessionsLambda",
+          functionDir: "list-sessions",
+          functionName: "gnome-research-list-sessions",
+          description: "List research sessions",
+          timeout: cdk.Duration.seconds(30),
+          environment: commonEnv,
+          resource: sessionsResource,
+          method: "GET",
+          methodOptions: cognitoOpts,
+          grant: (fn) => table.grantReadData(fn),
+        },
+        {
+          id: "ResearchGetSessionLambda",
+          functionDir: "get-session",
+          functionName: "gnome-research-get-session",
+          description: "Get a research session with its latest iterations and notes",
+          timeout: cdk.Duration.seconds(30),
+          environment: commonEnv,
+          resource: sessionResource,
+          method: "GET",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantReadData(fn);
+            props.researchBucket.grantRead(fn, blobPrefix);
+          },
+        },
+        {
+          id: "ResearchUpdateSessionLambda",
+          functionDir: "update-session",
+          functionName: "gnome-research-update-session",
+          description: "Update research session metadata",
+          timeout: cdk.Duration.seconds(30),
+          environment: commonEnv,
+          resource: sessionResource,
+          method: "PATCH",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantReadWriteData(fn);
+            props.researchBucket.grantPut(fn, blobPrefix);
+          },
+        },
+        {
+          id: "ResearchRecordIterationLambda",
+          functionDir: "record-iteration",
+          functionName: "gnome-research-record-iteration",
+          description: "Record a research iteration result",
+          timeout: cdk.Duration.seconds(30),
+          environment: commonEnv,
+          resource: iterationsResource,
+          method: "POST",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantReadWriteData(fn);
+            searchTable.grantReadWriteData(fn);
+            props.researchBucket.grantPut(fn, blobPrefix);
+          },
+        },
+        {
+          id: "ResearchBatchRecordIterationsLambda",
+          functionDir: "batch-record-iterations",
+          functionName: "gnome-research-batch-record-iterations",
+          description: "Record many research iterations in one request",
+          timeout: cdk.Duration.seconds(60),
+          memorySize: 512,
+          environment: commonEnv,
+          resource: iterationsBatchResource,
+          method: "POST",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantReadWriteData(fn);
+            searchTable.grantReadWriteData(fn);
+            props.researchBucket.grantPut(fn, blobPrefix);
+          },
+        },
+        {
+          id: "ResearchListIterationsLambda",
+          functionDir: "list-iterations",
+          functionName: "gnome-research-list-iterations",
+          description: "Page through a research session's iterations",
+          timeout: cdk.Duration.seconds(30),
+          environment: commonEnv,
+          resource: iterationsResource,
+          method: "GET",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantReadData(fn);
+            props.researchBucket.grantRead(fn, blobPrefix);
+          },
+        },
+        {
+          id: "ResearchListNotesLambda",
+          functionDir: "list-notes",
+          functionName: "gnome-research-list-notes",
+          description: "Page through a research session's notes",
+          timeout: cdk.Duration.seconds(30),
+          environment: commonEnv,
+          resource: notesResource,
+          method: "GET",
+          methodOptions: cognitoOpts,
+          grant: (fn) => table.grantReadData(fn),
+        },
+        {
+          id: "ResearchGetSeriesLambda",
+          functionDir: "get-series",
+          functionName: "gnome-research-get-series",
+          description: "Downsampled metric time series for a research session",
+          timeout: cdk.Duration.seconds(30),
+          memorySize: 512,
+          environment: commonEnv,
+          resource: seriesResource,
+          method: "GET",
+          methodOptions: cognitoOpts,
+          grant: (fn) => table.grantReadData(fn),
+        },
+        {
+          id: "ResearchAddNoteLambda",
+          functionDir: "add-note",
+          functionName: "gnome-research-add-note",
+          description: "Add a research note to a session",
+          timeout: cdk.Duration.seconds(30),
+          environment: commonEnv,
+          resource: notesResource,
+          method: "POST",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantReadWriteData(fn);
+            searchTable.grantReadWriteData(fn);
+          },
+        },
+        {
+          id: "ResearchSearchLambda",
+          functionDir: "search",
+          functionName: "gnome-research-search",
+          description: "Full-text search over research notes and iterations",
+          timeout: cdk.Duration.seconds(30),
+          memorySize: 512,
+          environment: commonEnv,
+          resource: searchResource,
+          method: "GET",
+          methodOptions: cognitoOpts,
+          grant: (fn) => {
+            table.grantReadData(fn);
+            searchTable.grantReadData(fn);
+          },
+        },
+      ],
+    });
   }
 }
@@ -2,11 +2,16 @@ import * as cdk from "aws-cdk-lib";
 import * as apigateway from "aws-cdk-lib/aws-apigateway";
 import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
 import { Construct } from "constructs";
-import { PythonLambdaFunction } from "../constructs/python-lambda";
+import { ApiRoutes } from "../constructs/api-routes";
+
+/** Concurrent long-polls the watch endpoint serves; see service-config/watch. */
+const WATCH_CONCURRENCY = 20;
 
 export interface ServiceConfigStackProps extends cdk.StackProps {
   apiGateway: apigateway.RestApi;
   cognitoAuthorizer: apigateway.CognitoUserPoolsAuthorizer;
+  /** Serve the API routes from one router Lambda instead of one function per route. */
+  useRouterLambda: boolean;
 }
 
 export class ServiceConfigStack extends cdk.Stack {
@@ -23,40 +28,123 @@ export class ServiceConfigStack extends cdk.Stack {
 
     const commonEnv = { DYNAMODB_TABLE: serviceConfigTable.tableName };
 
-    const getLambda = new PythonLambdaFunction(this, "ServiceConfigGetLambda", {
-      codePath: "lambda/functions/service-config/get",
-      functionName: "gnome-service-config-get",
-      description: "Get service config, merging with defaults if provided",
-      timeout: cdk.Duration.seconds(10),
-      environment: commonEnv,
-    });
-    serviceConfigTable.grantReadWriteData(getLambda.function);
-
-    const putLambda = new PythonLambdaFunction(this, "ServiceConfigPutLambda", {
-      codePath: "lambda/functions/service-config/put",
-      functionName: "gnome-service-config-put",
-      description: "Update service config (Cognito auth, UI only)",
-      timeout: cdk.Duration.seconds(10),
-      environment: commonEnv,
-    });
-    serviceConfigTable.grantWriteData(putLambda.function);
-
     const configResource = props.apiGateway.root.addResource("config");
     const serviceResource = configResource.addResource("{service}");
+    const watchResource = serviceResource.addResource("watch");
+    const historyResource = serviceResource.addResource("history");
+    const diffResource = serviceResource.addResource("diff");
+    const rollbackResource = serviceResource.addResource("rollback");
 
-    serviceResource.addMethod(
-      "GET",
-      new apigateway.LambdaIntegration(getLambda.function),
-      { apiKeyRequired: true },
-    );
-
-    serviceResource.addMethod(
-      "PUT",
-      new apigateway.LambdaIntegration(putLambda.function),
-      {
-        authorizationType: apigateway.AuthorizationType.COGNITO,
-        authorizer: props.cognitoAuthorizer,
-      },
-    );
+    new ApiRoutes(this, "ServiceConfigApi", {
+      codePath: "lambda/functions/service-config",
+      useRouter: props.useRouterLambda,
+      routerFunctionName: "gnome-service-config-api",
+      routerDescription: "Service config API routes (get, put, batch, history, diff, rollback)",
+      routes: [
+        {
+          id: "ServiceConfigGetLambda",
+          functionDir: "get",
+          functionName: "gnome-service-config-get",
+          description: "Get service config, merging with defaults if provided",
+          timeout: cdk.Duration.seconds(10),
+          // How stale a container may serve CURRENT after a UI edit
+          environment: { ...commonEnv, CONFIG_CACHE_TTL_SECONDS: "5" },
+          resource: serviceResource,
+          method: "GET",
+          methodOptions: { apiKeyRequired: true },
+          grant: (fn) => serviceConfigTable.grantReadWriteData(fn),
+        },
+        {
+          id: "ServiceConfigPutLambda",
+          functionDir: "put",
+          functionName: "gnome-service-config-put",
+          description: "Update service config (Cognito auth, UI only)",
+          timeout: cdk.Duration.seconds(10),
+          environment: commonEnv,
+          resource: serviceResource,
+          method: "PUT",
+          methodOptions: {
+            authorizationType: apigateway.AuthorizationType.COGNITO,
+            authorizer: props.cognitoAuthorizer,
+          },
+          // Reads CURRENT to record the change as a patch against it
+          grant: (fn) => serviceConfigTable.grantReadWriteData(fn),
+        },
+        {
+          id: "ServiceConfigWatchLambda",
+          functionDir: "watch",
+          functionName: "gnome-service-config-watch",
+          description: "Long-poll until a service config is newer than a given version",
+          // Requests hold for up to 25s (API Gateway's limit is 29s)
+          timeout: cdk.Duration.seconds(28),
+          // Each open watch holds an execution, so cap them rather than let a
+          // fleet of watching clients starve every other Lambda in the account;
+          // watches beyond the cap are throttled and ConfigClient backs off
+          reservedConcurrentExecutions: WATCH_CONCURRENCY,
+          environment: { ...commonEnv, WATCH_POLL_SECONDS: "1" },
+          resource: watchResource,
+          method: "GET",
+          methodOptions: { apiKeyRequired: true },
+          grant: (fn) => serviceConfigTable.grantReadData(fn),
+        },
+        {
+          id: "ServiceConfigBatchLambda",
+          functionDir: "batch",
+          functionName: "gnome-service-config-batch",
+          description: "Get several service configs in one request, merging with defaults if provided",
+          timeout: cdk.Duration.seconds(10),
+          environment: commonEnv,
+          resource: configResource,
+          method: "POST",
+          methodOptions: { apiKeyRequired: true },
+          grant: (fn) => serviceConfigTable.grantReadWriteData(fn),
+        },
+        {
+          id: "ServiceConfigHistoryLambda",
+          functionDir: "history",
+          functionName: "gnome-service-config-history",
+          description: "List service config versions or read one as of a version or time",
+          timeout: cdk.Duration.seconds(10),
+          environment: commonEnv,
+          resource: historyResource,
+          method: "GET",
+          methodOptions: {
+            authorizationType: apigateway.AuthorizationType.COGNITO,
+            authorizer: props.cognitoAuthorizer,
+          },
+          grant: (fn) => serviceConfigTable.grantReadData(fn),
+        },
+        {
+          id: "ServiceConfigDiffLambda",
+          functionDir: "diff",
+          functionName: "gnome-service-config-diff",
+          description: "Diff two versions of a service config",
+          timeout: cdk.Duration.seconds(10),
+          environment: commonEnv,
+          resource: diffResource,
+          method: "GET",
+          methodOptions: {
+            authorizationType: apigateway.AuthorizationType.COGNITO,
+            authorizer: props.cognitoAuthorizer,
+          },
+          grant: (fn) => serviceConfigTable.grantReadData(fn),
+        },
+        {
+          id: "ServiceConfigRollbackLambda",
+          functionDir: "rollback",
+          functionName: "gnome-service-config-rollback",
+          description: "Roll a service config back to an earlier version (Cognito auth, UI only)",
+          timeout: cdk.Duration.seconds(10),
+          environment: commonEnv,
+          resource: rollbackResource,
+          method: "POST",
+          methodOptions: {
+            authorizationType: apigateway.AuthorizationType.COGNITO,
+            authorizer: props.cognitoAuthorizer,
+          },
+          grant: (fn) => serviceConfigTable.grantReadWriteData(fn),
+        },
+      ],
+    });
   }
 }
@@ -22,13 +22,36 @@ import {
 } from '@mantine/core';
 import { IconPlus, IconTrash, IconPlayerPlay, IconChevronDown, IconChevronRight } from '@tabler/icons-react';
 import { controllerApi } from '../../utils/api';
-import { AWS_REGIONS, LatencyProbeResponse } from '../../types';
+import { AWS_REGIONS, LatencyProbeResponse, ProbeMode, RegionResult } from '../../types';
 
 interface Target {
   id: string;
   url: string;
   protocol: 'http' | 'websocket' | 'tcp';
   method: string;
+  mode: ProbeMode;
+  message: string;
+  rate: number;
+}
+
+function phaseSummary(region: RegionResult): string | null {
+  const fmt = (label: string, ms?: number) => (ms === undefined ? null : `${label} ${ms.toFixed(1)} ms`);
+  if (region.phases) {
+    const p = region.phases;
+    return ['p50:', fmt('DNS', p.dns?.p50), fmt('connect', p.connect?.p50), fmt('TLS', p.tls?.p50), fmt('TTFB', p.ttfb?.p50)]
+      .filter(Boolean)
+      .join(' ');
+  }
+  if (region.connection) {
+    const c = region.connection;
+    const parts = ['setup:', fmt('DNS', c.dns), fmt('connect', c.connect), fmt('TLS', c.tls)].filter(Boolean).join(' ');
+    return region.reconnects ? `${parts} (${region.reconnects} reconnects)` : parts;
+  }
+  if (region.handshake !== undefined) {
+    const handshake = fmt('handshake', region.handshake);
+    return region.lost ? `${handshake} (${region.lost}/${region.sent} lost)` : handshake;
+  }
+  return null;
 }
 
 const DEFAULT_REGIONS = [
@@ -42,7 +65,7 @@ const DEFAULT_REGIONS = [
 
 function LatencyProbe() {
   const [targets, setTargets] = useState<Target[]>([
-    { id: '1', url: '', protocol: 'http', method: 'GET' },
+    { id: '1', url: '', protocol: 'http', method: 'GET', mode: 'simple', message: '', rate: 10 },
   ]);
   const [selectedRegions, setSelectedRegions] = useState<string[]>(DEFAULT_REGIONS);
   const [samples, setSamples] = useState<number>(5);
@@ -56,7 +79,7 @@ function LatencyProbe() {
   const addTarget = () => {
     setTargets([
       ...targets,
-      { id: Date.now().toString(), url: '', protocol: 'http', method: 'GET' },
+      { id: Date.now().toString(), url: '', protocol: 'http', method: 'GET', mode: 'simple', message: '', rate: 10 },
     ]);
   };
 
@@ -66,9 +89,13 @@ function LatencyProbe() {
     }
   };
 
-  const updateTarget = (id: string, field: keyof Target, value: string) => {
+  const updateTarget = (id: string, field: keyof Target, value: string | number) => {
     setTargets(
-      targets.map((t) => (t.id === id ? { ...t, [field]: value } : t))
+      targets.map((t): Target => {
+        if (t.id !== id) return t;
+        // Modes differ per protocol
+        return field === 'protocol' ? { ...t, protocol: value as Target['protocol'], mode: 'simple' } : { ...t, [field]: value };
+      })
     );
   };
 
@@ -99,6 +126,10 @@ function LatencyProbe() {
           url: t.url,
           protocol: t.protocol,
           method: t.method,
+          ...(t.protocol !== 'tcp' ? { mode: t.mode } : {}),
+          ...(t.protocol === 'websocket' && t.mode === 'rtt'
+            ? { rate: t.rate, ...(t.message.trim() ? { message: t.message } : {}) }
+            : {}),
         })),
         regions: selectedRegions,
         samples,
@@ -165,6 +196,51 @@ function LatencyProbe() {
                   w={100}
                 />
               )}
+              {target.protocol === 'http' && (
+                <Select
+                  label={index === 0 ? 'Mode' : undefined}
+                  value={target.mode}
+                  onChange={(v) => updateTarget(target.id, 'mode', v || 'simple')}
+                  data={[
+                    { value: 'simple', label: 'New connection' },
+                    { value: 'detailed', label: 'Phase breakdown' },
+                    { value: 'keepalive', label: 'Keep-alive (warm)' },
+                  ]}
+                  w={170}
+                />
+              )}
+              {target.protocol === 'websocket' && (
+                <Select
+                  label={index === 0 ? 'Mode' : undefined}
+                  value={target.mode}
+                  onChange={(v) => updateTarget(target.id, 'mode', v || 'simple')}
+                  data={[
+                    { value: 'simple', label: 'Handshake' },
+                    { value: 'rtt', label: 'Message RTT' },
+                  ]}
+                  w={170}
+                />
+              )}
+              {target.protocol === 'websocket' && target.mode === 'rtt' && (
+                <>
+                  <TextInput
+                    label="Message"
+                    description="Blank sends ping frames; {id} is replaced per message and must be echoed back"
+                    placeholder='{"op":"ping","req_id":"{id}"}'
+                    value={target.message}
+                    onChange={(e) => updateTarget(target.id, 'message', e.target.value)}
+                    w={260}
+                  />
+                  <NumberInput
+                    label="Rate (msg/s)"
+                    value={target.rate}
+                    onChange={(v) => updateTarget(target.id, 'rate', typeof v === 'number' ? v : 10)}
+                    min={0.1}
+                    max={1000}
+                    w={110}
+                  />
+                </>
+              )}
               <Tooltip label="Remove">
                 <ActionIcon
                   color="red"
@@ -280,6 +356,9 @@ function LatencyProbe() {
                         <Table.Td>
                           <Text fw={500}>{region.regionName}</Text>
                           <Text size="xs" c="dimmed">{region.region}</Text>
+                          {phaseSummary(region) && (
+                            <Text size="xs" c="dimmed">{phaseSummary(region)}</Text>
+                          )}
                         </Table.Td>
                         <Table.Td>
                           <Badge color={region.status === 'success' ? 'green' : 'red'}>
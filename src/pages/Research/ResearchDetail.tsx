@@ -30,7 +30,7 @@ import {
   XAxis,
   YAxis,
 } from 'recharts';
-import { ResearchIteration, ResearchNote, ResearchSession, SessionStatus } from '../../types/research';
+import { ResearchIteration, ResearchNote, ResearchSeries, ResearchSession, SessionStatus } from '../../types/research';
 import { controllerApi } from '../../utils/api';
 
 const STATUS_COLORS: Record<SessionStatus, string> = {
@@ -53,16 +53,22 @@ function ResearchDetail() {
   const navigate = useNavigate();
   const { sessionName } = useParams<{ sessionName: string }>();
   const [session, setSession] = useState<ResearchSession | null>(null);
+  const [pnlSeries, setPnlSeries] = useState<ResearchSeries | null>(null);
   const [loading, setLoading] = useState(false);
   const [newNote, setNewNote] = useState('');
   const [submittingNote, setSubmittingNote] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState<'iterations' | 'notes' | null>(null);
 
   const refresh = useCallback(async () => {
     if (!sessionName) return;
     setLoading(true);
     try {
-      const result = await controllerApi.getResearchSession(sessionName);
+      const [result, series] = await Promise.all([
+        controllerApi.getResearchSession(sessionName),
+        controllerApi.getResearchSeries(sessionName, { metrics: ['final_pnl'], points: 300 }),
+      ]);
       setSession(result);
+      setPnlSeries(series);
     } finally {
       setLoading(false);
     }
@@ -82,11 +88,67 @@ function ResearchDetail() {
     }
   };
 
-  const iterations = session?.iterations ?? [];
+  const loadOlderIterations = async () => {
+    if (!sessionName || !session?.iterationsNextCursor) return;
+    setLoadingOlder('iterations');
+    try {
+      const page = await controllerApi.listResearchIterations(sessionName, { cursor: session.iterationsNextCursor });
+      setSession((prev) => prev && {
+        ...prev,
+        iterations: [...(prev.iterations ?? []), ...page.iterations],
+        iterationsNextCursor: page.nextCursor,
+      });
+    } finally {
+      setLoadingOlder(null);
+    }
+  };
+
+  const loadOlderNotes = async () => {
+    if (!sessionName || !session?.notesNextCursor) return;
+    setLoadingOlder('notes');
+    try {
+      const page = await controllerApi.listResearchNotes(sessionName, { cursor: session.notesNextCursor });
+      setSession((prev) => prev && {
+        ...prev,
+        notes: [...(prev.notes ?? []), ...page.notes],
+        notesNextCursor: page.nextCursor,
+      });
+    } finally {
+      setLoadingOlder(null);
+    }
+  };
+
+  // Metadata and environment are not part of the paged summaries; fetch them per row on demand
+  const loadSpec = async () => {
+    if (!sessionName || session?.specYaml || !session?.specYamlRef) return;
+    const full = await controllerApi.getResearchSession(sessionName, { include: ['spec_yaml'] });
+    setSession((prev) => prev && { ...prev, specYaml: full.specYaml, specYamlRef: undefined });
+  };
 
-  const chartData = iterations.map((iter) => ({
-    iteration: iter.iteration,
-    pnl: iter.metrics?.finalPnl ?? null,
+  const loadIterationDetails = async (iteration: number) => {
+    if (!sessionName) return;
+    const page = await controllerApi.listResearchIterations(sessionName, {
+      start: iteration,
+      limit: 1,
+      include: ['metadata', 'environment', 'metrics'],
+    });
+    const full = page.iterations.find((iter) => iter.iteration === iteration);
+    if (!full) return;
+    setSession((prev) => prev && {
+      ...prev,
+      iterations: (prev.iterations ?? []).map((iter) => (iter.iteration === iteration ? full : iter)),
+    });
+  };
+
+  const iterations = useMemo(
+    () => [...(session?.iterations ?? [])].sort((a, b) => a.iteration - b.iteration),
+    [session?.iterations],
+  );
+
+  // Downsampled across the whole session rather than just the loaded page of iterations
+  const chartData = (pnlSeries?.iteration ?? []).map((iteration, i) => ({
+    iteration,
+    pnl: pnlSeries?.metrics.finalPnl?.[i] ?? null,
   }));
 
   const metricKeys = useMemo(() => {
@@ -173,6 +235,13 @@ function ResearchDetail() {
             </Text>
           </>
         )}
+        {row.original.metadata === undefined && (
+          <Group>
+            <Button size="xs" variant="subtle" onClick={() => loadIterationDetails(row.original.iteration)}>
+              Show metadata & environment
+            </Button>
+          </Group>
+        )}
         {Object.keys(row.original.metadata ?? {}).length > 0 && (
           <>
             <Divider my={4} />
@@ -187,7 +256,7 @@ function ResearchDetail() {
             <Divider my={4} />
             <Text size="xs" fw={600} c="dimmed" tt="uppercase">Environment</Text>
             <Group gap={8}>
-              {Object.entries(row.original.environment).map(([k, v]) => (
+              {Object.entries(row.original.environment ?? {}).map(([k, v]) => (
                 <Text key={k} size="xs" c="dimmed">
                   <Text component="span" size="xs" fw={600}>{k}: </Text>{v}
                 </Text>
@@ -283,6 +352,13 @@ function ResearchDetail() {
       {/* Iterations table */}
       <Title order={4} mb="xs">Iterations</Title>
       <MantineReactTable table={table} />
+      {session?.iterationsNextCursor && (
+        <Group justify="center" mt="xs">
+          <Button size="xs" variant="subtle" onClick={loadOlderIterations} loading={loadingOlder === 'iterations'}>
+            Load older iterations
+          </Button>
+        </Group>
+      )}
 
       {/* Notes section */}
       <Title order={4} mt="xl" mb="xs">Notes</Title>
@@ -305,6 +381,13 @@ function ResearchDetail() {
               <Divider mt="sm" />
             </div>
           ))}
+          {session?.notesNextCursor && (
+            <Group justify="center">
+              <Button size="xs" variant="subtle" onClick={loadOlderNotes} loading={loadingOlder === 'notes'}>
+                Load older notes
+              </Button>
+            </Group>
+          )}
 
           <Textarea
             placeholder="Add a note... (markdown supported)"
@@ -329,15 +412,15 @@ function ResearchDetail() {
       </Card>
 
       {/* Spec accordion */}
-      {session?.specYaml && (
+      {(session?.specYaml || session?.specYamlRef) && (
         <>
           <Title order={4} mt="xl" mb="xs">Spec</Title>
-          <Accordion variant="contained">
+          <Accordion variant="contained" onChange={(value) => { if (value === 'spec') loadSpec(); }}>
             <Accordion.Item value="spec">
               <Accordion.Control>spec.yaml</Accordion.Control>
               <Accordion.Panel>
                 <Code block style={{ fontSize: '0.75rem', whiteSpace: 'pre' }}>
-                  {session.specYaml}
+                  {session.specYaml ?? `${session.specYamlRef?.preview ?? ''}\n…`}
                 </Code>
               </Accordion.Panel>
             </Accordion.Item>
@@ -1,5 +1,5 @@
 import { useState, useEffect, useCallback, useMemo } from 'react';
-import { ActionIcon, Badge, Container, Group, Select, Title, Tooltip } from '@mantine/core';
+import { ActionIcon, Badge, Button, Container, Group, Select, Title, Tooltip } from '@mantine/core';
 import { IconRefresh } from '@tabler/icons-react';
 import ReactTimeAgo from 'react-time-ago';
 import { MantineReactTable, useMantineReactTable, type MRT_ColumnDef, type MRT_Row } from 'mantine-react-table';
@@ -28,6 +28,8 @@ function ResearchList() {
   const [sessions, setSessions] = useState<ResearchSession[]>([]);
   const [loading, setLoading] = useState(false);
   const [statusFilter, setStatusFilter] = useState<string>('');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const refresh = useCallback(async () => {
     setLoading(true);
@@ -37,11 +39,28 @@ function ResearchList() {
         limit: 50,
       });
       setSessions(result.sessions as ResearchSession[]);
+      setNextCursor(result.nextCursor ?? null);
     } finally {
       setLoading(false);
     }
   }, [statusFilter]);
 
+  const loadMore = useCallback(async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const result = await controllerApi.listResearchSessions({
+        status: statusFilter || undefined,
+        limit: 50,
+        cursor: nextCursor,
+      });
+      setSessions((prev) => [...prev, ...(result.sessions as ResearchSession[])]);
+      setNextCursor(result.nextCursor ?? null);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [statusFilter, nextCursor]);
+
   useEffect(() => { refresh(); }, [refresh]);
 
   const columns = useMemo<MRT_ColumnDef<ResearchSession>[]>(() => [
@@ -165,6 +184,13 @@ function ResearchList() {
       </Group>
 
       <MantineReactTable table={table} />
+      {nextCursor && (
+        <Group justify="center" mt="xs">
+          <Button size="xs" variant="subtle" onClick={loadMore} loading={loadingMore}>
+            Load more sessions
+          </Button>
+        </Group>
+      )}
     </Container>
   );
 }
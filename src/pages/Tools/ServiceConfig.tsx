@@ -8,6 +8,7 @@ import {
   Group,
   Select,
   Stack,
+  Table,
   Text,
   Textarea,
   Title,
@@ -15,7 +16,7 @@ import {
 } from '@mantine/core';
 import { IconAlertCircle, IconCheck, IconRefresh } from '@tabler/icons-react';
 import ReactTimeAgo from 'react-time-ago';
-import { ApiError, controllerApi } from '../../utils/api';
+import { ApiError, controllerApi, ServiceConfigVersion } from '../../utils/api';
 
 function sortKeys(obj: unknown): unknown {
   if (Array.isArray(obj)) return obj.map(sortKeys);
@@ -29,6 +30,8 @@ function sortKeys(obj: unknown): unknown {
   return obj;
 }
 
+const HISTORY_LIMIT = 10;
+
 const SERVICES = [
   { value: 'classifier', label: 'gnome-classifier' },
 ];
@@ -48,9 +51,20 @@ function ServiceConfig() {
   const [saving, setSaving] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [saved, setSaved] = useState(false);
+  const [versions, setVersions] = useState<ServiceConfigVersion[]>([]);
+  const [restoring, setRestoring] = useState<number | null>(null);
 
   const isDirty = state !== null && draft !== JSON.stringify(sortKeys(state.config), null, 2);
 
+  const loadHistory = useCallback(async (svc: string) => {
+    try {
+      const res = await controllerApi.listServiceConfigVersions(svc, { limit: HISTORY_LIMIT });
+      setVersions(res.versions);
+    } catch {
+      setVersions([]);
+    }
+  }, []);
+
   const load = useCallback(async (svc: string) => {
     setLoading(true);
     setError(null);
@@ -76,7 +90,8 @@ function ServiceConfig() {
     } finally {
       setLoading(false);
     }
-  }, []);
+    loadHistory(svc);
+  }, [loadHistory]);
 
   useEffect(() => {
     load(service);
@@ -104,6 +119,7 @@ function ServiceConfig() {
         updatedBy: (res as any).updated_by ?? null,
       });
       setDraft(pretty);
+      loadHistory(service);
       setSaved(true);
       setTimeout(() => setSaved(false), 2000);
     } catch (e) {
@@ -117,6 +133,31 @@ function ServiceConfig() {
     }
   };
 
+  const restore = async (toVersion: number) => {
+    if (!state) return;
+    setRestoring(toVersion);
+    setError(null);
+    try {
+      const res = await controllerApi.rollbackServiceConfig(service, toVersion, state.version);
+      setState({
+        config: res.config,
+        version: res.version,
+        updatedAt: (res as any).updated_at ?? null,
+        updatedBy: (res as any).updated_by ?? null,
+      });
+      setDraft(JSON.stringify(sortKeys(res.config), null, 2));
+      loadHistory(service);
+    } catch (e) {
+      if (e instanceof ApiError && e.statusCode === 409) {
+        setError('Config was modified by someone else — refresh to get the latest version before restoring');
+      } else {
+        setError(e instanceof Error ? e.message : 'Failed to restore config');
+      }
+    } finally {
+      setRestoring(null);
+    }
+  };
+
   return (
     <Container size="lg">
       <Stack gap="md">
@@ -189,6 +230,55 @@ function ServiceConfig() {
             {saved ? 'Saved' : 'Save'}
           </Button>
         </Group>
+
+        {versions.length > 0 && (
+          <Stack gap="xs">
+            <Title order={4}>History</Title>
+            <Table>
+              <Table.Thead>
+                <Table.Tr>
+                  <Table.Th>Version</Table.Th>
+                  <Table.Th>Changed by</Table.Th>
+                  <Table.Th>When</Table.Th>
+                  <Table.Th />
+                </Table.Tr>
+              </Table.Thead>
+              <Table.Tbody>
+                {versions.map((v) => (
+                  <Table.Tr key={v.version}>
+                    <Table.Td>
+                      <Group gap="xs">
+                        <Text size="sm">v{v.version}</Text>
+                        {v.rollbackOf !== undefined && (
+                          <Badge size="xs" variant="light">restored v{v.rollbackOf}</Badge>
+                        )}
+                      </Group>
+                    </Table.Td>
+                    <Table.Td>
+                      <Text size="sm">{v.updatedBy === 'service' ? 'service (new defaults)' : v.updatedBy}</Text>
+                    </Table.Td>
+                    <Table.Td>
+                      <Text size="sm" c="dimmed"><ReactTimeAgo date={new Date(v.updatedAt)} /></Text>
+                    </Table.Td>
+                    <Table.Td>
+                      {state && v.version !== state.version && (
+                        <Button
+                          size="xs"
+                          variant="subtle"
+                          onClick={() => restore(v.version)}
+                          loading={restoring === v.version}
+                          disabled={isDirty || restoring !== null}
+                        >
+                          Restore
+                        </Button>
+                      )}
+                    </Table.Td>
+                  </Table.Tr>
+                ))}
+              </Table.Tbody>
+            </Table>
+          </Stack>
+        )}
       </Stack>
     </Container>
   );
@@ -44,4 +44,5 @@ export interface BacktestRun {
 export interface BacktestListResponse {
   runs: BacktestRun[];
   count: number;
+  nextCursor: string | null;
 }
@@ -1,7 +1,16 @@
+export type HttpProbeMode = 'simple' | 'detailed' | 'keepalive';
+export type WebSocketProbeMode = 'simple' | 'rtt';
+export type ProbeMode = HttpProbeMode | WebSocketProbeMode;
+
 export interface LatencyProbeTarget {
   url: string;
   protocol: 'http' | 'websocket' | 'tcp';
   method?: string;
+  mode?: ProbeMode;
+  /** websocket rtt mode: application message containing {id}; ping frames when omitted */
+  message?: string;
+  /** websocket rtt mode: messages per second */
+  rate?: number;
 }
 
 export interface LatencyProbeRequest {
@@ -21,18 +30,35 @@ export interface LatencyResult {
   p95: number;
 }
 
+export interface HttpConnectionPhases {
+  dns: number;
+  connect: number;
+  tls?: number;
+}
+
 export interface RegionResult {
   region: string;
   regionName: string;
   status: 'success' | 'error';
   error?: string;
   latencies: LatencyResult | null;
+  mode?: ProbeMode;
+  /** detailed mode: per-phase stats across samples (total mirrors latencies) */
+  phases?: Partial<Record<'dns' | 'connect' | 'tls' | 'ttfb' | 'total', LatencyResult>>;
+  /** keepalive mode: setup of the reused connection, excluded from latencies */
+  connection?: HttpConnectionPhases;
+  reconnects?: number;
+  /** websocket rtt mode: handshake of the one connection, excluded from latencies */
+  handshake?: number;
+  sent?: number;
+  lost?: number;
 }
 
 export interface TargetResult {
   target: {
     url: string;
     protocol: string;
+    mode?: ProbeMode;
   };
   regions: RegionResult[];
 }
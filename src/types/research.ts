@@ -10,15 +10,30 @@ export interface ResearchSession {
   description: string;
   tags: string[];
   iterationCount: number;
+  // Maintained server-side from the primary metric
   bestIteration?: number;
+  bestValue?: number;
+  bestMetric?: string;
   bestPnl?: number;
   bestSharpe?: number;
   branch: string;
   primaryMetric?: string;
   primaryMetricDirection?: string;
   specYaml?: string;
+  // Set instead of specYaml when the spec is stored in S3; fetch it with include=spec_yaml
+  specYamlRef?: ResearchBlobRef;
+  // Newest page of each; older pages come from the iterations/notes endpoints
   iterations?: ResearchIteration[];
+  iterationsNextCursor?: string | null;
   notes?: ResearchNote[];
+  notesNextCursor?: string | null;
+}
+
+export interface ResearchBlobRef {
+  key: string;
+  sha256: string;
+  size: number;
+  preview?: string;
 }
 
 export interface ResearchIteration {
@@ -31,8 +46,11 @@ export interface ResearchIteration {
   title: string;
   description: string;
   metrics: Record<string, number>;
-  metadata: Record<string, unknown>;
-  environment: Record<string, string>;
+  // Heavy fields, only returned when requested via `include`
+  metadata?: Record<string, unknown>;
+  environment?: Record<string, string>;
+  // Present when the full metrics map is in S3 and `metrics` holds only its numeric entries
+  metricsRef?: ResearchBlobRef;
 }
 
 export interface ResearchNote {
@@ -46,4 +64,47 @@ export interface ResearchNote {
 export interface ResearchSessionListResponse {
   sessions: ResearchSession[];
   count: number;
+  nextCursor?: string | null;
+}
+
+export interface ResearchIterationPage {
+  iterations: ResearchIteration[];
+  count: number;
+  nextCursor: string | null;
+}
+
+export interface ResearchNotePage {
+  notes: ResearchNote[];
+  count: number;
+  nextCursor: string | null;
+}
+
+// Columnar, downsampled metric series; metric names are camelCased by the API client
+export interface ResearchSeries {
+  sessionName: string;
+  method: 'lttb' | 'minmax';
+  total: number;
+  iteration: number[];
+  timestamp: string[];
+  metrics: Record<string, (number | null)[]>;
+}
+
+export interface ResearchSearchResult {
+  sessionName: string;
+  kind: 'note' | 'iteration';
+  score: number;
+  timestamp?: string;
+  snippet: string;
+  title?: string;
+  iteration?: number;
+  author?: string;
+}
+
+export interface ResearchSearchResponse {
+  query: string;
+  results: ResearchSearchResult[];
+  total: number;
+  /** Some term matched too many documents; only its strongest matches were ranked */
+  truncated: boolean;
+  nextCursor?: string | null;
 }
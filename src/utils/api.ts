@@ -1,7 +1,7 @@
 import { fetchAuthSession } from 'aws-amplify/auth';
 import { LaunchRequest, LaunchRule, RuleType } from '../types/launcher';
 import { ContractRelationship, CreateContractRelationship, CreateHedgeKeyword, Currency, DenormalizedListing, Event, EventContract, ExchangeEvent, Exchange, HedgeKeyword, Listing, ListingSpec, PaginationParams, PnlSnapshot, RiskPolicy, Security, Strategy } from '../types';
-import { ResearchSession, ResearchSessionListResponse } from '../types/research';
+import { ResearchIterationPage, ResearchNotePage, ResearchSearchResponse, ResearchSeries, ResearchSession, ResearchSessionListResponse } from '../types/research';
 import { CreateStrategySessionRequest, StrategySession } from '../types/strategy-sessions';
 import { LatencyProbeRequest, LatencyProbeResponse } from '../types/latency-probe';
 import { CoverageSummaryResponse, SecurityCoverageResponse, SecurityExchangeCoverageResponse } from '../types/coverage';
@@ -16,6 +16,34 @@ export interface ServiceConfigResponse {
   updatedBy?: string;
 }
 
+export interface ServiceConfigVersion {
+  version: number;
+  updatedAt: string;
+  updatedBy: string;
+  rollbackOf?: number;
+}
+
+export interface ServiceConfigHistoryResponse {
+  versions: ServiceConfigVersion[];
+  count: number;
+  nextCursor: string | null;
+}
+
+// Returned as-is (not camel-cased) so the config's own keys are left alone
+export interface ServiceConfigVersionDetail {
+  config: Record<string, unknown>;
+  version: number;
+  updated_at: string;
+  updated_by: string;
+  rollback_of?: number;
+}
+
+export interface ServiceConfigPatchOperation {
+  op: 'add' | 'remove' | 'replace';
+  path: string;
+  value?: unknown;
+}
+
 const CONTROLLER_API_URL = import.meta.env.VITE_CONTROLLER_API_URL;
 const REGISTRY_API_URL = import.meta.env.VITE_REGISTRY_API_URL;
 const REGISTRY_API_KEY = import.meta.env.VITE_REGISTRY_API_KEY;
@@ -68,6 +96,8 @@ export async function sendApiRequest<T>(
   try {
     let headers: Record<string, string> = {
       'Content-Type': 'application/json',
+      // Large responses come back compressed only for clients that Accept JSON (a binary media type)
+      Accept: 'application/json',
     };
 
     if (config.apiKey) {
@@ -787,11 +817,12 @@ export const controllerApi = {
       apiUrl: CONTROLLER_API_URL,
       body: request,
     }),
-  listBacktests: (params?: { status?: string; limit?: number }) => {
+  listBacktests: (params?: { status?: string; limit?: number; cursor?: string }) => {
     const queryParams: Record<string, string | number | boolean> = {};
     if (params?.status) queryParams.status = params.status;
     if (params?.limit) queryParams.limit = params.limit;
-    return sendApiRequest<{ runs: any[]; count: number }>('/backtests', 'GET', {
+    if (params?.cursor) queryParams.cursor = params.cursor;
+    return sendApiRequest<{ runs: any[]; count: number; nextCursor: string | null }>('/backtests', 'GET', {
       apiUrl: CONTROLLER_API_URL,
       convertToCamelCase: true,
       queryParams: Object.keys(queryParams).length > 0 ? queryParams : undefined,
@@ -807,21 +838,80 @@ export const controllerApi = {
       apiUrl: CONTROLLER_API_URL,
       convertToCamelCase: true,
     }),
-  listResearchSessions: (params?: { status?: string; limit?: number }) => {
+  listResearchSessions: (params?: { status?: string; owner?: string; tag?: string; limit?: number; cursor?: string }) => {
     const queryParams: Record<string, string | number | boolean> = {};
     if (params?.status) queryParams.status = params.status;
+    if (params?.owner) queryParams.owner = params.owner;
+    if (params?.tag) queryParams.tag = params.tag;
     if (params?.limit) queryParams.limit = params.limit;
+    if (params?.cursor) queryParams.cursor = params.cursor;
     return sendApiRequest<ResearchSessionListResponse>('/research/sessions', 'GET', {
       apiUrl: CONTROLLER_API_URL,
       convertToCamelCase: true,
       queryParams: Object.keys(queryParams).length > 0 ? queryParams : undefined,
     });
   },
-  getResearchSession: (sessionName: string) =>
+  getResearchSession: (sessionName: string, params?: { include?: 'spec_yaml'[] }) =>
     sendApiRequest<ResearchSession>(`/research/sessions/${sessionName}`, 'GET', {
       apiUrl: CONTROLLER_API_URL,
       convertToCamelCase: true,
+      queryParams: params?.include?.length ? { include: params.include.join(',') } : undefined,
     }),
+  listResearchIterations: (
+    sessionName: string,
+    params?: { limit?: number; cursor?: string; order?: 'asc' | 'desc'; start?: number; include?: string[] },
+  ) => {
+    const queryParams: Record<string, string | number | boolean> = {};
+    if (params?.limit) queryParams.limit = params.limit;
+    if (params?.cursor) queryParams.cursor = params.cursor;
+    if (params?.order) queryParams.order = params.order;
+    if (params?.start != null) queryParams.start = params.start;
+    if (params?.include?.length) queryParams.include = params.include.join(',');
+    return sendApiRequest<ResearchIterationPage>(`/research/sessions/${sessionName}/iterations`, 'GET', {
+      apiUrl: CONTROLLER_API_URL,
+      convertToCamelCase: true,
+      queryParams: Object.keys(queryParams).length > 0 ? queryParams : undefined,
+    });
+  },
+  listResearchNotes: (sessionName: string, params?: { limit?: number; cursor?: string; order?: 'asc' | 'desc' }) => {
+    const queryParams: Record<string, string | number | boolean> = {};
+    if (params?.limit) queryParams.limit = params.limit;
+    if (params?.cursor) queryParams.cursor = params.cursor;
+    if (params?.order) queryParams.order = params.order;
+    return sendApiRequest<ResearchNotePage>(`/research/sessions/${sessionName}/notes`, 'GET', {
+      apiUrl: CONTROLLER_API_URL,
+      convertToCamelCase: true,
+      queryParams: Object.keys(queryParams).length > 0 ? queryParams : undefined,
+    });
+  },
+  getResearchSeries: (
+    sessionName: string,
+    params: { metrics: string[]; points?: number; method?: 'lttb' | 'minmax' },
+  ) => {
+    const queryParams: Record<string, string | number | boolean> = { metrics: params.metrics.join(',') };
+    if (params.points) queryParams.points = params.points;
+    if (params.method) queryParams.method = params.method;
+    return sendApiRequest<ResearchSeries>(`/research/sessions/${sessionName}/series`, 'GET', {
+      apiUrl: CONTROLLER_API_URL,
+      convertToCamelCase: true,
+      queryParams,
+    });
+  },
+  searchResearch: (
+    q: string,
+    params?: { session?: string; kind?: 'note' | 'iteration'; limit?: number; cursor?: string },
+  ) => {
+    const queryParams: Record<string, string | number | boolean> = { q };
+    if (params?.session) queryParams.session = params.session;
+    if (params?.kind) queryParams.kind = params.kind;
+    if (params?.limit) queryParams.limit = params.limit;
+    if (params?.cursor) queryParams.cursor = params.cursor;
+    return sendApiRequest<ResearchSearchResponse>('/research/search', 'GET', {
+      apiUrl: CONTROLLER_API_URL,
+      convertToCamelCase: true,
+      queryParams,
+    });
+  },
   addResearchNote: (sessionName: string, content: string) =>
     sendApiRequest<{ sessionName: string; timestamp: string }>(
       `/research/sessions/${sessionName}/notes`, 'POST', {
@@ -840,6 +930,31 @@ export const controllerApi = {
       apiUrl: CONTROLLER_API_URL,
       body: { config, version },
     }),
+  listServiceConfigVersions: (service: string, params?: { limit?: number; cursor?: string }) => {
+    const queryParams: Record<string, string | number | boolean> = {};
+    if (params?.limit) queryParams.limit = params.limit;
+    if (params?.cursor) queryParams.cursor = params.cursor;
+    return sendApiRequest<ServiceConfigHistoryResponse>(`/config/${service}/history`, 'GET', {
+      apiUrl: CONTROLLER_API_URL,
+      convertToCamelCase: true,
+      queryParams,
+    });
+  },
+  getServiceConfigVersion: (service: string, at: { version: number } | { at: string }) =>
+    sendApiRequest<ServiceConfigVersionDetail>(`/config/${service}/history`, 'GET', {
+      apiUrl: CONTROLLER_API_URL,
+      queryParams: 'version' in at ? { version: at.version } : { at: at.at },
+    }),
+  diffServiceConfig: (service: string, from: number, to?: number) =>
+    sendApiRequest<{ from: number; to: number; patch: ServiceConfigPatchOperation[] }>(`/config/${service}/diff`, 'GET', {
+      apiUrl: CONTROLLER_API_URL,
+      queryParams: to === undefined ? { from } : { from, to },
+    }),
+  rollbackServiceConfig: (service: string, toVersion: number, version: number) =>
+    sendApiRequest<ServiceConfigResponse>(`/config/${service}/rollback`, 'POST', {
+      apiUrl: CONTROLLER_API_URL,
+      body: { to_version: toVersion, version },
+    }),
 }
 
 export const launcherApi = {